@@ -0,0 +1,116 @@
+"""Benchmark of serializing a feed page of 100 tweets.
+
+Compares jsonable_encoder + JSONResponse (stdlib json) with FastJSONResponse
+(orjson): best time of one render and peak memory allocated by it.
+Run from the api directory with the app's environment:
+
+    PYTHONPATH=src python benchmarks/feed_serialization.py
+"""
+import tracemalloc
+from timeit import repeat
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from utils.responses import FastJSONResponse  # noqa
+
+TWEETS = 100
+LIKES_PER_TWEET = 20
+ROUNDS = 50
+
+
+def get_feed_page(tweets: int = TWEETS, likes: int = LIKES_PER_TWEET) -> dict:
+    """Return payload of TweetsMethods.get_posts_list() with full likes.
+
+    Parameters:
+        tweets: number of tweets
+        likes: number of likes of every tweet
+
+    Returns:
+        dict
+    """
+    return {
+        "result": True,
+        "tweets": [
+            {
+                "id": tweet_id,
+                "content": "Tweet number {id} about rockets and cats".format(id=tweet_id),
+                "attachments": [
+                    "https://s3.timeweb.cloud/bucket/{id}-{num}.jpg".format(
+                        id=tweet_id, num=num,
+                    )
+                    for num in range(2)
+                ],
+                "author": {
+                    "id": tweet_id % 10,
+                    "name": "user{id}".format(id=tweet_id % 10),
+                },
+                "likes": [
+                    {"user_id": user_id, "name": "user{id}".format(id=user_id)}
+                    for user_id in range(likes)
+                ],
+            }
+            for tweet_id in range(tweets, 0, -1)
+        ],
+        "next_cursor": "MDoxMDA",
+    }
+
+
+def render_stdlib(page: dict) -> bytes:
+    """Return body rendered by jsonable_encoder and JSONResponse.
+
+    Parameters:
+        page: feed page
+
+    Returns:
+        bytes
+    """
+    return JSONResponse(content=jsonable_encoder(page)).body
+
+
+def render_orjson(page: dict) -> bytes:
+    """Return body rendered by FastJSONResponse.
+
+    Parameters:
+        page: feed page
+
+    Returns:
+        bytes
+    """
+    return FastJSONResponse(content=page).body
+
+
+def measure(render: Callable[[dict], bytes], page: dict) -> tuple[float, int]:
+    """Return best time of one render and peak memory allocated by it.
+
+    Parameters:
+        render: function rendering the page
+        page: feed page
+
+    Returns:
+        (milliseconds, bytes)
+    """
+    best_time = min(repeat(lambda: render(page), number=1, repeat=ROUNDS))
+    tracemalloc.start()
+    render(page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best_time * 1000, peak
+
+
+if __name__ == "__main__":
+    feed_page = get_feed_page()
+    body_size = len(render_orjson(feed_page))
+    print(  # noqa: WPS421
+        "{tweets} tweets, {likes} likes each, {size} KiB body".format(
+            tweets=TWEETS, likes=LIKES_PER_TWEET, size=body_size // 1024,
+        ),
+    )
+    renders = (("jsonable_encoder", render_stdlib), ("orjson", render_orjson))
+    for name, render_page in renders:
+        elapsed, peak_memory = measure(render_page, feed_page)
+        print(  # noqa: WPS421
+            "{name:>16}: {elapsed:7.2f} ms, peak {peak:6d} KiB".format(
+                name=name, elapsed=elapsed, peak=peak_memory // 1024,
+            ),
+        )
@@ -0,0 +1,87 @@
+"""Benchmark of uploading medias by /api/medias and deleting their tweets.
+
+Runs the app in process against the "memory" S3 backend, so the storage
+isn't needed and S3_LOCAL_LATENCY / S3_LOCAL_ERROR_RATE give the same
+conditions on every run. Postgres is still used. Run from the api directory
+with the app's environment and an api-key of a user:
+
+    S3_BACKEND=memory PYTHONPATH=src python benchmarks/media_paths.py <api-key>
+"""
+import asyncio
+import sys
+import time
+from statistics import mean, quantiles
+
+from asgi_lifespan import LifespanManager
+from httpx import ASGITransport, AsyncClient
+from config import S3_BACKEND  # noqa
+from main import app  # noqa
+
+ROUNDS = 200
+
+
+async def upload_and_delete(
+    client: AsyncClient, api_key: str, number: int, timings: dict[str, list],
+) -> None:
+    """Upload a media, post it in a tweet and delete the tweet.
+
+    Parameters:
+        client: AsyncClient of the app
+        api_key: api-key of the user
+        number: number of the round, the media content is unique
+        timings: seconds of the requests by their names
+    """
+    headers = {"api-key": api_key}
+    started = time.perf_counter()
+    upload = await client.post(
+        "/api/medias",
+        files={"file": ("bench.jpg", b"media %d" % number, "image/jpeg")},
+        headers=headers,
+    )
+    timings["upload"].append(time.perf_counter() - started)
+    upload.raise_for_status()
+    tweet = await client.post(
+        "/api/tweets",
+        json={"tweet_data": "bench", "tweet_media_ids": [upload.json()["media_id"]]},
+        headers=headers,
+    )
+    tweet.raise_for_status()
+    started = time.perf_counter()
+    deleted = await client.delete(
+        "/api/tweets/{id}".format(id=tweet.json()["tweet_id"]), headers=headers,
+    )
+    timings["delete"].append(time.perf_counter() - started)
+    deleted.raise_for_status()
+
+
+async def run_benchmark(api_key: str) -> dict[str, list]:
+    """Return timings of ROUNDS uploads and deletes.
+
+    Parameters:
+        api_key: api-key of the user
+
+    Returns:
+        dict: seconds of the requests by their names
+    """
+    timings: dict[str, list] = {"upload": [], "delete": []}
+    async with LifespanManager(app):
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://bench",
+        ) as client:
+            for number in range(ROUNDS):
+                await upload_and_delete(client, api_key, number, timings)  # noqa: WPS476
+    return timings
+
+
+if __name__ == "__main__":
+    if S3_BACKEND != "memory":
+        sys.exit("Set S3_BACKEND=memory to run the benchmark offline")
+    results = asyncio.run(run_benchmark(sys.argv[1]))
+    for name, seconds in results.items():
+        print(  # noqa: WPS421
+            "{name:>8}: mean {mean:6.2f} ms, p95 {p95:6.2f} ms".format(
+                name=name,
+                mean=mean(seconds) * 1000,
+                p95=quantiles(seconds, n=20)[-1] * 1000,
+            ),
+        )
@@ -5,6 +5,23 @@ from dotenv import load_dotenv
 required_db_env_vars = ["DB_HOST", "DB_PORT", "DB_PASS", "DB_USER_NAME", "DB_NAME"]
 required_s3_env_vars = ["S3_ACCESS_KEY", "S3_SECRET_KEY", "S3_URL", "S3_BUCKET_NANE"]
 
+
+def get_bool_env(name: str, default: bool) -> bool:
+    """Return boolean ENV variable.
+
+    Parameters:
+        name: ENV variable name
+        default: value if the variable is not set
+
+    Returns:
+        bool: True for "1", "true", "yes", "on"
+    """
+    env_value = os.getenv(name)
+    if env_value is None:
+        return default
+    return env_value.strip().lower() in {"1", "true", "yes", "on"}
+
+
 env_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env")
 load_dotenv(dotenv_path=env_path)
 
@@ -25,10 +42,140 @@ if all(var in os.environ for var in required_db_env_vars):
 else:
     raise EnvironmentError("Database ENV variables not found!")
 
-if all(var in os.environ for var in required_s3_env_vars):
-    S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY")
-    S3_SECRET_KEY = os.getenv("S3_SECRET_KEY")
-    S3_URL = os.getenv("S3_URL")
-    S3_BUCKET_NANE = os.getenv("S3_BUCKET_NANE")
+# comma separated "host" or "host:port" of read replicas,
+# they are accessed with the same credentials and database name as the primary
+DB_REPLICA_HOSTS = tuple(
+    host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()
+)
+DATABASE_REPLICA_URLS = tuple(
+    "{driver}://{username}:{db_pass}@{host}:{port}/{db_name}".format(
+        driver="postgresql+asyncpg",
+        host=replica.partition(":")[0],
+        port=replica.partition(":")[2] or DB_PORT,
+        db_pass=DB_PASS,
+        username=DB_USER_NAME,
+        db_name=DB_NAME,
+    )
+    for replica in DB_REPLICA_HOSTS
+)
+# how long a read waits for a replica to replay the user's last write
+DB_REPLICA_WAIT_TIMEOUT = float(os.getenv("DB_REPLICA_WAIT_TIMEOUT", "0.5"))
+DB_REPLICA_POLL_INTERVAL = float(os.getenv("DB_REPLICA_POLL_INTERVAL", "0.05"))
+DB_CONSISTENCY_TOKEN_TTL = int(os.getenv("DB_CONSISTENCY_TOKEN_TTL", "60"))
+
+# "queue" keeps a pool of connections per worker, "null" opens one per session
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = get_bool_env("DB_POOL_PRE_PING", default=True)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+DB_COMMAND_TIMEOUT = float(os.getenv("DB_COMMAND_TIMEOUT", "0")) or None
+# disables prepared statements caching for PgBouncer in transaction mode
+DB_PGBOUNCER = get_bool_env("DB_PGBOUNCER", default=False)
+
+# "memory" keeps objects in the memory of the API process instead of S3_URL,
+# so benchmarks run offline, the S3 variables are optional then
+S3_BACKEND = os.getenv("S3_BACKEND", "s3")
+# seconds added to every request of the "memory" backend
+# and share of its requests failing with SlowDown
+S3_LOCAL_LATENCY = float(os.getenv("S3_LOCAL_LATENCY", "0"))
+S3_LOCAL_ERROR_RATE = float(os.getenv("S3_LOCAL_ERROR_RATE", "0"))
+
+if all(var in os.environ for var in required_s3_env_vars) or S3_BACKEND == "memory":
+    S3_ACCESS_KEY = os.getenv("S3_ACCESS_KEY", "local")
+    S3_SECRET_KEY = os.getenv("S3_SECRET_KEY", "local")
+    S3_URL = os.getenv("S3_URL", "http://localhost:9000")
+    S3_BUCKET_NANE = os.getenv("S3_BUCKET_NANE", "medias")
 else:
     raise EnvironmentError("S3 ENV variables not found!")
+
+# URLs of medias are built from their keys at serialization time,
+# the base may point to a CDN or a caching proxy instead of the bucket
+MEDIA_PUBLIC_URL = os.getenv(
+    "MEDIA_PUBLIC_URL", "{url}/{bucket}".format(url=S3_URL, bucket=S3_BUCKET_NANE),
+).rstrip("/")
+
+# connection pool of the S3 client shared by the requests
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", "50"))
+S3_CONNECT_TIMEOUT = float(os.getenv("S3_CONNECT_TIMEOUT", "5"))
+S3_READ_TIMEOUT = float(os.getenv("S3_READ_TIMEOUT", "30"))
+S3_KEEPALIVE_TIMEOUT = float(os.getenv("S3_KEEPALIVE_TIMEOUT", "60"))
+# DeleteObjects requests of one delete_multiple() run at once
+S3_DELETE_CONCURRENCY = int(os.getenv("S3_DELETE_CONCURRENCY", "4"))
+# objects bigger than a part are uploaded by parts, the min part size is 5 MiB
+S3_UPLOAD_PART_SIZE = int(os.getenv("S3_UPLOAD_PART_SIZE", str(8 * 1024 * 1024)))
+# bytes of one upload sent to S3 at once
+S3_UPLOAD_MAX_IN_FLIGHT = int(
+    os.getenv("S3_UPLOAD_MAX_IN_FLIGHT", str(32 * 1024 * 1024)),
+)
+# max size of an uploaded media in bytes
+MEDIA_MAX_SIZE = int(os.getenv("MEDIA_MAX_SIZE", str(10 * 1024 * 1024)))
+# Medias can be uploaded by clients directly to S3 by presigned POST forms.
+# A form is valid for MEDIA_UPLOAD_URL_TTL seconds, a media not confirmed
+# in MEDIA_PENDING_TTL seconds is deleted by MediaCleanupWorker.
+MEDIA_UPLOAD_URL_TTL = int(os.getenv("MEDIA_UPLOAD_URL_TTL", "600"))
+MEDIA_PENDING_TTL = int(os.getenv("MEDIA_PENDING_TTL", "3600"))
+# Resized variants of uploaded images are rendered by MEDIA_VARIANT_WORKERS
+# processes, 0 disables them. At most MEDIA_VARIANT_QUEUE_SIZE medias
+# of an API process wait or are rendered, the next ones get no variants.
+MEDIA_VARIANT_WORKERS = int(os.getenv("MEDIA_VARIANT_WORKERS", "2"))
+MEDIA_VARIANT_QUEUE_SIZE = int(os.getenv("MEDIA_VARIANT_QUEUE_SIZE", "32"))
+# "webp" or "jpeg"
+MEDIA_VARIANT_FORMAT = os.getenv("MEDIA_VARIANT_FORMAT", "webp")
+# Objects of deleted medias are deleted by a worker of the API process.
+# It polls the queue every MEDIA_CLEANUP_INTERVAL seconds, 0 disables it.
+# A failed job is retried after MEDIA_CLEANUP_BACKOFF seconds doubled
+# on every attempt, after MEDIA_CLEANUP_MAX_ATTEMPTS it's dead-lettered.
+MEDIA_CLEANUP_INTERVAL = float(os.getenv("MEDIA_CLEANUP_INTERVAL", "5"))
+MEDIA_CLEANUP_BATCH_SIZE = int(os.getenv("MEDIA_CLEANUP_BATCH_SIZE", "100"))
+MEDIA_CLEANUP_MAX_ATTEMPTS = int(os.getenv("MEDIA_CLEANUP_MAX_ATTEMPTS", "8"))
+MEDIA_CLEANUP_BACKOFF = float(os.getenv("MEDIA_CLEANUP_BACKOFF", "30"))
+MEDIA_CLEANUP_MAX_BACKOFF = float(os.getenv("MEDIA_CLEANUP_MAX_BACKOFF", "3600"))
+# Medias not attached to tweets MEDIA_GC_GRACE_PERIOD seconds after their
+# last upload are deleted by utils/media_gc.py, MEDIA_GC_CHUNK_SIZE at once.
+MEDIA_GC_GRACE_PERIOD = float(os.getenv("MEDIA_GC_GRACE_PERIOD", "86400"))
+MEDIA_GC_CHUNK_SIZE = int(os.getenv("MEDIA_GC_CHUNK_SIZE", "500"))
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379")
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+AUTH_CACHE_TTL = float(os.getenv("AUTH_CACHE_TTL", "300"))
+AUTH_CACHE_NEGATIVE_TTL = float(os.getenv("AUTH_CACHE_NEGATIVE_TTL", "5"))
+AUTH_SHARED_CACHE_TTL = float(os.getenv("AUTH_SHARED_CACHE_TTL", "3600"))
+# Keys issued before the lookup digests are matched by crypt() over every
+# row without digest. Run utils/api_key_backfill.py with the known keys,
+# then switch AUTH_LEGACY_KEYS off, the keys not backfilled stop working.
+AUTH_LEGACY_KEYS = get_bool_env("AUTH_LEGACY_KEYS", default=True)
+AUTH_BACKFILL_BATCH_SIZE = int(os.getenv("AUTH_BACKFILL_BATCH_SIZE", "100"))
+
+# page size of GET /api/tweets when limit is omitted and its upper bound
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", "20"))
+FEED_MAX_PAGE_SIZE = int(os.getenv("FEED_MAX_PAGE_SIZE", "100"))
+
+# "pull" builds the feed from followers at read time,
+# "push" reads it from home timelines in Redis filled at write time,
+# "hybrid" doesn't push tweets of authors with many followers,
+# they are merged into the timeline at read time
+FEED_MODE = os.getenv("FEED_MODE", "pull")
+TIMELINE_SIZE = int(os.getenv("TIMELINE_SIZE", "800"))
+TIMELINE_TTL = int(os.getenv("TIMELINE_TTL", "604800"))
+FEED_CELEBRITY_THRESHOLD = int(os.getenv("FEED_CELEBRITY_THRESHOLD", "10000"))
+AUTHOR_TWEETS_SIZE = int(os.getenv("AUTHOR_TWEETS_SIZE", "100"))
+
+# "json" builds feed pages inside Postgres in one query, "orm" loads ORM objects
+FEED_QUERY = os.getenv("FEED_QUERY", "json")
+
+# "summary" returns like_count, liked and the first FEED_LIKERS_PREVIEW likers
+# of every tweet in the feed instead of all the likes ("full")
+FEED_LIKES = os.getenv("FEED_LIKES", "full")
+FEED_LIKERS_PREVIEW = int(os.getenv("FEED_LIKERS_PREVIEW", "3"))
+
+# "variants" returns attachments of the feed as maps of the original link
+# and links of its resized variants instead of the original links ("links")
+FEED_ATTACHMENTS = os.getenv("FEED_ATTACHMENTS", "links")
+
+# Seconds feed pages of a user are cached, 0 disables the feed cache.
+# Pages are dropped earlier by tweets, likes and follows changing them.
+FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", "60"))
@@ -1,14 +1,121 @@
-from typing import AsyncGenerator
+import asyncio
+import re
+from itertools import cycle
+from time import monotonic, perf_counter
+from typing import AsyncGenerator, Optional
+from uuid import uuid4
 
-from sqlalchemy import MetaData, NullPool
+from fastapi import Request
+from redis.exceptions import RedisError
+from sqlalchemy import MetaData, NullPool, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine  # noqa
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker  # noqa
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker  # noqa
 from sqlalchemy.orm import declarative_base  # noqa
-from config import DATABASE_URL  # noqa
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from config import DATABASE_URL, DB_COMMAND_TIMEOUT, DB_CONNECT_TIMEOUT  # noqa
+from config import DB_MAX_OVERFLOW, DB_PGBOUNCER, DB_POOL_MODE, DB_POOL_PRE_PING  # noqa
+from config import DB_POOL_RECYCLE, DB_POOL_SIZE, DB_POOL_TIMEOUT  # noqa
+from config import DATABASE_REPLICA_URLS, DB_CONSISTENCY_TOKEN_TTL  # noqa
+from config import DB_REPLICA_POLL_INTERVAL, DB_REPLICA_WAIT_TIMEOUT  # noqa
+from utils.cache import TTLCache, get_redis  # noqa
+from utils.logger_config import orm_logger  # noqa
+from utils.metrics import metrics  # noqa
 
-engine = create_async_engine(DATABASE_URL, poolclass=NullPool)
+LSN_PATTERN = re.compile("^[0-9A-F]{1,8}/[0-9A-F]{1,8}$")
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Connection pool which reports checkout waits to metrics."""
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            metrics.increment("db.pool.checkout_timeouts")
+            raise
+        finally:
+            metrics.observe("db.pool.checkout_wait", perf_counter() - start)
+
+
+def get_connect_args() -> dict:
+    """Return asyncpg connection arguments from config.
+
+    Returns:
+        dict: connect_args for create_async_engine
+    """
+    connect_args: dict = {"timeout": DB_CONNECT_TIMEOUT}
+    if DB_COMMAND_TIMEOUT:
+        connect_args["command_timeout"] = DB_COMMAND_TIMEOUT
+    if DB_PGBOUNCER:
+        # PgBouncer in transaction mode can route the next statement
+        # to another server connection, where the prepared statement is unknown.
+        connect_args.update(
+            statement_cache_size=0,
+            prepared_statement_cache_size=0,
+            prepared_statement_name_func=lambda: "__asyncpg_{id}__".format(
+                id=uuid4(),
+            ),
+        )
+    return connect_args
+
+
+def create_engine(database_url: str, name: str) -> AsyncEngine:
+    """Create async engine with the pool configured by DB_POOL_* settings.
+
+    Pool state of "queue" mode is exported as "db.<name>.pool.*" gauges.
+
+    Parameters:
+        database_url: str
+        name: engine name used in metrics
+
+    Returns:
+        AsyncEngine
+    """
+    if DB_POOL_MODE == "null":
+        return create_async_engine(
+            database_url, poolclass=NullPool, connect_args=get_connect_args(),
+        )
+
+    new_engine = create_async_engine(
+        database_url,
+        poolclass=InstrumentedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        pool_timeout=DB_POOL_TIMEOUT,
+        connect_args=get_connect_args(),
+    )
+    pool_capacity: int = DB_POOL_SIZE + max(DB_MAX_OVERFLOW, 0)
+    metrics.register_gauge(
+        "db.{name}.pool.checked_out".format(name=name),
+        lambda: new_engine.pool.checkedout(),
+    )
+    metrics.register_gauge(
+        "db.{name}.pool.saturation".format(name=name),
+        lambda: new_engine.pool.checkedout() / pool_capacity,
+    )
+    return new_engine
+
+
+engine = create_engine(DATABASE_URL, name="primary")
 async_session = async_sessionmaker(engine, expire_on_commit=False, autoflush=True)
 
+replica_sessions = [
+    async_sessionmaker(
+        create_engine(replica_url, name="replica{num}".format(num=num)),
+        expire_on_commit=False,
+        autoflush=True,
+    )
+    for num, replica_url in enumerate(DATABASE_REPLICA_URLS)
+]
+next_replica_session = cycle(replica_sessions)
+# user id -> consistency token, used when Redis isn't available
+local_consistency_tokens = TTLCache(max_size=10000, ttl=DB_CONSISTENCY_TOKEN_TTL)
+
 base_metadata = MetaData()
 BaseModel = declarative_base(metadata=base_metadata)
 
@@ -23,6 +130,152 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_async_read_session(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
+    """Async generator yields session for read-only requests.
+
+    Sessions are spread over the read replicas. If the user has written
+    recently, the replica has to replay the write first (read-your-writes),
+    otherwise the read goes to the primary.
+    Without configured replicas it is the same as get_async_session.
+
+    Parameters:
+        request: FastAPI.request
+
+    Yields:
+        AsyncGenerator
+    """
+    session: AsyncSession = await open_read_session(request)
+    async with session:
+        yield session
+
+
+async def open_read_session(request: Request) -> AsyncSession:
+    """Return session to a replica that is fresh enough for the user.
+
+    Parameters:
+        request: FastAPI.request
+
+    Returns:
+        AsyncSession to a replica or to the primary
+    """
+    if not replica_sessions:
+        return async_session()
+
+    token: Optional[str] = await get_consistency_token(request)
+    replica_session: AsyncSession = next(next_replica_session)()
+    if token is None or await wait_for_replica(replica_session, token):
+        metrics.increment("db.reads.replica")
+        return replica_session
+
+    await replica_session.close()
+    metrics.increment("db.reads.primary")
+    return async_session()
+
+
+async def get_current_lsn(session: AsyncSession) -> str:
+    """Return current WAL position of the primary.
+
+    Parameters:
+        session: AsyncSession to the primary
+
+    Returns:
+        str: LSN like "0/16B3748"
+    """
+    request = await session.execute(text("SELECT pg_current_wal_lsn()::text"))
+    return request.scalar_one()
+
+
+async def wait_for_replica(
+    session: AsyncSession,
+    token: str,
+    timeout: float = DB_REPLICA_WAIT_TIMEOUT,
+) -> bool:
+    """Wait until the replica has replayed WAL up to the consistency token.
+
+    Parameters:
+        session: AsyncSession to the replica
+        token: LSN returned by a write
+        timeout: seconds to wait
+
+    Returns:
+        bool: True if the replica has caught up in time
+    """
+    deadline: float = monotonic() + timeout
+    expression = text(
+        "SELECT pg_last_wal_replay_lsn() >= CAST(CAST(:lsn AS TEXT) AS pg_lsn)",
+    )
+    try:
+        while True:  # noqa: WPS457
+            request = await session.execute(expression, {"lsn": token})
+            if request.scalar():
+                return True
+            if monotonic() >= deadline:
+                return False
+            await asyncio.sleep(DB_REPLICA_POLL_INTERVAL)
+    except (SQLAlchemyError, OSError) as err:
+        orm_logger.warning("Replica is unavailable: %s", err)
+    return False
+
+
+async def get_consistency_token(request: Request) -> Optional[str]:
+    """Return LSN of the last write of the user.
+
+    The token is taken from the "consistency-token" header
+    or from the one saved by save_consistency_token.
+
+    Parameters:
+        request: FastAPI.request
+
+    Returns:
+        str or None if there is no recent write
+    """
+    token: Optional[str] = request.headers.get("consistency-token")
+    if token is not None:
+        return token if LSN_PATTERN.match(token) else None
+
+    user_id: Optional[int] = getattr(request.state, "user_id", None)
+    redis = get_redis(request)
+    if redis is None:
+        return local_consistency_tokens.get(user_id)
+    try:
+        token = await redis.get("consistency-token:{id}".format(id=user_id))
+    except RedisError as err:
+        orm_logger.warning("Consistency tokens are unavailable: %s", err)
+        return local_consistency_tokens.get(user_id)
+    return token.decode() if token else None
+
+
+async def save_consistency_token(request: Request) -> Optional[str]:
+    """Save current LSN of the primary as the user's last write.
+
+    Parameters:
+        request: FastAPI.request
+
+    Returns:
+        str: consistency token or None if there are no replicas
+    """
+    if not replica_sessions:
+        return None
+
+    async with async_session() as session:
+        token: str = await get_current_lsn(session)
+    user_id: Optional[int] = getattr(request.state, "user_id", None)
+    local_consistency_tokens.set(user_id, token)
+    redis = get_redis(request)
+    if redis is not None:
+        try:
+            await redis.set(
+                "consistency-token:{id}".format(id=user_id),
+                token,
+                ex=DB_CONSISTENCY_TOKEN_TTL,
+            )
+        except RedisError as err:
+            orm_logger.warning("Consistency tokens are unavailable: %s", err)
+    return token
+
+
 class ResponseData:
     """Class for returning results from orm methods."""
 
@@ -1,9 +1,200 @@
-from sqlalchemy import delete, select
+from datetime import timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy import Row, delete, func, select, update
+from sqlalchemy.dialects.postgresql import array, insert
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from config import MEDIA_GC_GRACE_PERIOD, MEDIA_PENDING_TTL  # noqa
 from database_models.db_config import ResponseData  # noqa
-from database_models.tweets_orm_models import MediasTweets, Medias  # noqa
+from database_models.tweets_orm_models import MediaCleanupJobs, MediasTweets  # noqa
+from database_models.tweets_orm_models import Medias  # noqa
 from utils.logger_config import orm_logger  # noqa
+from utils.s3_config import S3utils  # noqa
+
+
+async def link_tweet_medias(
+    session: AsyncSession, tweet_id: int, media_ids: list[int],
+) -> bool:
+    """Attach medias to the tweet and count the references.
+
+    Parameters:
+        session: AsyncSession, committed by the caller
+        tweet_id: int
+        media_ids: ids of the medias without duplicates
+
+    Returns:
+        bool: False if some of the medias are pending, the session
+            must be rolled back then
+    """
+    session.add_all(
+        MediasTweets(tweet_id=tweet_id, media_id=media_id) for media_id in media_ids
+    )
+    await session.flush()
+    request = await session.execute(
+        update(Medias)
+        .where(Medias.id.in_(media_ids), Medias.expires_at.is_(None))
+        .values(ref_count=Medias.ref_count + 1)
+        .returning(Medias.id),
+    )
+    return len(request.scalars().all()) == len(media_ids)
+
+
+def get_object_keys(medias: Iterable[Row]) -> list[str]:
+    """Return keys of the objects of the medias and their variants.
+
+    Parameters:
+        medias: rows with key and variants of the medias
+
+    Returns:
+        list[str]
+    """
+    return [
+        key
+        for media in medias
+        for key in (media.key, *(media.variants or {}).values())
+    ]
+
+
+async def lock_media_keys(session: AsyncSession, keys: list[str]) -> None:
+    """Lock the keys until the session is committed.
+
+    MediasMethods.add() stores a media under the lock before it checks
+    whether the object is stored, MediaCleanupWorker checks the medias
+    and deletes their objects under it, so an object isn't deleted
+    while a new media of the key skips its upload. The locks are taken
+    in one order, so the sessions don't deadlock.
+
+    Parameters:
+        session: AsyncSession
+        keys: keys of the objects
+    """
+    if not keys:
+        return
+    key = func.unnest(array(keys)).column_valued("key")
+    key_locks = (
+        select(func.hashtextextended(key, 0).label("key_lock"))
+        .distinct()
+        .order_by("key_lock")
+        .subquery()
+    )
+    await session.execute(select(func.pg_advisory_xact_lock(key_locks.c.key_lock)))
+
+
+async def queue_cleanup_jobs(session: AsyncSession, keys: list[str]) -> None:
+    """Queue objects of the deleted medias for MediaCleanupWorker.
+
+    Parameters:
+        session: AsyncSession deleting the medias, committed by the caller
+        keys: keys of the objects of the deleted medias
+    """
+    if keys:
+        await session.execute(
+            insert(MediaCleanupJobs),
+            [{"key": key} for key in keys],
+        )
+
+
+async def release_tweet_medias(session: AsyncSession, tweet_id: int) -> list[str]:
+    """Detach medias from the tweet and delete the medias no tweet references.
+
+    Objects of the deleted medias are queued for MediaCleanupWorker
+    in the same transaction. Medias uploaded in the last MEDIA_GC_GRACE_PERIOD
+    seconds are kept, the upload may have returned their id to another user
+    who hasn't posted it yet, they are collected by media_gc.py.
+
+    Parameters:
+        session: AsyncSession, committed by the caller
+        tweet_id: int
+
+    Returns:
+        list[str]: keys of the deleted medias
+    """
+    unlink_expr = (
+        delete(MediasTweets)
+        .where(MediasTweets.tweet_id == tweet_id)
+        .returning(MediasTweets.media_id)
+    )
+    unlink_request = await session.execute(unlink_expr)
+    media_ids: list[int] = unlink_request.scalars().all()
+    if not media_ids:
+        return []
+
+    await session.execute(
+        update(Medias)
+        .where(Medias.id.in_(media_ids))
+        .values(ref_count=Medias.ref_count - 1),
+    )
+    release_expr = (
+        delete(Medias)
+        .where(
+            Medias.id.in_(media_ids),
+            Medias.ref_count <= 0,
+            Medias.uploaded_at < func.now() - timedelta(seconds=MEDIA_GC_GRACE_PERIOD),
+        )
+        .returning(Medias.key, Medias.variants)
+    )
+    release_request = await session.execute(release_expr)
+    released_medias: list[Row] = release_request.all()
+    await queue_cleanup_jobs(session, get_object_keys(released_medias))
+    return [media.key for media in released_medias]
+
+
+async def expire_pending_medias(session: AsyncSession, batch_size: int) -> list[str]:
+    """Delete pending medias which were not confirmed in time.
+
+    The objects may have been uploaded, they are queued for MediaCleanupWorker.
+    Medias locked by another worker or being confirmed are skipped.
+
+    Parameters:
+        session: AsyncSession, committed by the caller
+        batch_size: max number of the medias
+
+    Returns:
+        list[str]: keys of the deleted medias
+    """
+    expired_ids = (
+        select(Medias.id)
+        .where(Medias.expires_at < func.now())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    request = await session.execute(
+        delete(Medias)
+        .where(Medias.id.in_(expired_ids))
+        .returning(Medias.key, Medias.variants),
+    )
+    expired_medias: list[Row] = request.all()
+    await queue_cleanup_jobs(session, get_object_keys(expired_medias))
+    return [media.key for media in expired_medias]
+
+
+async def set_media_variants(
+    session: AsyncSession, media_id: int, variants: dict[str, str],
+) -> bool:
+    """Store keys of the resized variants of the media.
+
+    If the media has been deleted or got its variants meanwhile,
+    objects of the variants are queued for MediaCleanupWorker.
+
+    Parameters:
+        session: AsyncSession, committed by the caller
+        media_id: int
+        variants: keys of the variants by their names
+
+    Returns:
+        bool: False if the variants were not stored
+    """
+    request = await session.execute(
+        update(Medias)
+        .where(Medias.id == media_id, Medias.variants.is_(None))
+        .values(variants=variants)
+        .returning(Medias.id),
+    )
+    if request.scalar_one_or_none() is None:
+        await queue_cleanup_jobs(session, list(variants.values()))
+        return False
+    return True
 
 
 class MediasMethods(Medias):
@@ -13,7 +204,7 @@ class MediasMethods(Medias):
     async def get_by_tweet_id(
         cls, tweet_id: int, async_session: AsyncSession,
     ) -> ResponseData:
-        """Return links by tweet id.
+        """Return URLs of the medias by tweet id.
 
         Parameters:
             tweet_id: int
@@ -25,14 +216,17 @@ class MediasMethods(Medias):
         try:
             async with async_session as session:
                 expr = (
-                    select(Medias.link).
+                    select(Medias.key).
                     join(MediasTweets, MediasTweets.media_id == Medias.id).
                     where(MediasTweets.tweet_id == tweet_id)
                 )
                 request = await session.execute(expr)
                 data: list = request.scalars().fetchall()
                 if data:
-                    result, code = {"result": True, "links": data}, 200
+                    result, code = {
+                        "result": True,
+                        "links": [S3utils.get_url(key) for key in data],
+                    }, 200
                 else:
                     result, code = {"result": False}, 404
         except SQLAlchemyError as err:
@@ -46,12 +240,55 @@ class MediasMethods(Medias):
 
     @classmethod
     async def add(
-        cls, link: str, async_session: AsyncSession,
+        cls, key: str, async_session: AsyncSession,
     ) -> ResponseData:
-        """Add tweet id and link to the medias table.
+        """Add key of the media to the medias table.
+
+        Keys are named by the content of the media, the id of the media
+        is returned if the key is stored already. uploaded_at of the stored
+        media is renewed, so it's not collected as orphaned before it's attached.
+        Called by S3Client.upload() before the object is checked, the media
+        is stored under lock_media_keys().
+
+        Parameters:
+            key: str
+            async_session: AsyncSession
+
+        Returns:
+            ResponseData
+        """
+        try:
+            async with async_session as session:
+                await lock_media_keys(session, [key])
+                insert_expr = insert(Medias).values(key=key)
+                # DO UPDATE returns id of the stored media, DO NOTHING returns nothing
+                upsert_expr = insert_expr.on_conflict_do_update(
+                    constraint="unique_media_key",
+                    set_={"uploaded_at": func.now()},
+                ).returning(Medias.id)
+                request = await session.execute(upsert_expr)
+                media_id: int = request.scalar_one()
+                await session.commit()
+                result, code = {"result": True, "media_id": media_id}, 201
+        except SQLAlchemyError as err:
+            orm_logger.exception(str(err))
+            result, code = {
+                "result": False,
+                "error_type": "SQLAlchemyError",
+                "error_message": str(err),
+            }, 500
+
+        return ResponseData(response=result, status_code=code)
+
+    @classmethod
+    async def add_pending(cls, key: str, async_session: AsyncSession) -> ResponseData:
+        """Add key of a media being uploaded directly to the s3 storage.
+
+        The media can't be attached to tweets until it's confirmed,
+        it's deleted if it's not confirmed in MEDIA_PENDING_TTL seconds.
 
         Parameters:
-            link: str
+            key: str
             async_session: AsyncSession
 
         Returns:
@@ -59,10 +296,17 @@ class MediasMethods(Medias):
         """
         try:
             async with async_session as session:
-                new_media = Medias(link=link)
-                session.add(new_media)
+                request = await session.execute(
+                    insert(Medias)
+                    .values(
+                        key=key,
+                        expires_at=func.now() + timedelta(seconds=MEDIA_PENDING_TTL),
+                    )
+                    .returning(Medias.id),
+                )
+                media_id: int = request.scalar_one()
                 await session.commit()
-                result, code = {"result": True, "media_id": new_media.id}, 201
+                result, code = {"result": True, "media_id": media_id}, 201
         except SQLAlchemyError as err:
             orm_logger.exception(str(err))
             result, code = {
@@ -70,7 +314,82 @@ class MediasMethods(Medias):
                 "error_type": "SQLAlchemyError",
                 "error_message": str(err),
             }, 500
+        return ResponseData(response=result, status_code=code)
+
+    @classmethod
+    async def get_pending(
+        cls, media_id: int, async_session: AsyncSession,
+    ) -> ResponseData:
+        """Return key of the pending media.
+
+        Parameters:
+            media_id: int
+            async_session: AsyncSession
 
+        Returns:
+            ResponseData
+        """
+        try:
+            async with async_session as session:
+                request = await session.execute(
+                    select(Medias.key).where(
+                        Medias.id == media_id, Medias.expires_at > func.now(),
+                    ),
+                )
+                key: Optional[str] = request.scalar_one_or_none()
+                if key:
+                    result, code = {"result": True, "key": key}, 200
+                else:
+                    result, code = {
+                        "result": False,
+                        "error_type": "DataNotFound",
+                        "error_message": "Pending media does not exist.",
+                    }, 404
+        except SQLAlchemyError as err:
+            orm_logger.exception(str(err))
+            result, code = {
+                "result": False,
+                "error_type": "SQLAlchemyError",
+                "error_message": str(err),
+            }, 500
+        return ResponseData(response=result, status_code=code)
+
+    @classmethod
+    async def confirm(cls, media_id: int, async_session: AsyncSession) -> ResponseData:
+        """Confirm the pending media, it can be attached to tweets then.
+
+        Parameters:
+            media_id: int
+            async_session: AsyncSession
+
+        Returns:
+            ResponseData
+        """
+        try:
+            async with async_session as session:
+                request = await session.execute(
+                    update(Medias)
+                    .where(Medias.id == media_id, Medias.expires_at > func.now())
+                    .values(expires_at=None, uploaded_at=func.now())
+                    .returning(Medias.id),
+                )
+                confirmed_id: Optional[int] = request.scalar_one_or_none()
+                await session.commit()
+                if confirmed_id:
+                    result, code = {"result": True, "media_id": confirmed_id}, 200
+                else:
+                    result, code = {
+                        "result": False,
+                        "error_type": "DataNotFound",
+                        "error_message": "Pending media does not exist.",
+                    }, 404
+        except SQLAlchemyError as err:
+            orm_logger.exception(str(err))
+            result, code = {
+                "result": False,
+                "error_type": "SQLAlchemyError",
+                "error_message": str(err),
+            }, 500
         return ResponseData(response=result, status_code=code)
 
     @classmethod
@@ -86,7 +405,7 @@ class MediasMethods(Medias):
         """
         try:
             async with async_session as session:
-                check_media_exists_exp = select(Medias).where(Medias.id == media_id)
+                check_media_exists_exp = select(Medias.id).where(Medias.id == media_id)
                 check_request = await session.execute(check_media_exists_exp)
                 check_result = check_request.scalars().one_or_none()
 
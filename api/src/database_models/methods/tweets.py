@@ -1,15 +1,263 @@
-import math
+from operator import attrgetter
+from typing import Optional, Union
 
-from sqlalchemy import and_, delete, select, func
+from sqlalchemy import JSON, Select, and_, delete, func, literal, literal_column
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, noload, raiseload, selectinload
+from sqlalchemy.sql.elements import ColumnElement, Label
+from config import FEED_ATTACHMENTS, FEED_MAX_PAGE_SIZE, FEED_PAGE_SIZE  # noqa
+from config import FEED_QUERY, MEDIA_PUBLIC_URL  # noqa
 from database_models.db_config import ResponseData  # noqa
+from database_models.methods.medias import link_tweet_medias  # noqa
+from database_models.methods.medias import release_tweet_medias  # noqa
 from database_models.tweets_orm_models import Likes, MediasTweets, Medias, Tweets  # noqa
 from database_models.users_orm_models import Cookies, Followers, Users  # noqa
 from utils.logger_config import orm_logger  # noqa
+from utils.pagination import encode_cursor  # noqa
+from utils.s3_config import S3utils  # noqa
 from schemas import Pagination  # noqa
 
+EMPTY_JSON_ARRAY = literal_column("'[]'::json")
+EMPTY_JSONB_OBJECT = literal_column("'{}'::jsonb")
+
+
+def paginate_feed(expression: Select, pagination: Pagination, limit: int) -> Select:
+    """Return feed query ordered by (like_count, id) and limited to the page.
+
+    One more tweet than limit is selected to know if there is a next page.
+
+    Parameters:
+        expression: select from tweets
+        pagination: Pagination
+        limit: page size
+
+    Returns:
+        Select
+    """
+    expression = expression.order_by(
+        Tweets.like_count.desc(), Tweets.id.desc(),
+    ).limit(limit + 1)
+    if pagination.after:
+        return expression.where(
+            tuple_(Tweets.like_count, Tweets.id) < pagination.after,
+        )
+    if pagination.offset:
+        return expression.offset((pagination.offset - 1) * limit)
+    return expression
+
+
+def get_url_json(key: ColumnElement) -> ColumnElement:
+    """Return column of public URL of the object built inside Postgres.
+
+    Parameters:
+        key: column of the object key
+
+    Returns:
+        ColumnElement: MEDIA_PUBLIC_URL joined with the key like S3utils.get_url()
+    """
+    return literal("{base_url}/".format(base_url=MEDIA_PUBLIC_URL)).concat(key)
+
+
+def get_attachment_json() -> ColumnElement:
+    """Return column of an attachment of the tweet built inside Postgres.
+
+    Returns:
+        ColumnElement: URL of the media, or with FEED_ATTACHMENTS "variants"
+            map of the original URL and URLs of the variants
+    """
+    if FEED_ATTACHMENTS == "variants":
+        variant = func.jsonb_each_text(Medias.variants).table_valued("key", "value")
+        variant_urls = (
+            select(func.jsonb_object_agg(variant.c.key, get_url_json(variant.c.value)))
+            .select_from(variant)
+            .scalar_subquery()
+        )
+        return func.jsonb_build_object(
+            literal("original"), get_url_json(Medias.key), type_=JSONB,
+        ).concat(func.coalesce(variant_urls, EMPTY_JSONB_OBJECT))
+    return get_url_json(Medias.key)
+
+
+def get_attachment(media: Medias) -> Union[str, dict]:
+    """Return attachment of the tweet like get_attachment_json().
+
+    Parameters:
+        media: Medias
+
+    Returns:
+        str or dict
+    """
+    if FEED_ATTACHMENTS == "variants":
+        variants: dict[str, str] = media.variants or {}
+        return {
+            "original": S3utils.get_url(media.key),
+            **{name: S3utils.get_url(key) for name, key in variants.items()},
+        }
+    return S3utils.get_url(media.key)
+
+
+def get_tweet_json(viewer_id: int, likers_preview: Optional[int] = None) -> Label:
+    """Return column building tweet of the feed as JSON inside Postgres.
+
+    Author, attachments and likes are aggregated by json_build_object/json_agg,
+    the query must join the author from users.
+    With likers_preview the tweet has like summary instead of all the likes:
+    like_count, liked by the viewer and the first likers_preview likers.
+
+    Parameters:
+        viewer_id: id of the user reading the feed
+        likers_preview: number of likers in the like summary
+
+    Returns:
+        Label: "tweet" column
+    """
+    liker = aliased(Users)
+    attachments = (
+        select(func.json_agg(aggregate_order_by(get_attachment_json(), Medias.id)))
+        .select_from(MediasTweets)
+        .join(Medias, Medias.id == MediasTweets.media_id)
+        .where(MediasTweets.tweet_id == Tweets.id)
+        .scalar_subquery()
+    )
+    likers = (
+        select(Likes.user_id, liker.username)
+        .join(liker, liker.id == Likes.user_id)
+        .where(Likes.tweet_id == Tweets.id)
+        .order_by(Likes.user_id)
+        .limit(likers_preview)
+        .correlate(Tweets)
+        .subquery()
+    )
+    likes = select(
+        func.json_agg(
+            aggregate_order_by(
+                func.json_build_object(
+                    literal("user_id"), likers.c.user_id,
+                    literal("name"), likers.c.username,
+                ),
+                likers.c.user_id,
+            ),
+        ),
+    ).scalar_subquery()
+    tweet_fields = [
+        literal("id"), Tweets.id,
+        literal("content"), Tweets.data,
+        literal("attachments"), func.coalesce(attachments, EMPTY_JSON_ARRAY),
+        literal("author"), func.json_build_object(
+            literal("id"), Users.id,
+            literal("name"), Users.username,
+        ),
+        literal("likes"), func.coalesce(likes, EMPTY_JSON_ARRAY),
+    ]
+    if likers_preview is not None:
+        liked = (
+            select(Likes.user_id)
+            .where(Likes.tweet_id == Tweets.id, Likes.user_id == viewer_id)
+            .exists()
+        )
+        tweet_fields += [
+            literal("like_count"), Tweets.like_count,
+            literal("liked"), liked,
+        ]
+    return func.json_build_object(*tweet_fields, type_=JSON).label("tweet")
+
+
+def get_tweet_dict(
+    tweet: Tweets, likers: Optional[list[dict]] = None, liked: bool = False,
+) -> dict:
+    """Return tweet of the feed as dict.
+
+    Attachments and likes are ordered like in get_tweet_json().
+
+    Parameters:
+        tweet: Tweets with loaded user and medias
+        likers: first likers of the like summary, all the likes
+            are taken from loaded tweet.likes if None
+        liked: the viewer liked the tweet, for the like summary
+
+    Returns:
+        dict
+    """
+    tweet_dict = {
+        "id": tweet.id,
+        "content": tweet.data,
+        "attachments": [
+            get_attachment(media)
+            for media in sorted(tweet.medias, key=attrgetter("id"))
+        ],
+        "author": {
+            "id": tweet.user.id,
+            "name": tweet.user.username,
+        },
+    }
+    if likers is None:
+        tweet_dict["likes"] = [
+            {
+                "user_id": like.user_id,
+                "name": like.user.username,
+            }
+            for like in sorted(tweet.likes, key=attrgetter("user_id"))
+        ]
+    else:
+        tweet_dict.update(likes=likers, like_count=tweet.like_count, liked=liked)
+    return tweet_dict
+
+
+async def get_tweet_dicts(
+    session: AsyncSession,
+    tweets: list[Tweets],
+    viewer_id: int,
+    likers_preview: Optional[int] = None,
+) -> list[dict]:
+    """Return tweets of the ORM feed query as dicts.
+
+    The like summary is selected for all the tweets at once.
+
+    Parameters:
+        session: AsyncSession
+        tweets: Tweets with loaded user and medias, and likes.user
+            if there is no likers_preview
+        viewer_id: id of the user reading the feed
+        likers_preview: number of likers in the like summary
+
+    Returns:
+        list[dict]
+    """
+    if likers_preview is None:
+        return [get_tweet_dict(tweet) for tweet in tweets]
+
+    tweet_ids = [tweet.id for tweet in tweets]
+    position = func.row_number().over(
+        partition_by=Likes.tweet_id, order_by=Likes.user_id,
+    )
+    ranked = (
+        select(Likes.tweet_id, Likes.user_id, position.label("position"))
+        .where(Likes.tweet_id.in_(tweet_ids))
+        .subquery()
+    )
+    likers_expr = (
+        select(ranked.c.tweet_id, ranked.c.user_id, Users.username)
+        .join(Users, Users.id == ranked.c.user_id)
+        .where(ranked.c.position <= likers_preview)
+        .order_by(ranked.c.tweet_id, ranked.c.user_id)
+    )
+    likers: dict[int, list[dict]] = {tweet_id: [] for tweet_id in tweet_ids}
+    for row in await session.execute(likers_expr):
+        likers[row.tweet_id].append({"user_id": row.user_id, "name": row.username})
+
+    liked_expr = select(Likes.tweet_id).where(
+        Likes.user_id == viewer_id, Likes.tweet_id.in_(tweet_ids),
+    )
+    liked_request = await session.execute(liked_expr)
+    liked_ids = set(liked_request.scalars().all())
+    return [
+        get_tweet_dict(tweet, likers[tweet.id], liked=tweet.id in liked_ids)
+        for tweet in tweets
+    ]
+
 
 class TweetsMethods(Tweets):
     """Class with Orm methods for Tweets table."""
@@ -18,7 +266,7 @@ class TweetsMethods(Tweets):
     async def get(
         cls, tweet_id: int, async_session: AsyncSession,
     ) -> ResponseData:
-        """Return tweet by id.
+        """Return tweet by id, its relationships are not loaded.
 
         Parameters:
             tweet_id: int
@@ -29,7 +277,11 @@ class TweetsMethods(Tweets):
         """
         try:
             async with async_session as session:
-                expr = select(Tweets).where(Tweets.id == tweet_id)
+                expr = (
+                    select(Tweets)
+                    .where(Tweets.id == tweet_id)
+                    .options(raiseload("*"))
+                )
                 request = await session.execute(expr)
                 tweet = request.scalars().one_or_none()
                 if tweet:
@@ -56,86 +308,182 @@ class TweetsMethods(Tweets):
         user_id: int,
         pagination: Pagination,
         async_session: AsyncSession,
+        tweet_ids: Optional[list[int]] = None,
+        likers_preview: Optional[int] = None,
     ) -> ResponseData:
         """Return posts from followed pages for user by id.
 
+        Posts are ordered by (like_count, id) descending. A page starts
+        after the position of pagination.after (keyset pagination)
+        or, for old clients, at the page number pagination.offset.
+        The page size is pagination.limit capped by FEED_MAX_PAGE_SIZE.
+
         Parameters:
             user_id: int
-            pagination: Pagination(offset: int, limit: int)
+            pagination: Pagination(offset: int, limit: int, after: tuple)
             async_session: AsyncSession
+            tweet_ids: ids of the user's home timeline, posts are taken
+                from them instead of looking up the followed users
+            likers_preview: return like summary with this number of likers
+                instead of all the likes of the posts
 
         Returns:
             ResponseData
         """
+        limit: int = min(pagination.limit or FEED_PAGE_SIZE, FEED_MAX_PAGE_SIZE)
+        if tweet_ids is None:
+            followed_ids = (
+                select(Followers.user_id)
+                .where(Followers.follower_id == user_id)
+                .union_all(select(literal(user_id)))
+            )
+            feed_filter = Tweets.user_id.in_(followed_ids)
+        else:
+            feed_filter = Tweets.id.in_(tweet_ids)
+
         try:
             async with async_session as session:
-                get_followed_expr = (
-                    select(Followers.user_id)
-                    .where(Followers.follower_id == user_id)
-                )
-                get_followed_request = await session.execute(get_followed_expr)
-                followed_ids: list = get_followed_request.scalars().fetchall()
-                followed_ids.append(user_id)
-
-                if pagination.offset is None:
-                    offset = None
-                elif pagination.offset == 1:
-                    offset = pagination.offset - 1
+                if FEED_QUERY == "json":
+                    get_tweets_expr = (
+                        select(
+                            Tweets.id,
+                            Tweets.like_count,
+                            get_tweet_json(user_id, likers_preview),
+                        )
+                        .join(Users, Users.id == Tweets.user_id)
+                    )
                 else:
-                    offset = (pagination.offset - 1) * pagination.limit
-
-                get_tweets_expr = (
-                    select(Tweets)
-                    .join(Users, Tweets.user_id == Users.id)
-                    .outerjoin(Likes, Likes.tweet_id == Tweets.id)
-                    .where(Tweets.user_id.in_(followed_ids))
-                    .group_by(Tweets.id)
-                    .order_by(func.count(Likes.tweet_id).desc())
-                    .limit(pagination.limit)
-                    .offset(offset)
-                    .options(
+                    get_tweets_expr = select(Tweets).options(
                         selectinload(Tweets.user),
-                        selectinload(Tweets.likes).selectinload(Likes.user),
-                        selectinload(Tweets.medias)
+                        selectinload(Tweets.medias),
+                        selectinload(Tweets.likes).selectinload(Likes.user)
+                        if likers_preview is None else noload(Tweets.likes),
                     )
+                get_tweets_expr = paginate_feed(
+                    get_tweets_expr.where(feed_filter), pagination, limit,
                 )
                 get_tweets_request = await session.execute(get_tweets_expr)
-                get_tweets_result = get_tweets_request.scalars().fetchall()
-
-                tweets: list = []
-
-                for tweet in get_tweets_result:
-                    tweets.append(
-                        {
-                            "id": tweet.id,
-                            "content": tweet.data,
-                            "attachments": [
-                                media.link for media in tweet.medias
-                            ],
-                            "author": {
-                                "id": tweet.user.id,
-                                "name": tweet.user.username,
-                            },
-                            "likes": [
-                                {
-                                    "user_id": like.user_id,
-                                    "name": like.user.username,
-                                }
-                                for like in tweet.likes
-                            ],
-                        },
+                if FEED_QUERY == "json":
+                    get_tweets_result = get_tweets_request.all()
+                else:
+                    get_tweets_result = get_tweets_request.scalars().all()
+
+                next_cursor = None
+                if len(get_tweets_result) > limit:
+                    get_tweets_result = get_tweets_result[:limit]
+                    next_cursor = encode_cursor(
+                        get_tweets_result[-1].like_count, get_tweets_result[-1].id,
                     )
 
-                if pagination.offset and pagination.limit:
-                    result, code = {
-                        "result": True,
-                        "tweets": tweets,
-                        "page": pagination.offset,
-                        "size": pagination.limit,
-                        "total": math.ceil(len(tweets) / pagination.limit) - 1
-                    }, 200
+                if FEED_QUERY == "json":
+                    tweets: list = [row.tweet for row in get_tweets_result]
                 else:
-                    result, code = {"result": True, "tweets": tweets}, 200
+                    tweets = await get_tweet_dicts(
+                        session, get_tweets_result, user_id, likers_preview,
+                    )
+
+                result, code = {
+                    "result": True,
+                    "tweets": tweets,
+                    "next_cursor": next_cursor,
+                }, 200
+                if pagination.offset and not pagination.after:
+                    count_expr = (
+                        select(func.count())
+                        .select_from(Tweets)
+                        .where(feed_filter)
+                    )
+                    count_request = await session.execute(count_expr)
+                    result.update(
+                        page=pagination.offset,
+                        size=limit,
+                        total=count_request.scalar_one(),
+                    )
+        except SQLAlchemyError as err:
+            orm_logger.exception(str(err))
+            result, code = {
+                "result": False,
+                "error_type": "SQLAlchemyError",
+                "error_message": str(err),
+            }, 500
+
+        return ResponseData(response=result, status_code=code)
+
+    @classmethod
+    async def get_latest_ids(
+        cls, user_ids: list[int], limit: int, async_session: AsyncSession,
+    ) -> ResponseData:
+        """Return ids of the latest tweets of the users.
+
+        Parameters:
+            user_ids: authors
+            limit: max number of ids
+            async_session: AsyncSession
+
+        Returns:
+            ResponseData
+        """
+        try:
+            async with async_session as session:
+                expression = (
+                    select(Tweets.id)
+                    .where(Tweets.user_id.in_(user_ids))
+                    .order_by(Tweets.id.desc())
+                    .limit(limit)
+                )
+                request = await session.execute(expression)
+                result, code = {
+                    "result": True,
+                    "tweet_ids": request.scalars().all(),
+                }, 200
+        except SQLAlchemyError as err:
+            orm_logger.exception(str(err))
+            result, code = {
+                "result": False,
+                "error_type": "SQLAlchemyError",
+                "error_message": str(err),
+            }, 500
+
+        return ResponseData(response=result, status_code=code)
+
+    @classmethod
+    async def get_latest_ids_by_user(
+        cls, user_ids: list[int], limit: int, async_session: AsyncSession,
+    ) -> ResponseData:
+        """Return ids of the latest tweets of every user.
+
+        Parameters:
+            user_ids: authors
+            limit: max number of ids of one user
+            async_session: AsyncSession
+
+        Returns:
+            ResponseData
+        """
+        try:
+            async with async_session as session:
+                position = (
+                    func.row_number()
+                    .over(partition_by=Tweets.user_id, order_by=Tweets.id.desc())
+                    .label("position")
+                )
+                ranked = (
+                    select(Tweets.user_id, Tweets.id, position)
+                    .where(Tweets.user_id.in_(user_ids))
+                    .subquery()
+                )
+                expression = (
+                    select(ranked.c.user_id, ranked.c.id)
+                    .where(ranked.c.position <= limit)
+                    .order_by(ranked.c.id.desc())
+                )
+                request = await session.execute(expression)
+                tweet_ids: dict[int, list[int]] = {
+                    author_id: [] for author_id in user_ids
+                }
+                for author_id, tweet_id in request.all():
+                    tweet_ids[author_id].append(tweet_id)
+                result, code = {"result": True, "tweet_ids": tweet_ids}, 200
         except SQLAlchemyError as err:
             orm_logger.exception(str(err))
             result, code = {
@@ -169,15 +517,22 @@ class TweetsMethods(Tweets):
                 session.add(new_tweet)
                 await session.flush()
 
-                if data["tweet_media_ids"]:
-                    for m_id in data["tweet_media_ids"]:
-                        new_relation = MediasTweets(
-                            tweet_id=new_tweet.id,
-                            media_id=m_id,
-                        )
-                        session.add(new_relation)
-                await session.commit()
-                result, code = {"result": True, "tweet_id": new_tweet.id}, 201
+                # one media uploaded twice has one id
+                media_ids: list[int] = list(dict.fromkeys(data["tweet_media_ids"]))
+                # pending medias are not attached
+                linked: bool = not media_ids or await link_tweet_medias(
+                    session, new_tweet.id, media_ids,
+                )
+                if linked:
+                    await session.commit()
+                    result, code = {"result": True, "tweet_id": new_tweet.id}, 201
+                else:
+                    await session.rollback()
+                    result, code = {
+                        "result": False,
+                        "error_type": "DataNotFound",
+                        "error_message": "Media does not exist.",
+                    }, 404
         except SQLAlchemyError as err:
             orm_logger.exception(str(err))
             if "violates foreign key constraint" in str(err):
@@ -204,6 +559,9 @@ class TweetsMethods(Tweets):
     ) -> ResponseData:
         """Delete tweet from tweets table.
 
+        Medias of the tweet no other tweet references are deleted too,
+        their objects are deleted by MediaCleanupWorker.
+
         Parameters:
             user_id: int
             tweet_id: int
@@ -214,12 +572,15 @@ class TweetsMethods(Tweets):
         """
         try:
             async with async_session as session:
-                check_tweet_exists_exp = select(Tweets).where(Tweets.id == tweet_id)
+                check_tweet_exists_exp = select(Tweets.user_id).where(
+                    Tweets.id == tweet_id,
+                )
                 check_request = await session.execute(check_tweet_exists_exp)
-                check_result = check_request.scalars().one_or_none()
+                author_id = check_request.scalars().one_or_none()
 
-                if check_result:
-                    if check_result.user_id == user_id:
+                if author_id:
+                    if author_id == user_id:
+                        await release_tweet_medias(session, tweet_id)
                         del_expr = delete(Tweets).where(Tweets.id == tweet_id)
                         await session.execute(del_expr)
                         await session.commit()
@@ -248,7 +609,78 @@ class TweetsMethods(Tweets):
 
 
 class LikesMethods(Likes):
-    """Class with Orm methods for Likes table."""
+    """Class with Orm methods for Likes table.
+
+    Tweets.like_count is changed in the same transaction as the likes table,
+    so it stays exact while both statements commit together.
+    """
+
+    @classmethod
+    async def get_likers(
+        cls,
+        tweet_id: int,
+        pagination: Pagination,
+        async_session: AsyncSession,
+    ) -> ResponseData:
+        """Return page of users who liked the tweet.
+
+        Likers are ordered by user id, a page starts after the user id
+        of pagination.after.
+
+        Parameters:
+            tweet_id: int
+            pagination: Pagination(limit: int, after: tuple)
+            async_session: AsyncSession
+
+        Returns:
+            ResponseData
+        """
+        limit: int = min(pagination.limit or FEED_PAGE_SIZE, FEED_MAX_PAGE_SIZE)
+        likers_expr = (
+            select(Likes.user_id, Users.username)
+            .join(Users, Users.id == Likes.user_id)
+            .where(Likes.tweet_id == tweet_id)
+            .order_by(Likes.user_id)
+            .limit(limit + 1)
+        )
+        if pagination.after:
+            likers_expr = likers_expr.where(Likes.user_id > pagination.after[0])
+
+        try:
+            async with async_session as session:
+                likers_request = await session.execute(likers_expr)
+                likers = likers_request.all()
+                tweet_exists = bool(likers) or await session.scalar(
+                    select(Tweets.id).where(Tweets.id == tweet_id),
+                )
+            if tweet_exists:
+                next_cursor = None
+                if len(likers) > limit:
+                    likers = likers[:limit]
+                    next_cursor = encode_cursor(likers[-1].user_id)
+                result, code = {
+                    "result": True,
+                    "likes": [
+                        {"user_id": liker.user_id, "name": liker.username}
+                        for liker in likers
+                    ],
+                    "next_cursor": next_cursor,
+                }, 200
+            else:
+                result, code = {
+                    "result": False,
+                    "error_type": "DataNotFound",
+                    "error_message": "Tweet doesn't exist.",
+                }, 404
+        except SQLAlchemyError as err:
+            orm_logger.exception(str(err))
+            result, code = {
+                "result": False,
+                "error_type": "SQLAlchemyError",
+                "error_message": str(err),
+            }, 500
+
+        return ResponseData(response=result, status_code=code)
 
     @classmethod
     async def add(
@@ -271,8 +703,10 @@ class LikesMethods(Likes):
             async with async_session as session:
                 new_like = Likes(user_id=user_id, tweet_id=tweet_id)
                 session.add(new_like)
+                await session.flush()
+                author_id = await cls._change_like_count(session, tweet_id, 1)
                 await session.commit()
-            result, code = {"result": True}, 201
+            result, code = {"result": True, "author_id": author_id}, 201
         except SQLAlchemyError as err:
             orm_logger.exception(str(err))
             if "duplicate key value violates unique constraint" in str(err):
@@ -315,19 +749,20 @@ class LikesMethods(Likes):
         """
         try:
             async with async_session as session:
-                check_like_exists_exp = select(Likes).where(
-                    and_(Likes.user_id == user_id, Likes.tweet_id == tweet_id),
-                )
-                check_request = await session.execute(check_like_exists_exp)
-                check_result = check_request.scalars().one_or_none()
-
-                if check_result:
-                    expression = delete(Likes).where(
+                expression = (
+                    delete(Likes)
+                    .where(
                         and_(Likes.user_id == user_id, Likes.tweet_id == tweet_id),
                     )
-                    await session.execute(expression)
+                    .returning(Likes.tweet_id)
+                )
+                request = await session.execute(expression)
+                deleted_like = request.scalars().one_or_none()
+
+                if deleted_like:
+                    author_id = await cls._change_like_count(session, tweet_id, -1)
                     await session.commit()
-                    result, code = {"result": True}, 200
+                    result, code = {"result": True, "author_id": author_id}, 200
                 else:
                     result, code = {
                         "result": False,
@@ -342,3 +777,16 @@ class LikesMethods(Likes):
                 "error_message": str(err),
             }, 500
         return ResponseData(response=result, status_code=code)
+
+    @classmethod
+    async def _change_like_count(
+        cls, session: AsyncSession, tweet_id: int, delta: int,
+    ) -> int:
+        expression = (
+            update(Tweets)
+            .where(Tweets.id == tweet_id)
+            .values(like_count=Tweets.like_count + delta)
+            .returning(Tweets.user_id)
+        )
+        request = await session.execute(expression)
+        return request.scalar_one()
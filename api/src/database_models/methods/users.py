@@ -1,10 +1,14 @@
-from sqlalchemy import and_, delete, select
+from typing import Optional
+
+from sqlalchemy import and_, delete, or_, select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy.sql import func
+from config import AUTH_LEGACY_KEYS  # noqa
 from database_models.db_config import ResponseData  # noqa
 from database_models.users_orm_models import Cookies, Followers, Users  # noqa
+from utils.api_keys import get_key_digest, invalidate_api_key  # noqa
 from utils.logger_config import orm_logger  # noqa
 
 
@@ -155,7 +159,7 @@ class FollowersMethods(Followers):
         """
         try:
             async with async_session as session:
-                check_follow_exists_exp = select(Followers).where(
+                check_follow_exists_exp = select(Followers.id).where(
                     and_(
                         Followers.user_id == following_id,
                         Followers.follower_id == follower_id,
@@ -190,6 +194,78 @@ class FollowersMethods(Followers):
 
         return ResponseData(response=result, status_code=code)
 
+    @classmethod
+    async def get_follower_ids(
+        cls,
+        user_id: int,
+        async_session: AsyncSession,
+        limit: Optional[int] = None,
+    ) -> ResponseData:
+        """Return ids of the user's followers.
+
+        Parameters:
+            user_id: int
+            async_session: AsyncSession
+            limit: max number of ids, all of them if it's None
+
+        Returns:
+            ResponseData
+        """
+        try:
+            async with async_session as session:
+                expression = (
+                    select(Followers.follower_id)
+                    .where(Followers.user_id == user_id)
+                    .limit(limit)
+                )
+                request = await session.execute(expression)
+                result, code = {
+                    "result": True,
+                    "follower_ids": request.scalars().all(),
+                }, 200
+        except SQLAlchemyError as err:
+            orm_logger.exception(str(err))
+            result, code = {
+                "result": False,
+                "error_type": "SQLAlchemyError",
+                "error_message": str(err),
+            }, 500
+
+        return ResponseData(response=result, status_code=code)
+
+    @classmethod
+    async def get_following_ids(
+        cls, user_id: int, async_session: AsyncSession,
+    ) -> ResponseData:
+        """Return ids of the users followed by the user.
+
+        Parameters:
+            user_id: int
+            async_session: AsyncSession
+
+        Returns:
+            ResponseData
+        """
+        try:
+            async with async_session as session:
+                expression = select(Followers.user_id).where(
+                    Followers.follower_id == user_id,
+                )
+                request = await session.execute(expression)
+                result, code = {
+                    "result": True,
+                    "following_ids": request.scalars().all(),
+                }, 200
+        except SQLAlchemyError as err:
+            orm_logger.exception(str(err))
+            result, code = {
+                "result": False,
+                "error_type": "SQLAlchemyError",
+                "error_message": str(err),
+            }, 500
+
+        return ResponseData(response=result, status_code=code)
+
 
 class CookiesMethods(Cookies):
     """Class with Orm methods for Cookies table."""
@@ -208,20 +284,24 @@ class CookiesMethods(Cookies):
         Returns:
             ResponseData
         """
+        key_digest: str = get_key_digest(api_key)
         try:
             async with async_session as session:
                 check_expr = select(Cookies).where(
-                    Cookies.hash == func.crypt(api_key, Cookies.hash),
+                    cls._match_api_key(api_key, key_digest),
                 )
                 request = await session.execute(check_expr)
                 result = request.scalars().one_or_none()
 
                 if result is None:
                     new_key = Cookies(
-                        user_id=user_id, hash=func.crypt(api_key, func.gen_salt("md5")),
+                        user_id=user_id,
+                        hash=func.crypt(api_key, func.gen_salt("md5")),
+                        lookup=key_digest,
                     )
                     session.add(new_key)
                     await session.commit()
+                    await invalidate_api_key(api_key)
                     result, code = {"result": True}, 201
                 else:
                     result, code = {
@@ -245,6 +325,10 @@ class CookiesMethods(Cookies):
     ) -> ResponseData:
         """Return api key by user id from Cookies table.
 
+        Keys created before Cookies.lookup existed are matched by crypt()
+        over the rows without digest, and get their digest backfilled
+        on the first successful match.
+
         Parameters:
             api_key: int
             async_session: AsyncSession
@@ -252,17 +336,24 @@ class CookiesMethods(Cookies):
         Returns:
             ResponseData
         """
+        key_digest: str = get_key_digest(api_key)
         try:
             async with async_session as session:
                 expression = select(Cookies).where(
-                    Cookies.hash == func.crypt(api_key, Cookies.hash),
+                    cls._match_api_key(api_key, key_digest),
                 )
                 request = await session.execute(expression)
 
                 matched_key = request.scalars().one_or_none()
                 if matched_key:
-                    user_id = matched_key.user_id
-                    result, code = {"result": True, "user_id": user_id}, 200
+                    if matched_key.lookup is None:
+                        matched_key.lookup = key_digest
+                        await session.commit()
+                    result, code = {
+                        "result": True,
+                        "user_id": matched_key.user_id,
+                        "expiration_date": matched_key.expiration_date,
+                    }, 200
                 else:
                     result, code = {
                         "result": False,
@@ -278,3 +369,23 @@ class CookiesMethods(Cookies):
             }, 500
 
         return ResponseData(response=result, status_code=code)
+
+    @classmethod
+    def _match_api_key(cls, api_key: str, key_digest: str):
+        """Build where clause matching the api-key.
+
+        The digest narrows the search down to one index probe,
+        so crypt() is run only for the found row, and for the legacy
+        rows that have no digest yet unless AUTH_LEGACY_KEYS is off.
+
+        Parameters:
+            api_key: str
+            key_digest: str
+
+        Returns:
+            where clause for Cookies table
+        """
+        lookup_match = Cookies.lookup == key_digest
+        if AUTH_LEGACY_KEYS:
+            lookup_match = or_(lookup_match, Cookies.lookup.is_(None))
+        return and_(lookup_match, Cookies.hash == func.crypt(api_key, Cookies.hash))
@@ -1,8 +1,10 @@
-from typing import List
+from datetime import datetime
+from typing import List, Optional
 
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy.types import VARCHAR
+from sqlalchemy.types import TIMESTAMP, VARCHAR
 from database_models.db_config import BaseModel, base_metadata  # noqa
 
 
@@ -37,6 +39,11 @@ class MediasTweets(BaseModel):
 
     __table_args__ = (
         UniqueConstraint("tweet_id", "media_id", name="unique_media_tweet"),
+        Index(
+            "ix_medias_tweets_media_id",
+            "media_id",
+            postgresql_include=["tweet_id"],
+        ),
     )
 
 
@@ -48,6 +55,7 @@ class Tweets(BaseModel):
     id (int): ID (primary_key, autoincrement)
     user_id (int): id of the tweet author (ForeignKey)
     data (str): Tweet's text. (limit 1000)
+    like_count (int): number of likes, kept by LikesMethods (default 0)
     """
 
     __tablename__ = "tweets"
@@ -60,23 +68,38 @@ class Tweets(BaseModel):
     )
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     data: Mapped[str] = mapped_column(VARCHAR(1000), nullable=False)
+    like_count: Mapped[int] = mapped_column(
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
 
     medias: Mapped[List["Medias"]] = relationship(
         secondary="medias_tweets",
         back_populates="tweets",
         uselist=True,
-        lazy="selectin",
+        lazy="raise",
     )
     user: Mapped["Users"] = relationship(
-        back_populates="tweets", uselist=True, lazy="selectin",
+        back_populates="tweets", uselist=True, lazy="raise",
     )
     likes: Mapped[List["Likes"]] = relationship(
         back_populates="tweet",
         uselist=True,
-        lazy="selectin",
+        lazy="raise",
         cascade="all, delete-orphan",
     )
 
+    __table_args__ = (
+        Index("ix_tweets_user_id", "user_id", "id"),
+        Index(
+            "ix_tweets_user_id_like_count",
+            "user_id",
+            text("like_count DESC"),
+            text("id DESC"),
+        ),
+    )
+
 
 class Medias(BaseModel):
     """Sqlalchemy table class.
@@ -84,7 +107,15 @@ class Medias(BaseModel):
     __tablename__: medias
 
     id (int): ID (primary_key, autoincrement)
-    link (str): link to the media in the s3 storage
+    key (str): key of the media in the s3 storage, named by its content,
+        URLs are built from MEDIA_PUBLIC_URL
+    ref_count (int): number of tweets with the media, kept by TweetsMethods (default 0)
+    expires_at (datetime): a media uploaded directly to the s3 storage is pending
+        until it's confirmed, a pending media is deleted after expires_at
+    variants (dict): keys of the resized variants by their names,
+        None until they are rendered
+    uploaded_at (datetime): last upload of the media (default now),
+        medias not attached to tweets are collected after a grace period
     """
 
     __tablename__ = "medias"
@@ -93,12 +124,75 @@ class Medias(BaseModel):
     id: Mapped[int] = mapped_column(
         primary_key=True, nullable=False, autoincrement=True,
     )
-    link: Mapped[str] = mapped_column(VARCHAR(150), nullable=False)
+    key: Mapped[str] = mapped_column(VARCHAR(150), nullable=False)
+    ref_count: Mapped[int] = mapped_column(
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+    expires_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP, nullable=True)
+    variants: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)
+    uploaded_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP,
+        nullable=False,
+        server_default=func.now(),
+    )
 
     tweets: Mapped[List["Tweets"]] = relationship(
         secondary="medias_tweets",
         back_populates="medias",
-        lazy="selectin",
+        lazy="raise",
+    )
+
+    __table_args__ = (
+        UniqueConstraint("key", name="unique_media_key"),
+        Index(
+            "ix_medias_expires_at",
+            "expires_at",
+            postgresql_where=text("expires_at IS NOT NULL"),
+        ),
+    )
+
+
+class MediaCleanupJobs(BaseModel):
+    """Sqlalchemy table class, queue of the objects to delete from the s3 storage.
+
+    __tablename__: media_cleanup_jobs
+
+    id (int): ID (primary_key, autoincrement)
+    key (str): key of the object to delete
+    attempts (int): number of failed attempts (default 0)
+    available_at (datetime): the job isn't run before (default now)
+    last_error (str): error of the last failed attempt
+    dead_at (datetime): when the job ran out of attempts, it's not run anymore
+    """
+
+    __tablename__ = "media_cleanup_jobs"
+    metadata = base_metadata
+
+    id: Mapped[int] = mapped_column(
+        primary_key=True, nullable=False, autoincrement=True,
+    )
+    key: Mapped[str] = mapped_column(VARCHAR(150), nullable=False)
+    attempts: Mapped[int] = mapped_column(
+        nullable=False,
+        default=0,
+        server_default="0",
+    )
+    available_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP,
+        nullable=False,
+        server_default=func.now(),
+    )
+    last_error: Mapped[Optional[str]] = mapped_column(VARCHAR(500), nullable=True)
+    dead_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_media_cleanup_jobs_available_at",
+            "available_at",
+            postgresql_where=text("dead_at IS NULL"),
+        ),
     )
 
 
@@ -131,7 +225,10 @@ class Likes(BaseModel):
         primary_key=True,
     )
 
-    user: Mapped["Users"] = relationship(back_populates="likes", lazy="selectin")
-    tweet: Mapped["Tweets"] = relationship(back_populates="likes", lazy="selectin")
+    user: Mapped["Users"] = relationship(back_populates="likes", lazy="raise")
+    tweet: Mapped["Tweets"] = relationship(back_populates="likes", lazy="raise")
 
-    __table_args__ = (UniqueConstraint("user_id", "tweet_id", name="unique_like"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "tweet_id", name="unique_like"),
+        Index("ix_likes_tweet_id_user_id", "tweet_id", "user_id"),
+    )
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 
-from sqlalchemy import ForeignKey, UniqueConstraint
+from sqlalchemy import ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.types import TIMESTAMP, VARCHAR
 from database_models.db_config import BaseModel, base_metadata  # noqa
@@ -37,21 +37,25 @@ class Users(BaseModel):
     )
 
     tweets: Mapped[List["Tweets"]] = relationship(
-        back_populates="user", uselist=True, lazy="selectin",
+        back_populates="user", uselist=True, lazy="raise",
     )
 
     followers: Mapped[List["Followers"]] = relationship(
         back_populates="user",
         foreign_keys="Followers.user_id",
         uselist=True,
+        lazy="raise",
     )
     following: Mapped[List["Followers"]] = relationship(
         back_populates="follower",
         foreign_keys="Followers.follower_id",
         uselist=True,
+        lazy="raise",
     )
 
-    likes: Mapped[List["Likes"]] = relationship(back_populates="user", uselist=True)
+    likes: Mapped[List["Likes"]] = relationship(
+        back_populates="user", uselist=True, lazy="raise",
+    )
 
 
 class Followers(BaseModel):
@@ -84,10 +88,12 @@ class Followers(BaseModel):
     user: Mapped["Users"] = relationship(
         foreign_keys=[user_id],
         back_populates="followers",
+        lazy="raise",
     )
     follower: Mapped["Users"] = relationship(
         foreign_keys=[follower_id],
         back_populates="following",
+        lazy="raise",
     )
 
     __table_args__ = (
@@ -96,6 +102,11 @@ class Followers(BaseModel):
             "follower_id",
             name="unique_follow",
         ),
+        Index(
+            "ix_followers_follower_id",
+            "follower_id",
+            postgresql_include=["user_id"],
+        ),
     )
 
 
@@ -107,6 +118,7 @@ class Cookies(BaseModel):
     id (int): ID (primary_key, autoincrement)
     user_id (int): id of the user (ForeignKey)
     hash (str): encrypted api-key (limit 100)
+    lookup (str): sha256 digest of the api-key for indexed search (Unique)
     expiration_date (datetime): expiration date (default 7 days)
     """
 
@@ -120,8 +132,15 @@ class Cookies(BaseModel):
     )
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
     hash: Mapped[str] = mapped_column(VARCHAR(100), unique=True, nullable=False)
+    lookup: Mapped[Optional[str]] = mapped_column(
+        VARCHAR(64),
+        unique=True,
+        nullable=True,
+    )
     expiration_date: Mapped[datetime] = mapped_column(
         TIMESTAMP,
         nullable=False,
         default=datetime.now() + timedelta(7),
     )
+
+    __table_args__ = (Index("ix_cookies_user_id", "user_id"),)
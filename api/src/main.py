@@ -4,39 +4,61 @@ from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import Depends, FastAPI, status
-from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
 from fastapi_cache import FastAPICache
 from fastapi_cache.backends.redis import RedisBackend
 from redis import asyncio as aioredis
 
-from middleware import api_key_check_dependency
+from config import REDIS_URL
+from middleware import api_key_check_dependency, consistency_token_middleware
 from routers import medias, tweets, users
 from utils.cache import custom_key_builder
 from utils.logger_config import api_logger
+from utils.media_cleanup import MediaCleanupWorker
+from utils.media_variants import MediaVariantsPool
+from utils.metrics import metrics
+from utils.responses import FastJSONResponse
+from utils.s3_config import create_s3_client
 
 
 @asynccontextmanager
-async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+async def lifespan(fastapi_app: FastAPI) -> AsyncIterator[None]:
     """Lifespan event for initializing FastAPICache.
 
+    The Redis connection is also kept in app.state.redis
+    for the other Redis-backed caches. The shared S3 client
+    is kept in app.state.s3_client, it's used by MediaCleanupWorker too.
+    MediaVariantsPool is kept in app.state.media_variants.
+
+    Parameters:
+        fastapi_app: FastAPI
+
     Yields:
         None:
     """
     api_logger.info("FastAPI app started!")
-    redis = aioredis.from_url("redis://redis:6379")
+    redis = aioredis.from_url(REDIS_URL)
+    fastapi_app.state.redis = redis
+    s3_client = create_s3_client()
+    await s3_client.start()
+    fastapi_app.state.s3_client = s3_client
     FastAPICache.init(
         RedisBackend(redis),
         prefix="fastapi-cache",
         key_builder=custom_key_builder,
     )
-    yield
+    async with MediaCleanupWorker(s3_client):
+        async with MediaVariantsPool(s3_client) as media_variants:
+            fastapi_app.state.media_variants = media_variants
+            yield
+    await s3_client.close()
+    await redis.close()
     api_logger.info("FastAPI app stopped!")
 
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
     dependencies=[Depends(api_key_check_dependency)],
     docs_url='/api/docs',
     redoc_url='/api/redoc',
@@ -51,12 +73,14 @@ origins = [
 app.include_router(tweets.router)
 app.include_router(users.router)
 app.include_router(medias.router)
+app.middleware("http")(consistency_token_middleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS", "DELETE", "PATCH", "PUT"],
     allow_headers=["*"],
+    expose_headers=["consistency-token"],
 )
 
 
@@ -67,8 +91,21 @@ async def root():
     Returns:
         JSON: {"message": "Hello world"}
     """
-    return JSONResponse(
-        content=jsonable_encoder({"message": "Hello world"}),
+    return FastJSONResponse(
+        content={"message": "Hello world"},
+        status_code=status.HTTP_200_OK,
+    )
+
+
+@app.get("/api/metrics")
+async def metrics_info():
+    """Return metrics of the current worker.
+
+    Returns:
+        JSON: counters, gauges and timers
+    """
+    return FastJSONResponse(
+        content=metrics.snapshot(),
         status_code=status.HTTP_200_OK,
     )
 
@@ -1,19 +1,115 @@
-from fastapi import Depends, HTTPException, Request
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import AUTH_CACHE_NEGATIVE_TTL
 from database_models.db_config import ResponseData, get_async_session
+from database_models.db_config import save_consistency_token
 from database_models.methods.users import CookiesMethods
+from utils.api_keys import SharedApiKeyCache, api_key_cache, get_key_digest
+from utils.cache import get_redis
+
+WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+
+async def resolve_api_key(
+    api_key: str, session: AsyncSession, redis: Optional[Redis] = None,
+) -> ResponseData:
+    """Resolve api-key to the user id using the in-process and Redis caches.
+
+    The database is queried only on a miss in both caches.
+
+    Parameters:
+        api_key: str
+        session: AsyncSession
+        redis: Redis connection for the shared cache
+
+    Returns:
+        ResponseData: result of CookiesMethods.get_user_id
+    """
+    key_digest: str = get_key_digest(api_key)
+    shared_cache = None if redis is None else SharedApiKeyCache(redis)
+
+    cached_result: ResponseData | None = api_key_cache.get(key_digest)
+    if cached_result is None and shared_cache is not None:
+        cached_result = await get_shared_api_key(key_digest, shared_cache)
+    if cached_result is not None:
+        return cached_result
+
+    check_api_key: ResponseData = await CookiesMethods.get_user_id(api_key, session)
+    await cache_api_key(key_digest, check_api_key, shared_cache)
+    return check_api_key
+
+
+async def get_shared_api_key(
+    key_digest: str, shared_cache: SharedApiKeyCache,
+) -> Optional[ResponseData]:
+    """Return api-key resolved by any worker and cache it in-process.
+
+    Parameters:
+        key_digest: str
+        shared_cache: SharedApiKeyCache
+
+    Returns:
+        ResponseData or None if the key is not in the shared cache
+    """
+    shared_result = await shared_cache.get(key_digest)
+    if shared_result is None:
+        return None
+
+    user_id, ttl = shared_result
+    check_api_key = ResponseData(
+        response={"result": True, "user_id": user_id}, status_code=200,
+    )
+    api_key_cache.set(key_digest, check_api_key, ttl=ttl)
+    return check_api_key
+
+
+async def cache_api_key(
+    key_digest: str,
+    check_api_key: ResponseData,
+    shared_cache: Optional[SharedApiKeyCache],
+) -> None:
+    """Cache result of CookiesMethods.get_user_id.
+
+    Found keys are cached until the cache TTL or Cookies.expiration_date
+    runs out, whichever comes first. Unknown keys are cached
+    in-process only for AUTH_CACHE_NEGATIVE_TTL seconds.
+
+    Parameters:
+        key_digest: str
+        check_api_key: ResponseData
+        shared_cache: SharedApiKeyCache or None
+    """
+    if check_api_key.status_code == 401:
+        api_key_cache.set(key_digest, check_api_key, ttl=AUTH_CACHE_NEGATIVE_TTL)
+    if not check_api_key.response["result"]:
+        return
+
+    expires_in: timedelta = check_api_key.response["expiration_date"] - datetime.now()
+    api_key_cache.set(key_digest, check_api_key, ttl=expires_in.total_seconds())
+    if shared_cache is not None:
+        await shared_cache.set(
+            key_digest,
+            check_api_key.response["user_id"],
+            ttl=expires_in.total_seconds(),
+        )
 
 
 async def api_key_check_dependency(
     request: Request,
     session: AsyncSession = Depends(get_async_session),
+    redis: Optional[Redis] = Depends(get_redis),
 ):
     """Global dependency that act like middleware for validating API key.
 
     Parameters:
         request: FastAPI.request
         session: AsyncSession dependency (get_async_session)
+        redis: Redis connection dependency (get_redis)
 
     Raises:
         HTTPException: Unauthorized
@@ -23,7 +119,7 @@ async def api_key_check_dependency(
     if api_key == "test":
         request.state.user_id = 1
     elif api_key:
-        check_api_key: ResponseData = await CookiesMethods.get_user_id(api_key, session)
+        check_api_key: ResponseData = await resolve_api_key(api_key, session, redis)
         if not check_api_key.response["result"]:
             raise HTTPException(
                 detail=check_api_key.response,
@@ -40,3 +136,25 @@ async def api_key_check_dependency(
             },
             status_code=401,
         )
+
+
+async def consistency_token_middleware(request: Request, call_next) -> Response:
+    """HTTP middleware that remembers the position of successful writes.
+
+    The primary's LSN is saved for the user and returned
+    in the "consistency-token" header, so the user's next reads
+    are served by a replica only after it has replayed the write.
+
+    Parameters:
+        request: FastAPI.request
+        call_next: next ASGI app in the chain
+
+    Returns:
+        Response
+    """
+    response: Response = await call_next(request)
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        token = await save_consistency_token(request)
+        if token is not None:
+            response.headers["consistency-token"] = token
+    return response
@@ -0,0 +1,116 @@
+"""store media keys instead of links
+
+Revision ID: 0a6d2c8e4f71
+Revises: f3c7e9a1b5d8
+Create Date: 2026-10-19 02:04:51.739128
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+from config import S3_BUCKET_NANE, S3_URL  # noqa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0a6d2c8e4f71"
+down_revision: Union[str, None] = "f3c7e9a1b5d8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# rows rewritten by one transaction
+BATCH_SIZE = 1000
+# base of the links stored before, the key is the rest of the link
+LINK_BASE = "{url}/{bucket}/".format(url=S3_URL, bucket=S3_BUCKET_NANE)
+
+
+def rewrite_in_batches(table: str, assignments: str, condition: str, **params) -> None:
+    """Run the UPDATE over the table by batches of ids, committing every batch.
+
+    The batches are read by the primary key after the last id of the
+    previous one, so every batch is an index range scan. Rows not matching
+    the condition are already rewritten, an interrupted migration
+    skips them when it's run again.
+
+    Parameters:
+        table: name of the table
+        assignments: SET clause of the UPDATE
+        condition: rows of the batch to rewrite
+        params: parameters of the statement
+    """
+    statement = sa.text(
+        """
+        WITH batch AS (
+            SELECT id FROM {table} WHERE id > :last_id ORDER BY id LIMIT :batch_size
+        ), rewritten AS (
+            UPDATE {table}
+            SET {assignments}
+            FROM batch
+            WHERE {table}.id = batch.id AND {condition}
+        )
+        SELECT max(id) FROM batch
+        """.format(table=table, assignments=assignments, condition=condition),
+    )
+    connection = op.get_bind()
+    with op.get_context().autocommit_block():
+        last_id = 0
+        while last_id is not None:
+            last_id = connection.execute(
+                statement, {"last_id": last_id, "batch_size": BATCH_SIZE, **params},
+            ).scalar()
+
+
+def upgrade() -> None:
+    rewrite_in_batches(
+        "medias",
+        """
+        link = regexp_replace(link, '^.*/', ''),
+        variants = coalesce(
+            (
+                SELECT jsonb_object_agg(
+                    variant.key, regexp_replace(variant.value, '^.*/', '')
+                )
+                FROM jsonb_each_text(medias.variants) AS variant
+            ),
+            variants
+        )
+        """,
+        "link LIKE '%/%'",
+    )
+    rewrite_in_batches(
+        "media_cleanup_jobs",
+        "link = regexp_replace(link, '^.*/', '')",
+        "link LIKE '%/%'",
+    )
+    op.alter_column("medias", "link", new_column_name="key")
+    op.execute("ALTER TABLE medias RENAME CONSTRAINT unique_media_link TO unique_media_key")
+    op.alter_column("media_cleanup_jobs", "link", new_column_name="key")
+
+
+def downgrade() -> None:
+    op.alter_column("media_cleanup_jobs", "key", new_column_name="link")
+    op.execute("ALTER TABLE medias RENAME CONSTRAINT unique_media_key TO unique_media_link")
+    op.alter_column("medias", "key", new_column_name="link")
+    rewrite_in_batches(
+        "medias",
+        """
+        link = :base || link,
+        variants = coalesce(
+            (
+                SELECT jsonb_object_agg(variant.key, :base || variant.value)
+                FROM jsonb_each_text(medias.variants) AS variant
+            ),
+            variants
+        )
+        """,
+        "link NOT LIKE '%/%'",
+        base=LINK_BASE,
+    )
+    rewrite_in_batches(
+        "media_cleanup_jobs",
+        "link = :base || link",
+        "link NOT LIKE '%/%'",
+        base=LINK_BASE,
+    )
@@ -0,0 +1,58 @@
+"""add like_count to tweets
+
+Revision ID: 3b6e1f0c9a27
+Revises: 538dfcf4d4f7
+Create Date: 2026-10-18 19:05:12.418306
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b6e1f0c9a27"
+down_revision: Union[str, None] = "538dfcf4d4f7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A constant default doesn't rewrite the table.
+    op.add_column(
+        "tweets",
+        sa.Column("like_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+        UPDATE tweets
+        SET like_count = likes.like_count
+        FROM (
+            SELECT tweet_id, count(*) AS like_count
+            FROM likes
+            GROUP BY tweet_id
+        ) AS likes
+        WHERE tweets.id = likes.tweet_id
+        """,
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_tweets_user_id_like_count",
+            "tweets",
+            ["user_id", sa.text("like_count DESC"), sa.text("id DESC")],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_tweets_user_id_like_count",
+            table_name="tweets",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("tweets", "like_count")
@@ -0,0 +1,54 @@
+"""add foreign key indexes
+
+Revision ID: 538dfcf4d4f7
+Revises: d820f2266779
+Create Date: 2026-10-18 18:32:47.905131
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "538dfcf4d4f7"
+down_revision: Union[str, None] = "d820f2266779"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# name, table, key columns, included columns
+indexes = (
+    ("ix_followers_follower_id", "followers", ["follower_id"], ["user_id"]),
+    ("ix_tweets_user_id", "tweets", ["user_id", "id"], []),
+    ("ix_likes_tweet_id", "likes", ["tweet_id"], ["user_id"]),
+    ("ix_medias_tweets_media_id", "medias_tweets", ["media_id"], ["tweet_id"]),
+    ("ix_cookies_user_id", "cookies", ["user_id"], []),
+)
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY doesn't block writes to the table,
+    # but can't run inside a transaction.
+    # If it fails it leaves an INVALID index: drop it and run the migration again.
+    with op.get_context().autocommit_block():
+        for name, table, columns, include in indexes:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_include=include,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in indexes:
+            op.drop_index(
+                name,
+                table_name=table,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,95 @@
+"""add ref_count to medias
+
+Revision ID: 5e8a1c3f7b20
+Revises: 9c4d2a7e5b18
+Create Date: 2026-10-18 22:14:08.531920
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e8a1c3f7b20"
+down_revision: Union[str, None] = "9c4d2a7e5b18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "medias",
+        sa.Column("ref_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    # Rows with one link share the object, they are merged into the first
+    # row, so the object is deleted only when no tweet references it.
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE medias_duplicates ON COMMIT DROP AS
+        SELECT id, keep_id
+        FROM (
+            SELECT id, min(id) OVER (PARTITION BY link) AS keep_id
+            FROM medias
+        ) AS medias
+        WHERE id <> keep_id
+        """,
+    )
+    # a tweet keeps one reference to the merged row
+    op.execute(
+        """
+        DELETE FROM medias_tweets
+        USING (
+            SELECT
+                medias_tweets.tweet_id,
+                medias_tweets.media_id,
+                row_number() OVER (
+                    PARTITION BY
+                        medias_tweets.tweet_id,
+                        coalesce(medias_duplicates.keep_id, medias_tweets.media_id)
+                    ORDER BY medias_tweets.media_id
+                ) AS position
+            FROM medias_tweets
+            LEFT JOIN medias_duplicates
+                ON medias_duplicates.id = medias_tweets.media_id
+        ) AS merged
+        WHERE merged.position > 1
+            AND medias_tweets.tweet_id = merged.tweet_id
+            AND medias_tweets.media_id = merged.media_id
+        """,
+    )
+    op.execute(
+        """
+        UPDATE medias_tweets
+        SET media_id = medias_duplicates.keep_id
+        FROM medias_duplicates
+        WHERE medias_tweets.media_id = medias_duplicates.id
+        """,
+    )
+    op.execute(
+        """
+        DELETE FROM medias
+        USING medias_duplicates
+        WHERE medias.id = medias_duplicates.id
+        """,
+    )
+    op.execute(
+        """
+        UPDATE medias
+        SET ref_count = medias_tweets.ref_count
+        FROM (
+            SELECT media_id, count(*) AS ref_count
+            FROM medias_tweets
+            GROUP BY media_id
+        ) AS medias_tweets
+        WHERE medias.id = medias_tweets.media_id
+        """,
+    )
+    op.create_unique_constraint("unique_media_link", "medias", ["link"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("unique_media_link", "medias", type_="unique")
+    op.drop_column("medias", "ref_count")
@@ -0,0 +1,55 @@
+"""order likes index by user_id
+
+Revision ID: 9c4d2a7e5b18
+Revises: 3b6e1f0c9a27
+Create Date: 2026-10-18 20:41:36.207514
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9c4d2a7e5b18"
+down_revision: Union[str, None] = "3b6e1f0c9a27"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The first likers of a tweet and the pages of its likers are read
+    # in user_id order, the index returns them sorted without reading all the likes.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_likes_tweet_id_user_id",
+            "likes",
+            ["tweet_id", "user_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_likes_tweet_id",
+            table_name="likes",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_likes_tweet_id",
+            "likes",
+            ["tweet_id"],
+            postgresql_include=["user_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            "ix_likes_tweet_id_user_id",
+            table_name="likes",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,52 @@
+"""add media_cleanup_jobs
+
+Revision ID: b71f4d2e8c63
+Revises: 5e8a1c3f7b20
+Create Date: 2026-10-18 23:02:47.164093
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b71f4d2e8c63"
+down_revision: Union[str, None] = "5e8a1c3f7b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "media_cleanup_jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("link", sa.VARCHAR(length=150), nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "available_at",
+            sa.TIMESTAMP(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("last_error", sa.VARCHAR(length=500), nullable=True),
+        sa.Column("dead_at", sa.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_media_cleanup_jobs_available_at",
+        "media_cleanup_jobs",
+        ["available_at"],
+        postgresql_where=sa.text("dead_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_media_cleanup_jobs_available_at",
+        table_name="media_cleanup_jobs",
+        postgresql_where=sa.text("dead_at IS NULL"),
+    )
+    op.drop_table("media_cleanup_jobs")
@@ -0,0 +1,46 @@
+"""add expires_at to medias
+
+Revision ID: d4f6a8c0e213
+Revises: b71f4d2e8c63
+Create Date: 2026-10-18 23:41:19.408217
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d4f6a8c0e213"
+down_revision: Union[str, None] = "b71f4d2e8c63"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("medias", sa.Column("expires_at", sa.TIMESTAMP(), nullable=True))
+    op.create_index(
+        "ix_medias_expires_at",
+        "medias",
+        ["expires_at"],
+        postgresql_where=sa.text("expires_at IS NOT NULL"),
+    )
+
+
+def downgrade() -> None:
+    # pending medias can't be told from the stored ones without the column
+    op.execute(
+        """
+        INSERT INTO media_cleanup_jobs (link)
+        SELECT link FROM medias WHERE expires_at IS NOT NULL
+        """,
+    )
+    op.execute("DELETE FROM medias WHERE expires_at IS NOT NULL")
+    op.drop_index(
+        "ix_medias_expires_at",
+        table_name="medias",
+        postgresql_where=sa.text("expires_at IS NOT NULL"),
+    )
+    op.drop_column("medias", "expires_at")
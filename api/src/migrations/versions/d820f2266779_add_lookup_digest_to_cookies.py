@@ -0,0 +1,35 @@
+"""add lookup digest to cookies
+
+Revision ID: d820f2266779
+Revises: 7d44c244802a
+Create Date: 2026-10-18 17:40:12.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d820f2266779"
+down_revision: Union[str, None] = "7d44c244802a"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing keys keep lookup NULL: the digest can't be computed from
+    # the salted hash, so CookiesMethods.get_user_id backfills it
+    # on the first successful authentication with the key.
+    op.add_column(
+        "cookies",
+        sa.Column("lookup", sa.VARCHAR(length=64), nullable=True),
+    )
+    op.create_unique_constraint("cookies_lookup_key", "cookies", ["lookup"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("cookies_lookup_key", "cookies", type_="unique")
+    op.drop_column("cookies", "lookup")
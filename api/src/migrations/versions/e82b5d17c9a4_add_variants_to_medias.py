@@ -0,0 +1,39 @@
+"""add variants to medias
+
+Revision ID: e82b5d17c9a4
+Revises: d4f6a8c0e213
+Create Date: 2026-10-19 00:27:53.610482
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e82b5d17c9a4"
+down_revision: Union[str, None] = "d4f6a8c0e213"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "medias",
+        sa.Column("variants", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    # objects of the variants are not referenced anymore
+    op.execute(
+        """
+        INSERT INTO media_cleanup_jobs (link)
+        SELECT variant.value
+        FROM medias, jsonb_each_text(medias.variants) AS variant
+        """,
+    )
+    op.drop_column("medias", "variants")
@@ -0,0 +1,36 @@
+"""add uploaded_at to medias
+
+Revision ID: f3c7e9a1b5d8
+Revises: e82b5d17c9a4
+Create Date: 2026-10-19 01:12:36.274905
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c7e9a1b5d8"
+down_revision: Union[str, None] = "e82b5d17c9a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # stored medias get the time of the migration, the grace period starts now
+    op.add_column(
+        "medias",
+        sa.Column(
+            "uploaded_at",
+            sa.TIMESTAMP(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("medias", "uploaded_at")
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, UploadFile
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from functools import partial
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from types_aiobotocore_s3 import Client
-from schemas import MediaUploadResponseDataWithId  # noqa
+from schemas import MediaUploadResponseDataWithId, MediaUploadSlotDataIn  # noqa
+from schemas import MediaUploadSlotDataOut  # noqa
 from database_models.db_config import ResponseData, get_async_session  # noqa
 from database_models.methods.medias import MediasMethods  # noqa
 from database_models.methods.tweets import TweetsMethods  # noqa
+from utils.media_uploads import confirm_upload, create_upload_slot  # noqa
+from utils.media_variants import MediaVariantsPool, get_media_variants_pool  # noqa
+from utils.multipart import MultipartFileStream  # noqa
+from utils.responses import json_response  # noqa
 from utils.s3_config import get_async_s3_client  # noqa
 
 router = APIRouter(
@@ -14,36 +20,119 @@ router = APIRouter(
 )
 
 
-@router.post("", response_model=MediaUploadResponseDataWithId, status_code=201)
+@router.post(
+    "",
+    response_model=MediaUploadResponseDataWithId,
+    status_code=201,
+    # the form is parsed by MultipartFileStream, not by FastAPI
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"],
+                    },
+                },
+            },
+        },
+    },
+)
 async def upload_media_from_post(
-    file: UploadFile,
+    request: Request,
     session: AsyncSession = Depends(get_async_session),
     s3_client: Client = Depends(get_async_s3_client),
+    variants_pool: Optional[MediaVariantsPool] = Depends(get_media_variants_pool),
 ):
     """Endpoint для загрузки файлов из твита.
 
+    Fallback for clients which can't upload to s3 storage directly.
+    The file is streamed to s3 storage while the request body is received.
+    Resized variants are rendered in the background.
+
     Parameters:
-        file: FastAPI.UploadFile
+        request: FastAPI Request object, multipart/form-data with the file field
         session: Async session
         s3_client: Async client for work with s3 storage
+        variants_pool: renders variants of the media
 
     Returns:
         JSONResponse: результат загрузки файла и идентификатором медиа.
     """
+    file_stream = MultipartFileStream(request)
+    filename: str = await file_stream.open()
     media_upload_result: ResponseData = await s3_client.upload(
-        file_obj=file.file, filename=file.filename,
+        chunks=file_stream.chunks(),
+        filename=filename,
+        register=partial(MediasMethods.add, async_session=session),
     )
-    if not media_upload_result.response["result"]:
-        return JSONResponse(
-            content=jsonable_encoder(media_upload_result.response),
-            status_code=media_upload_result.status_code,
-        )
-
-    save_link_result: ResponseData = await MediasMethods.add(
-        link=media_upload_result.response["link"],
-        async_session=session,
+    key: Optional[str] = media_upload_result.response.pop("key", None)
+    if media_upload_result.response["result"] and variants_pool:
+        variants_pool.submit(media_upload_result.response["media_id"], key)
+    return json_response(media_upload_result)
+
+
+@router.post(
+    "/uploads",
+    response_model=MediaUploadSlotDataOut,
+    status_code=201,
+)
+async def create_media_upload(
+    upload_data: MediaUploadSlotDataIn,
+    session: AsyncSession = Depends(get_async_session),
+    s3_client: Client = Depends(get_async_s3_client),
+):
+    """Endpoint returns a form for uploading the file directly to s3 storage.
+
+    The media is pending until it's confirmed
+    by POST /api/medias/{media_id}/confirm after the upload.
+
+    Parameters:
+        upload_data: name of the file
+        session: Async session
+        s3_client: Async client for work with s3 storage
+
+    Returns:
+        JSONResponse: идентификатор медиа и форма загрузки.
+    """
+    slot_result: ResponseData = await create_upload_slot(
+        s3_client=s3_client, filename=upload_data.filename, async_session=session,
     )
-    return JSONResponse(
-        content=jsonable_encoder(save_link_result.response),
-        status_code=save_link_result.status_code,
+    return json_response(slot_result)
+
+
+@router.post(
+    "/{media_id}/confirm",
+    response_model=MediaUploadResponseDataWithId,
+    status_code=200,
+)
+async def confirm_media_upload(
+    media_id: int,
+    session: AsyncSession = Depends(get_async_session),
+    s3_client: Client = Depends(get_async_s3_client),
+    variants_pool: Optional[MediaVariantsPool] = Depends(get_media_variants_pool),
+):
+    """Endpoint confirms the file uploaded directly to s3 storage.
+
+    The object is checked by a HEAD request, the media can be
+    attached to tweets after it's confirmed. Resized variants
+    are rendered in the background.
+
+    Parameters:
+        media_id: id of the pending media
+        session: Async session
+        s3_client: Async client for work with s3 storage
+        variants_pool: renders variants of the media
+
+    Returns:
+        JSONResponse: результат проверки и идентификатор медиа.
+    """
+    confirm_result: ResponseData = await confirm_upload(
+        s3_client=s3_client,
+        media_id=media_id,
+        async_session=session,
+        variants_pool=variants_pool,
     )
+    return json_response(confirm_result)
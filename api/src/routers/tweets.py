@@ -1,18 +1,26 @@
-from typing import Annotated
+from typing import Annotated, Literal, Optional
+from urllib.parse import urlencode
 
-from fastapi import APIRouter, Depends, Request
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import Response
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
-from types_aiobotocore_s3 import Client
+from config import FEED_LIKERS_PREVIEW, FEED_LIKES, FEED_MODE  # noqa
 from schemas import BaseResponseDataOut, TweetDataIn  # noqa
 from schemas import TweetResponseWithId, TweetsListDataOut  # noqa
 from schemas import Pagination, pagination_params  # noqa
+from schemas import LikersListDataOut, likers_pagination_params  # noqa
 from database_models.db_config import ResponseData, get_async_session  # noqa
+from database_models.db_config import get_async_read_session  # noqa
 from database_models.methods.tweets import LikesMethods, TweetsMethods  # noqa
 from database_models.methods.users import CookiesMethods  # noqa
-from database_models.methods.medias import MediasMethods  # noqa
-from utils.s3_config import get_async_s3_client, S3utils # noqa
+from utils.cache import get_redis  # noqa
+from utils.feed_cache import CachedFeed, cache_feed, feed_cache_enabled  # noqa
+from utils.feed_cache import get_cached_feed, invalidate_author_feeds  # noqa
+from utils.responses import json_response  # noqa
+from utils.timelines import add_tweet_to_timelines, get_timeline  # noqa
+from utils.metrics import metrics  # noqa
+from utils.timelines import remove_tweet_from_timelines, timelines_enabled  # noqa
 
 router = APIRouter(
     prefix="/api/tweets",
@@ -23,7 +31,9 @@ router = APIRouter(
 async def posts_list(
     pagination: Annotated[Pagination, Depends(pagination_params)],
     request: Request,
-    session: AsyncSession = Depends(get_async_session),
+    likes: Annotated[Literal["full", "summary"], Query()] = FEED_LIKES,
+    session: AsyncSession = Depends(get_async_read_session),
+    redis: Optional[Redis] = Depends(get_redis),
 ):
     """Return list of posts for user.
 
@@ -33,21 +43,39 @@ async def posts_list(
     Parameters:
         pagination: Pagination(offset: int, limit: int)
         request: FastAPI Request object
-        session: dependency - Async session
+        likes: "full" - all the likes of the posts, "summary" - like_count,
+            liked by the user and the first likers
+        session: dependency - Async session to a read replica
+        redis: Redis connection for home timelines and the feed cache
 
     Returns:
         JSON: результат запроса и список словорей с постами.
     """
     user_id: int = request.state.user_id
-    tweets_data: ResponseData = await TweetsMethods.get_posts_list(
-        user_id=user_id,
-        pagination=pagination,
-        async_session=session,
-    )
-    return JSONResponse(
-        content=jsonable_encoder(tweets_data.response),
-        status_code=tweets_data.status_code,
-    )
+    variant = urlencode(sorted(request.query_params.multi_items()))
+    cached_feed: Optional[CachedFeed] = None
+    if feed_cache_enabled(redis):
+        cached_feed = await get_cached_feed(redis, user_id, variant)
+        if cached_feed and cached_feed.page is not None:
+            return Response(content=cached_feed.page, media_type="application/json")
+
+    feed_mode: str = FEED_MODE if timelines_enabled(redis) else "pull"
+    with metrics.timer("feed.read.{mode}".format(mode=feed_mode)):
+        tweet_ids: Optional[list[int]] = None
+        if feed_mode != "pull":
+            tweet_ids = await get_timeline(redis, user_id, session)
+        tweets_data: ResponseData = await TweetsMethods.get_posts_list(
+            user_id=user_id,
+            pagination=pagination,
+            async_session=session,
+            tweet_ids=tweet_ids,
+            likers_preview=FEED_LIKERS_PREVIEW if likes == "summary" else None,
+        )
+    response = json_response(tweets_data)
+    if cached_feed and tweets_data.status_code == 200:
+        cached_feed.page = response.body
+        await cache_feed(redis, user_id, cached_feed, variant, session)
+    return response
 
 
 @router.post("", response_model=TweetResponseWithId, status_code=201)
@@ -55,6 +83,7 @@ async def add_new_post(
     tweet_data: TweetDataIn,
     request: Request,
     session: AsyncSession = Depends(get_async_session),
+    redis: Optional[Redis] = Depends(get_redis),
 ):
     """Create a new post.
 
@@ -65,6 +94,7 @@ async def add_new_post(
         tweet_data: JSON new tweet data
         request: FastAPI Request object
         session: Async session
+        redis: Redis connection for home timelines and the feed cache
 
     Returns:
         JSONResponse: результат создания поста и идентификатор поста.
@@ -77,10 +107,13 @@ async def add_new_post(
         data=new_tweet,
         async_session=session,
     )
-    return JSONResponse(
-        content=jsonable_encoder(result.response),
-        status_code=result.status_code,
-    )
+    if result.response["result"] and timelines_enabled(redis):
+        await add_tweet_to_timelines(
+            redis, user_id, result.response["tweet_id"], session,
+        )
+    if result.response["result"] and feed_cache_enabled(redis):
+        await invalidate_author_feeds(redis, user_id)
+    return json_response(result)
 
 
 @router.delete("/{post_id}", response_model=BaseResponseDataOut)
@@ -88,10 +121,13 @@ async def delete_post(
     post_id: int,
     request: Request,
     session: AsyncSession = Depends(get_async_session),
-    s3_client: Client = Depends(get_async_s3_client),
+    redis: Optional[Redis] = Depends(get_redis),
 ):
     """Delete the post.
 
+    Objects of the deleted medias are queued for MediaCleanupWorker,
+    the post is deleted when the transaction is committed.
+
     HTTP-Params:
         api-key: str
 
@@ -99,31 +135,50 @@ async def delete_post(
         post_id: int
         request: FastAPI Request object
         session: Async session
-        s3_client: Async client for work with s3 storage
+        redis: Redis connection for home timelines and the feed cache
 
     Returns:
         JSONResponse: результат удаления поста
     """
     user_id = request.state.user_id
 
-    get_tweet_media: ResponseData = await MediasMethods.get_by_tweet_id(
-        tweet_id=post_id, async_session=session,
-    )
     del_from_db_res: ResponseData = await TweetsMethods.delete(
         user_id=user_id,
         tweet_id=post_id,
         async_session=session,
     )
-    if del_from_db_res.response["result"] and get_tweet_media.response["result"]:
-        file_names: list = [
-            S3utils.get_name_from_link(link)
-            for link in get_tweet_media.response["links"]
-        ]
-        await s3_client.delete_multiple(media_names=file_names)
-    return JSONResponse(
-        content=jsonable_encoder(del_from_db_res.response),
-        status_code=del_from_db_res.status_code,
+    if del_from_db_res.response["result"] and timelines_enabled(redis):
+        await remove_tweet_from_timelines(redis, user_id, post_id, session)
+    if del_from_db_res.response["result"] and feed_cache_enabled(redis):
+        await invalidate_author_feeds(redis, user_id)
+    return json_response(del_from_db_res)
+
+
+@router.get("/{post_id}/likes", response_model=LikersListDataOut)
+async def post_likers(
+    post_id: int,
+    pagination: Annotated[Pagination, Depends(likers_pagination_params)],
+    session: AsyncSession = Depends(get_async_read_session),
+):
+    """Return page of users who liked the post.
+
+    HTTP-Params:
+        api-key: str
+
+    Parameters:
+        post_id: int
+        pagination: Pagination(limit: int, after: tuple)
+        session: dependency - Async session to a read replica
+
+    Returns:
+        JSONResponse: результат запроса, список лайкнувших и курсор следующей страницы.
+    """
+    result: ResponseData = await LikesMethods.get_likers(
+        tweet_id=post_id,
+        pagination=pagination,
+        async_session=session,
     )
+    return json_response(result)
 
 
 @router.post("/{post_id}/likes", response_model=BaseResponseDataOut, status_code=201)
@@ -131,6 +186,7 @@ async def like_post(
     post_id: int,
     request: Request,
     session: AsyncSession = Depends(get_async_session),
+    redis: Optional[Redis] = Depends(get_redis),
 ):
     """Like the post.
 
@@ -141,6 +197,7 @@ async def like_post(
         post_id: int
         request: FastAPI Request object
         session: Async session
+        redis: Redis connection for the feed cache
 
     Returns:
         JSONResponse: результат установления лайка.
@@ -152,10 +209,9 @@ async def like_post(
         tweet_id=post_id,
         async_session=session,
     )
-    return JSONResponse(
-        content=jsonable_encoder(result.response),
-        status_code=result.status_code,
-    )
+    if result.response["result"] and feed_cache_enabled(redis):
+        await invalidate_author_feeds(redis, result.response["author_id"])
+    return json_response(result)
 
 
 @router.delete("/{post_id}/likes", response_model=BaseResponseDataOut)
@@ -163,6 +219,7 @@ async def remove_like_from_the_post(
     post_id: int,
     request: Request,
     session: AsyncSession = Depends(get_async_session),
+    redis: Optional[Redis] = Depends(get_redis),
 ):
     """Unlike the post.
 
@@ -173,6 +230,7 @@ async def remove_like_from_the_post(
         post_id: int
         request: FastAPI Request object
         session: Async session
+        redis: Redis connection for the feed cache
 
     Returns:
         JSONResponse: результат удаления лайка.
@@ -184,7 +242,6 @@ async def remove_like_from_the_post(
         tweet_id=post_id,
         async_session=session,
     )
-    return JSONResponse(
-        content=jsonable_encoder(result.response),
-        status_code=result.status_code,
-    )
+    if result.response["result"] and feed_cache_enabled(redis):
+        await invalidate_author_feeds(redis, result.response["author_id"])
+    return json_response(result)
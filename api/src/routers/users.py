@@ -1,12 +1,19 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, Request
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
 from fastapi_cache.decorator import cache
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession
 from database_models.db_config import ResponseData, get_async_session  # noqa
+from database_models.db_config import get_async_read_session  # noqa
 from database_models.methods.users import UsersMethods  # noqa
 from database_models.methods.users import CookiesMethods, FollowersMethods # noqa
 from schemas import BaseResponseDataOut, UserProfileDataOut  # noqa
+from utils.cache import get_redis  # noqa
+from utils.feed_cache import feed_cache_enabled, invalidate_user_feed  # noqa
+from utils.responses import json_response  # noqa
+from utils.timelines import follow_timeline, timelines_enabled  # noqa
+from utils.timelines import unfollow_timeline  # noqa
 
 router = APIRouter(
     prefix="/api/users",
@@ -18,6 +25,7 @@ async def follow_user(
     user_id: int,
     request: Request,
     session: AsyncSession = Depends(get_async_session),
+    redis: Optional[Redis] = Depends(get_redis),
 ):
     """Follow the user.
 
@@ -28,6 +36,7 @@ async def follow_user(
         user_id: int
         request: FastAPI Request object
         session: Async session
+        redis: Redis connection for home timelines and the feed cache
 
     Returns:
         JSONResponse: результат выполнения опереации.
@@ -39,10 +48,11 @@ async def follow_user(
         following_id=user_id,
         async_session=session,
     )
-    return JSONResponse(
-        content=jsonable_encoder(result.response),
-        status_code=result.status_code,
-    )
+    if result.response["result"] and timelines_enabled(redis):
+        await follow_timeline(redis, follower_id, user_id, session)
+    if result.response["result"] and feed_cache_enabled(redis):
+        await invalidate_user_feed(redis, follower_id)
+    return json_response(result)
 
 
 @router.delete("/{user_id}/follow", response_model=BaseResponseDataOut)
@@ -50,6 +60,7 @@ async def unfollow_user(
     user_id: int,
     request: Request,
     session: AsyncSession = Depends(get_async_session),
+    redis: Optional[Redis] = Depends(get_redis),
 ):
     """Unfollow the user.
 
@@ -60,6 +71,7 @@ async def unfollow_user(
         user_id: int
         request: FastAPI Request object
         session: Async session
+        redis: Redis connection for home timelines and the feed cache
 
     Returns:
         JSONResponse: результат выполнения опереации.
@@ -71,17 +83,18 @@ async def unfollow_user(
         following_id=user_id,
         async_session=session,
     )
-    return JSONResponse(
-        content=jsonable_encoder(result.response),
-        status_code=result.status_code,
-    )
+    if result.response["result"] and timelines_enabled(redis):
+        await unfollow_timeline(redis, follower_id, user_id, session)
+    if result.response["result"] and feed_cache_enabled(redis):
+        await invalidate_user_feed(redis, follower_id)
+    return json_response(result)
 
 
 @router.get("/me", response_model=UserProfileDataOut)
 @cache(expire=30)
 async def self_profile_info(
     request: Request,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """Return user's profile information.
 
@@ -90,7 +103,7 @@ async def self_profile_info(
 
     Parameters:
         request: FastAPI Request object
-        session: Async session
+        session: Async session to a read replica
 
     Returns:
         JSON: результат запроса и информацию о пользователе.
@@ -102,18 +115,15 @@ async def self_profile_info(
         async_session=session,
     )
     if not result.response["result"]:
-        return JSONResponse(
-            content=jsonable_encoder(result.response),
-            status_code=result.status_code,
-        )
-    return jsonable_encoder(result.response)
+        return json_response(result)
+    return result.response
 
 
 @router.get("/{user_id}", response_model=UserProfileDataOut)
 @cache(expire=30)
 async def user_profile_info_by_id(
     user_id: int,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_async_read_session),
 ):
     """Return user's profile information.
 
@@ -122,7 +132,7 @@ async def user_profile_info_by_id(
 
     Parameters:
         user_id: int
-        session: Async session
+        session: Async session to a read replica
 
     Returns:
         JSONResponse: результат запроса и информацию о пользователе.
@@ -132,8 +142,5 @@ async def user_profile_info_by_id(
         async_session=session,
     )
     if not result.response["result"]:
-        return JSONResponse(
-            content=jsonable_encoder(result.response),
-            status_code=result.status_code,
-        )
-    return jsonable_encoder(result.response)
+        return json_response(result)
+    return result.response
@@ -1,7 +1,9 @@
-from typing import List, Optional, Annotated, Union
+from typing import Dict, List, Optional, Annotated, Union
 
-from pydantic import BaseModel, ConfigDict
-from fastapi import Query
+from pydantic import BaseModel, ConfigDict, Field
+from fastapi import HTTPException, Query
+from config import FEED_MAX_PAGE_SIZE  # noqa
+from utils.pagination import decode_cursor  # noqa
 
 
 class BaseResponseDataOut(BaseModel):
@@ -39,20 +41,42 @@ class TweetResponseWithId(BaseResponseDataOut):
     tweet_id: int
 
 
+# link of the media or map of the original link and links of its variants
+Attachment = Union[str, Dict[str, str]]
+
+
 class TweetFullData(BaseModel):
     """Class response with full info about tweet."""
 
     id: int
     content: str
-    attachments: List[str]
+    attachments: List[Attachment]
     author: UserBaseData
     likes: List[UserBaseDataV2]
 
 
+class TweetLikesSummaryData(TweetFullData):
+    """Class extends tweet info with like summary.
+
+    likes are the first likers only.
+    """
+
+    like_count: int
+    liked: bool
+
+
 class TweetsListDataOut(BaseResponseDataOut):
-    """Class extends basic response with tweets list."""
+    """Class extends basic response with tweets list and next page cursor."""
 
-    tweets: List[TweetFullData]
+    tweets: List[Union[TweetLikesSummaryData, TweetFullData]]
+    next_cursor: Optional[str] = None
+
+
+class LikersListDataOut(BaseResponseDataOut):
+    """Class extends basic response with likers of tweet and next page cursor."""
+
+    likes: List[UserBaseDataV2]
+    next_cursor: Optional[str] = None
 
 
 class MediaUploadResponseDataWithId(BaseResponseDataOut):
@@ -61,6 +85,23 @@ class MediaUploadResponseDataWithId(BaseResponseDataOut):
     media_id: int
 
 
+class MediaUploadSlotDataIn(BaseModel):
+    """Class for validation of the direct upload request."""
+
+    filename: str = Field(min_length=1, max_length=255)
+
+
+class MediaUploadSlotDataOut(MediaUploadResponseDataWithId):
+    """Class extends response with media_id with the presigned upload form.
+
+    upload_fields are sent before the file field in a multipart/form-data
+    POST request to upload_url.
+    """
+
+    upload_url: str
+    upload_fields: dict[str, str]
+
+
 class UserData(UserBaseData):
     """Class extends basic user's data with followers and following lists."""
 
@@ -75,12 +116,89 @@ class UserProfileDataOut(BaseResponseDataOut):
 
 
 class Pagination(BaseModel):
+    """Page of the feed.
+
+    offset (int): number of the page, kept for old clients
+    limit (int): page size
+    after (like_count, tweet_id): decoded cursor, the page starts after it
+    """
+
     offset: Optional[int]
     limit: Optional[int]
+    after: Optional[tuple[int, ...]] = None
+
+
+def get_cursor_position(
+    cursor: Optional[str], size: int = 2,
+) -> Optional[tuple[int, ...]]:
+    """Return position decoded from cursor query param.
+
+    Parameters:
+        cursor: next_cursor of the previous page
+        size: number of sort keys in the position
+
+    Returns:
+        position or None if there is no cursor
+
+    Raises:
+        HTTPException: the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor, size)
+    except ValueError as err:
+        raise HTTPException(
+            detail={
+                "result": False,
+                "error_type": "InvalidCursor",
+                "error_message": str(err),
+            },
+            status_code=400,
+        )
 
 
 def pagination_params(
     offset: Annotated[Union[int, None], Query(ge=1, le=150)] = None,
-    limit: Annotated[Union[int, None], Query(ge=1, le=100)] = None,
+    limit: Annotated[Union[int, None], Query(ge=1, le=FEED_MAX_PAGE_SIZE)] = None,
+    cursor: Annotated[Union[str, None], Query(max_length=64)] = None,
+):
+    """Return pagination of the feed from query params.
+
+    Parameters:
+        offset: number of the page
+        limit: page size
+        cursor: next_cursor of the previous page, replaces offset
+
+    Returns:
+        Pagination
+
+    Raises:
+        HTTPException: the cursor is malformed
+    """
+    return Pagination(
+        offset=offset, limit=limit, after=get_cursor_position(cursor),
+    )
+
+
+def likers_pagination_params(
+    limit: Annotated[Union[int, None], Query(ge=1, le=FEED_MAX_PAGE_SIZE)] = None,
+    cursor: Annotated[Union[str, None], Query(max_length=64)] = None,
 ):
-    return Pagination(offset=offset, limit=limit)
+    """Return pagination of the likers of tweet from query params.
+
+    Likers are ordered by user id, the cursor holds id of the last liker.
+
+    Parameters:
+        limit: page size
+        cursor: next_cursor of the previous page
+
+    Returns:
+        Pagination
+
+    Raises:
+        HTTPException: the cursor is malformed
+    """
+    return Pagination(
+        offset=None, limit=limit, after=get_cursor_position(cursor, size=1),
+    )
@@ -0,0 +1,121 @@
+import asyncio
+import sys
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import array
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from config import AUTH_BACKFILL_BATCH_SIZE  # noqa
+from database_models.db_config import async_session  # noqa
+from database_models.users_orm_models import Cookies  # noqa
+from utils.api_keys import get_key_digest  # noqa
+from utils.logger_config import orm_logger  # noqa
+
+
+def iter_batches(api_keys: Iterable[str], batch_size: int) -> Iterator[list[str]]:
+    """Yield the non-empty api-keys by batches.
+
+    Parameters:
+        api_keys: api-keys, surrounding whitespace is stripped
+        batch_size: max number of the keys in a batch
+
+    Yields:
+        list of api-keys
+    """
+    stripped: Iterator[str] = filter(None, (key.strip() for key in api_keys))
+    while True:  # noqa: WPS457
+        batch: list[str] = list(islice(stripped, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+async def backfill_key_digests(session: AsyncSession, api_keys: list[str]) -> int:
+    """Store lookup digests of the legacy rows matching the api-keys.
+
+    The digest can't be computed from the salted hash, so it's computed
+    from the known api-keys. crypt() is run for every pair of a key and
+    a legacy row, it's meant for an offline run.
+
+    Parameters:
+        session: AsyncSession
+        api_keys: api-keys issued before the digests were stored
+
+    Returns:
+        int: number of the backfilled rows
+    """
+    known_keys = func.unnest(
+        array(api_keys), array([get_key_digest(key) for key in api_keys]),
+    ).table_valued("api_key", "digest").render_derived()
+    request = await session.execute(
+        update(Cookies)
+        .where(
+            Cookies.lookup.is_(None),
+            Cookies.hash == func.crypt(known_keys.c.api_key, Cookies.hash),
+        )
+        .values(lookup=known_keys.c.digest)
+        .returning(Cookies.id),
+    )
+    return len(request.scalars().all())
+
+
+async def count_legacy_keys(session: AsyncSession) -> int:
+    """Return number of the rows without lookup digest.
+
+    Parameters:
+        session: AsyncSession
+
+    Returns:
+        int
+    """
+    request = await session.execute(
+        select(func.count()).select_from(Cookies).where(Cookies.lookup.is_(None)),
+    )
+    return request.scalar_one()
+
+
+async def run_backfill(
+    api_keys: Iterable[str],
+    batch_size: int = AUTH_BACKFILL_BATCH_SIZE,
+    session_factory: async_sessionmaker = async_session,
+) -> tuple[int, int]:
+    """Backfill lookup digests by batches of the api-keys.
+
+    Every batch is committed in a transaction of its own. When no legacy
+    rows are left, AUTH_LEGACY_KEYS can be switched off, the keys which
+    were not backfilled stop working then.
+
+    Parameters:
+        api_keys: api-keys issued before the digests were stored
+        batch_size: max number of the keys in a batch
+        session_factory: sessions to the primary
+
+    Returns:
+        (number of the backfilled rows, number of the legacy rows left)
+    """
+    batches: Iterator[list[str]] = iter_batches(api_keys, batch_size)
+    backfilled = 0
+    batch: Optional[list[str]] = next(batches, None)
+    while batch:
+        async with session_factory() as session:
+            backfilled += await backfill_key_digests(session, batch)
+            await session.commit()
+        batch = next(batches, None)
+    async with session_factory() as session:
+        legacy_left: int = await count_legacy_keys(session)
+    return backfilled, legacy_left
+
+
+async def main() -> None:
+    """Backfill the digests of the api-keys read from stdin, one per line."""
+    backfilled, legacy_left = await run_backfill(sys.stdin)
+    report = "backfilled={backfilled} legacy_left={legacy_left}".format(
+        backfilled=backfilled, legacy_left=legacy_left,
+    )
+    print(report)  # noqa: WPS421
+    orm_logger.info("Api-key backfill: %s", report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+from hashlib import sha256
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from config import AUTH_CACHE_SIZE, AUTH_CACHE_TTL, AUTH_SHARED_CACHE_TTL  # noqa
+from utils.cache import TTLCache  # noqa
+from utils.logger_config import api_logger  # noqa
+
+# api-key digest -> ResponseData of CookiesMethods.get_user_id
+api_key_cache = TTLCache(max_size=AUTH_CACHE_SIZE, ttl=AUTH_CACHE_TTL)
+
+
+def get_key_digest(api_key: str) -> str:
+    """Return deterministic digest of the api-key.
+
+    The digest is stored next to the salted hash in Cookies.lookup,
+    so the key can be found with one index probe instead of
+    running crypt() over every row of the table.
+
+    Parameters:
+        api_key: str
+
+    Returns:
+        str: sha256 hex digest of the api-key
+    """
+    return sha256(api_key.encode()).hexdigest()
+
+
+class SharedApiKeyCache:
+    """Redis tier of resolved api-keys shared by all workers.
+
+    Only found keys are stored, unknown keys are cached by each worker
+    in api_key_cache. Redis errors are logged and treated as a miss.
+    """
+
+    prefix = "api-key"
+
+    def __init__(self, redis: Redis, ttl: float = AUTH_SHARED_CACHE_TTL) -> None:
+        """Init.
+
+        Parameters:
+            redis: Redis connection created in the app lifespan
+            ttl: max time to live of an entry in seconds
+        """
+        self.redis = redis
+        self.ttl = ttl
+
+    async def get(self, key_digest: str) -> Optional[tuple[int, float]]:
+        """Return user id and seconds left to live by api-key digest.
+
+        Parameters:
+            key_digest: str
+
+        Returns:
+            (user_id, ttl) or None if the key is not cached
+        """
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.get(self._get_key(key_digest))
+                pipe.pttl(self._get_key(key_digest))
+                user_id, ttl_ms = await pipe.execute()
+        except RedisError as err:
+            api_logger.warning("Shared api-key cache is unavailable: %s", err)
+            return None
+
+        if user_id is None or ttl_ms <= 0:
+            return None
+        return int(user_id), ttl_ms / 1000
+
+    async def set(self, key_digest: str, user_id: int, ttl: float) -> None:
+        """Store user id by api-key digest.
+
+        Parameters:
+            key_digest: str
+            user_id: int
+            ttl: seconds to live capped by self.ttl, nothing is stored
+                if it isn't positive
+        """
+        ttl_ms = int(min(ttl, self.ttl) * 1000)
+        if ttl_ms <= 0:
+            return
+        try:
+            await self.redis.set(self._get_key(key_digest), user_id, px=ttl_ms)
+        except RedisError as err:
+            api_logger.warning("Shared api-key cache is unavailable: %s", err)
+
+    async def delete(self, key_digest: str) -> None:
+        """Delete user id by api-key digest.
+
+        Parameters:
+            key_digest: str
+        """
+        try:
+            await self.redis.delete(self._get_key(key_digest))
+        except RedisError as err:
+            api_logger.warning("Shared api-key cache is unavailable: %s", err)
+
+    def _get_key(self, key_digest: str) -> str:
+        return "{prefix}:{digest}".format(prefix=self.prefix, digest=key_digest)
+
+
+async def invalidate_api_key(api_key: str, redis: Optional[Redis] = None) -> None:
+    """Drop resolved api-key from the in-process and the shared caches.
+
+    Parameters:
+        api_key: str
+        redis: Redis connection, the shared cache is skipped if it's None
+    """
+    key_digest: str = get_key_digest(api_key)
+    api_key_cache.delete(key_digest)
+    if redis is not None:
+        await SharedApiKeyCache(redis).delete(key_digest)
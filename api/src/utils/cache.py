@@ -1,4 +1,10 @@
+from collections import OrderedDict
 from hashlib import md5
+from time import monotonic
+from typing import Any, Hashable, Optional
+
+from fastapi import Request
+from redis.asyncio import Redis
 
 
 def custom_key_builder(
@@ -32,3 +38,89 @@ def custom_key_builder(
     ).hexdigest()
 
     return "{namespace}:{key}".format(namespace=namespace, key=hashed_key)
+
+
+def get_redis(request: Request) -> Optional[Redis]:
+    """Return Redis connection created in the app lifespan.
+
+    Parameters:
+        request: FastAPI.request
+
+    Returns:
+        Redis or None if the lifespan has not been run
+    """
+    return getattr(request.app.state, "redis", None)
+
+
+class TTLCache:
+    """Bounded in-process cache with per-entry TTL and LRU eviction."""
+
+    def __init__(self, max_size: int, ttl: float) -> None:
+        """Init.
+
+        Parameters:
+            max_size: max number of entries, least recently used are evicted
+            ttl: default time to live of an entry in seconds
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        """Return number of stored entries.
+
+        Returns:
+            int
+        """
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any:
+        """Return value by key or None if it is missing or expired.
+
+        Parameters:
+            key: Hashable
+
+        Returns:
+            stored value or None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= monotonic():
+            del self._entries[key]  # noqa: WPS420
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store value by key.
+
+        Parameters:
+            key: Hashable
+            value: Any
+            ttl: time to live in seconds, capped by the default one
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        self._entries[key] = (monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """Delete value by key.
+
+        Parameters:
+            key: Hashable
+        """
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Delete all values."""
+        self._entries.clear()
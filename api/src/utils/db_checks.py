@@ -0,0 +1,73 @@
+import asyncio
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from database_models.db_config import async_session  # noqa
+
+# Foreign keys which columns are not the leading key columns
+# of any valid, non-partial index of the table.
+UNINDEXED_FOREIGN_KEYS_QUERY = text(
+    """
+    SELECT
+        c.conrelid::regclass::text AS table_name,
+        c.conname AS constraint_name,
+        array_agg(a.attname ORDER BY k.ord)::text[] AS columns
+    FROM pg_constraint c
+    CROSS JOIN LATERAL unnest(c.conkey) WITH ORDINALITY AS k(attnum, ord)
+    JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = k.attnum
+    WHERE c.contype = 'f'
+      AND c.connamespace = 'public'::regnamespace
+      AND NOT EXISTS (
+          SELECT 1
+          FROM pg_index i
+          WHERE i.indrelid = c.conrelid
+            AND i.indisvalid
+            AND i.indpred IS NULL
+            AND i.indnkeyatts >= cardinality(c.conkey)
+            AND (i.indkey::int2[])[0:cardinality(c.conkey) - 1] @> c.conkey
+      )
+    GROUP BY c.conrelid, c.conname
+    ORDER BY table_name, constraint_name
+    """,
+)
+
+
+async def find_unindexed_foreign_keys(session: AsyncSession) -> list[dict]:
+    """Return foreign keys that have no index for their columns.
+
+    Without such index every join or filter by the columns
+    and every delete from the referenced table scans the whole table.
+
+    Parameters:
+        session: AsyncSession
+
+    Returns:
+        list of {table_name: str, constraint_name: str, columns: list[str]}
+    """
+    request = await session.execute(UNINDEXED_FOREIGN_KEYS_QUERY)
+    return [dict(row) for row in request.mappings().all()]
+
+
+async def report_unindexed_foreign_keys() -> int:
+    """Print foreign keys without index.
+
+    Returns:
+        int: exit code, 1 if any foreign key has no index
+    """
+    async with async_session() as session:
+        foreign_keys: list[dict] = await find_unindexed_foreign_keys(session)
+
+    for foreign_key in foreign_keys:
+        print(  # noqa: WPS421
+            "{table_name}.{columns} ({constraint_name}) has no index".format(
+                table_name=foreign_key["table_name"],
+                columns=",".join(foreign_key["columns"]),
+                constraint_name=foreign_key["constraint_name"],
+            ),
+        )
+    return 1 if foreign_keys else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(report_unindexed_foreign_keys()))
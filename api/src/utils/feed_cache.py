@@ -0,0 +1,259 @@
+from typing import Iterable, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import FEED_CACHE_TTL  # noqa
+from database_models.db_config import ResponseData  # noqa
+from database_models.methods.users import FollowersMethods  # noqa
+from utils.logger_config import api_logger  # noqa
+from utils.metrics import metrics  # noqa
+
+# KEYS: pages of the user, version of the user, tags of the authors.
+# ARGV: ttl, variant, page, version read before selecting the page, user id.
+# The page isn't stored if the feed has been invalidated since it was read.
+# Tags are registered once, when the first page of the user is cached.
+SET_SCRIPT = """
+local ttl = tonumber(ARGV[1])
+if (redis.call('GET', KEYS[2]) or '') ~= ARGV[4] then
+    return 0
+end
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    for i = 3, #KEYS do
+        redis.call('SADD', KEYS[i], ARGV[5])
+        redis.call('EXPIRE', KEYS[i], ttl)
+    end
+    redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+    redis.call('EXPIRE', KEYS[1], ttl)
+else
+    redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+end
+return 1
+"""
+
+
+def feed_cache_enabled(redis: Optional[Redis]) -> bool:
+    """Return True if feed pages are cached.
+
+    Parameters:
+        redis: Redis connection or None
+
+    Returns:
+        bool
+    """
+    return FEED_CACHE_TTL > 0 and redis is not None
+
+
+class CachedFeed:
+    """Feed page read from FeedCache."""
+
+    def __init__(self, page: Optional[bytes], version: str):
+        """Init.
+
+        Parameters:
+            page: JSON response body or None on a miss
+            version: version of the user's feed, the page selected
+                on a miss is stored only if it doesn't change
+        """
+        self.page = page
+        self.version = version
+
+
+class FeedCache:
+    """Feed pages of users cached in Redis.
+
+    Pages of a user (one per cursor, limit, etc.) are fields of one hash,
+    so the whole feed of the user is dropped at once.
+    A tag set of an author holds the users whose cached feed has the author's
+    tweets, an event on the author's tweet drops only these feeds.
+    The version of a user's feed is increased on every invalidation.
+    A page read from a lagging replica may stay cached until the TTL.
+    Redis errors are logged, a page that can't be read is selected from the db.
+    """
+
+    prefix = "feed-cache"
+    version_prefix = "feed-cache-version"
+    tag_prefix = "feed-cache-tag"
+
+    def __init__(self, redis: Redis, ttl: int = FEED_CACHE_TTL) -> None:
+        """Init.
+
+        Parameters:
+            redis: Redis connection created in the app lifespan
+            ttl: seconds the pages of a user live after the first one is cached
+        """
+        self.redis = redis
+        self.ttl = ttl
+
+    async def get(self, user_id: int, variant: str) -> Optional[CachedFeed]:
+        """Return cached page of the user's feed.
+
+        Parameters:
+            user_id: owner of the feed
+            variant: query params of the page
+
+        Returns:
+            CachedFeed or None if Redis is unavailable
+        """
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.hget(self._get_key(user_id), variant)
+                pipe.get(self._get_key(user_id, self.version_prefix))
+                page, version = await pipe.execute()
+        except RedisError as err:
+            api_logger.warning("Feed cache is unavailable: %s", err)
+            return None
+        return CachedFeed(page, version.decode() if version else "")
+
+    async def set(
+        self,
+        user_id: int,
+        cached_feed: CachedFeed,
+        variant: str,
+        author_ids: Iterable[int],
+    ) -> None:
+        """Store page of the user's feed.
+
+        Parameters:
+            user_id: owner of the feed
+            cached_feed: page and the version read by get()
+            variant: query params of the page
+            author_ids: authors whose tweets are in the feed
+        """
+        keys = [self._get_key(user_id), self._get_key(user_id, self.version_prefix)]
+        keys.extend(self._get_key(author_id, self.tag_prefix) for author_id in author_ids)
+        try:
+            await self.redis.eval(
+                SET_SCRIPT,
+                len(keys),
+                *keys,
+                self.ttl,
+                variant,
+                cached_feed.page,
+                cached_feed.version,
+                user_id,
+            )
+        except RedisError as err:
+            api_logger.warning("Feed cache is unavailable: %s", err)
+
+    async def invalidate_authors(self, author_ids: list[int]) -> int:
+        """Drop feeds of the users who have the authors' tweets in the cache.
+
+        Parameters:
+            author_ids: list[int]
+
+        Returns:
+            int: number of dropped feeds
+        """
+        tag_keys = [self._get_key(author_id, self.tag_prefix) for author_id in author_ids]
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for tag_key in tag_keys:
+                    pipe.smembers(tag_key)
+                pipe.delete(*tag_keys)
+                replies: list = await pipe.execute()
+        except RedisError as err:
+            api_logger.warning("Feed cache is unavailable: %s", err)
+            return 0
+
+        user_ids: set[int] = set()
+        for members in replies[:-1]:
+            user_ids.update(int(member) for member in members)
+        await self.invalidate_users(user_ids)
+        return len(user_ids)
+
+    async def invalidate_users(self, user_ids: Iterable[int]) -> None:
+        """Drop feeds of the users.
+
+        Parameters:
+            user_ids: owners of the feeds
+        """
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.delete(self._get_key(user_id))
+                    pipe.incr(self._get_key(user_id, self.version_prefix))
+                    pipe.expire(self._get_key(user_id, self.version_prefix), self.ttl)
+                await pipe.execute()
+        except RedisError as err:
+            api_logger.warning("Feed cache is unavailable: %s", err)
+
+    def _get_key(self, user_id: int, prefix: Optional[str] = None) -> str:
+        return "{prefix}:{user_id}".format(prefix=prefix or self.prefix, user_id=user_id)
+
+
+async def get_cached_feed(
+    redis: Redis, user_id: int, variant: str,
+) -> Optional[CachedFeed]:
+    """Return cached page of the user's feed.
+
+    Parameters:
+        redis: Redis connection
+        user_id: owner of the feed
+        variant: query params of the page
+
+    Returns:
+        CachedFeed, its page is None on a miss, or None if Redis is unavailable
+    """
+    cached_feed = await FeedCache(redis).get(user_id, variant)
+    if cached_feed is not None:
+        metrics.increment(
+            "feed_cache.misses" if cached_feed.page is None else "feed_cache.hits",
+        )
+    return cached_feed
+
+
+async def cache_feed(
+    redis: Redis,
+    user_id: int,
+    cached_feed: CachedFeed,
+    variant: str,
+    async_session: AsyncSession,
+) -> None:
+    """Store page of the user's feed tagged by the user and the followed users.
+
+    Parameters:
+        redis: Redis connection
+        user_id: owner of the feed
+        cached_feed: page to store and the version read before selecting it
+        variant: query params of the page
+        async_session: AsyncSession
+    """
+    following: ResponseData = await FollowersMethods.get_following_ids(
+        user_id, async_session,
+    )
+    if not following.response["result"]:
+        return
+    await FeedCache(redis).set(
+        user_id,
+        cached_feed,
+        variant,
+        [user_id, *following.response["following_ids"]],
+    )
+
+
+async def invalidate_author_feeds(redis: Redis, author_id: int) -> None:
+    """Drop cached feeds showing tweets of the author.
+
+    Called when the author adds or deletes a tweet or the tweet is liked.
+
+    Parameters:
+        redis: Redis connection
+        author_id: int
+    """
+    invalidated = await FeedCache(redis).invalidate_authors([author_id])
+    metrics.increment("feed_cache.invalidated", invalidated)
+
+
+async def invalidate_user_feed(redis: Redis, user_id: int) -> None:
+    """Drop cached feed of the user.
+
+    Called when the user follows or unfollows somebody.
+
+    Parameters:
+        redis: Redis connection
+        user_id: owner of the feed
+    """
+    await FeedCache(redis).invalidate_users([user_id])
+    metrics.increment("feed_cache.invalidated")
@@ -0,0 +1,91 @@
+import asyncio
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from database_models.db_config import async_session  # noqa
+from database_models.tweets_orm_models import Likes, Tweets  # noqa
+from database_models.users_orm_models import Users  # noqa: F401
+from utils.logger_config import orm_logger  # noqa
+from utils.metrics import metrics  # noqa
+
+RECONCILE_BATCH_SIZE = 1000
+
+
+async def reconcile_like_counts_batch(
+    session: AsyncSession, after_id: int, batch_size: int = RECONCILE_BATCH_SIZE,
+) -> tuple[int, int]:
+    """Fix Tweets.like_count of one batch of tweets.
+
+    The tweets are locked first, so a like can't be added or deleted
+    between counting the likes and writing the count.
+
+    Parameters:
+        session: AsyncSession
+        after_id: batch starts after the tweet with this id
+        batch_size: number of tweets in the batch
+
+    Returns:
+        (last_id, fixed): id of the last tweet in the batch (0 if the batch
+            is empty) and the number of tweets with a wrong count
+    """
+    lock_expr = (
+        select(Tweets.id)
+        .where(Tweets.id > after_id)
+        .order_by(Tweets.id)
+        .limit(batch_size)
+        .with_for_update()
+    )
+    lock_request = await session.execute(lock_expr)
+    tweet_ids: list[int] = lock_request.scalars().all()
+    if not tweet_ids:
+        return 0, 0
+
+    actual_count = (
+        select(func.count())
+        .where(Likes.tweet_id == Tweets.id)
+        .scalar_subquery()
+    )
+    fix_expr = (
+        update(Tweets)
+        .where(Tweets.id.in_(tweet_ids), Tweets.like_count != actual_count)
+        .values(like_count=actual_count)
+        .returning(Tweets.id)
+    )
+    fix_request = await session.execute(fix_expr)
+    fixed_ids: list[int] = fix_request.scalars().all()
+    await session.commit()
+
+    if fixed_ids:
+        orm_logger.warning("Fixed like_count of tweets %s", fixed_ids)
+    return tweet_ids[-1], len(fixed_ids)
+
+
+async def reconcile_like_counts(batch_size: int = RECONCILE_BATCH_SIZE) -> int:
+    """Recount likes of all tweets and fix the drifted Tweets.like_count.
+
+    Every batch is a separate short transaction.
+
+    Parameters:
+        batch_size: number of tweets locked at once
+
+    Returns:
+        int: number of fixed tweets
+    """
+    async with async_session() as session:
+        last_id, fixed = await reconcile_like_counts_batch(session, 0, batch_size)
+        while last_id:
+            last_id, batch_fixed = await reconcile_like_counts_batch(
+                session, last_id, batch_size,
+            )
+            fixed += batch_fixed
+
+    metrics.increment("tweets.like_count.fixed", fixed)
+    return fixed
+
+
+if __name__ == "__main__":
+    print(  # noqa: WPS421
+        "Fixed like_count of {fixed} tweets".format(
+            fixed=asyncio.run(reconcile_like_counts()),
+        ),
+    )
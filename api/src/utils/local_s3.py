@@ -0,0 +1,286 @@
+import asyncio
+import random
+from typing import Optional
+from uuid import uuid4
+
+from botocore.exceptions import ClientError
+
+
+class LocalBody:
+    """Body of a read object like the aiobotocore stream."""
+
+    def __init__(self, content: bytes) -> None:
+        """Init.
+
+        Parameters:
+            content: content of the object
+        """
+        self.content = content
+
+    async def __aenter__(self) -> "LocalBody":
+        """Open the stream.
+
+        Returns:
+            LocalBody
+        """
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Close the stream.
+
+        Parameters:
+            exc_info: exception raised in the block
+        """
+
+    async def read(self) -> bytes:
+        """Return content of the object.
+
+        Returns:
+            bytes
+        """
+        return self.content
+
+
+class LocalRequests:
+    """Latency and errors of the requests to the local storage.
+
+    Errors are drawn from a seeded generator, so a run of the same
+    requests fails the same way every time.
+    """
+
+    def __init__(
+        self, latency: float = 0, error_rate: float = 0, seed: int = 0,
+    ) -> None:
+        """Init.
+
+        Parameters:
+            latency: seconds added to every request
+            error_rate: share of the requests failing with SlowDown
+            seed: seed of the errors
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.objects: dict[str, bytes] = {}
+        self._random = random.Random(seed)  # noqa: S311
+
+    async def _request(self, operation_name: str) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self._random.random() < self.error_rate:
+            raise ClientError(
+                error_response={
+                    "Error": {"Code": "SlowDown", "Message": "Injected error"},
+                    "ResponseMetadata": {"HTTPStatusCode": 503},
+                },
+                operation_name=operation_name,
+            )
+
+
+class LocalObjectsClient(LocalRequests):
+    """Object requests of the aiobotocore client used by the API."""
+
+    async def put_object(  # noqa: N803
+        self, Bucket: str, Key: str, Body: bytes, **kwargs,
+    ) -> dict:
+        """Store the object.
+
+        Parameters:
+            Bucket: name of the bucket, one bucket is stored
+            Key: name of the object
+            Body: content of the object
+            kwargs: ContentType and other ignored parameters
+
+        Returns:
+            dict
+        """
+        await self._request("PutObject")
+        self.objects[Key] = bytes(Body)
+        return {"ETag": '"{etag}"'.format(etag=uuid4().hex)}
+
+    async def get_object(self, Bucket: str, Key: str) -> dict:  # noqa: N803
+        """Return the object.
+
+        Parameters:
+            Bucket: name of the bucket
+            Key: name of the object
+
+        Returns:
+            dict: {Body: LocalBody, ContentLength: int}
+        """
+        content: bytes = await self._get_content("GetObject", Key)
+        return {"Body": LocalBody(content), "ContentLength": len(content)}
+
+    async def head_object(self, Bucket: str, Key: str) -> dict:  # noqa: N803
+        """Return size of the object.
+
+        Parameters:
+            Bucket: name of the bucket
+            Key: name of the object
+
+        Returns:
+            dict: {ContentLength: int}
+        """
+        content: bytes = await self._get_content("HeadObject", Key)
+        return {"ContentLength": len(content)}
+
+    async def copy_object(  # noqa: N803
+        self, Bucket: str, Key: str, CopySource: dict,
+    ) -> dict:
+        """Copy the object.
+
+        Parameters:
+            Bucket: name of the bucket
+            Key: name of the copy
+            CopySource: {Bucket, Key} of the copied object
+
+        Returns:
+            dict
+        """
+        self.objects[Key] = await self._get_content("CopyObject", CopySource["Key"])
+        return {}
+
+    async def delete_object(self, Bucket: str, Key: str) -> dict:  # noqa: N803
+        """Delete the object, a missing one is deleted too like in S3.
+
+        Parameters:
+            Bucket: name of the bucket
+            Key: name of the object
+
+        Returns:
+            dict
+        """
+        await self._request("DeleteObject")
+        self.objects.pop(Key, None)
+        return {"ResponseMetadata": {"HTTPStatusCode": 204}}
+
+    async def delete_objects(self, Bucket: str, Delete: dict) -> dict:  # noqa: N803
+        """Delete the objects by one request.
+
+        Parameters:
+            Bucket: name of the bucket
+            Delete: {Objects: [{Key}], Quiet: bool}
+
+        Returns:
+            dict: {Errors: []}
+        """
+        await self._request("DeleteObjects")
+        for deleted in Delete["Objects"]:
+            self.objects.pop(deleted["Key"], None)
+        return {"Errors": []}
+
+    async def _get_content(self, operation_name: str, key: str) -> bytes:
+        await self._request(operation_name)
+        content: Optional[bytes] = self.objects.get(key)
+        if content is None:
+            raise ClientError(
+                error_response={
+                    "Error": {"Code": "404", "Message": "Not Found"},
+                    "ResponseMetadata": {"HTTPStatusCode": 404},
+                },
+                operation_name=operation_name,
+            )
+        return content
+
+
+class LocalClient(LocalObjectsClient):
+    """Stand-in of the aiobotocore s3 client keeping objects in memory.
+
+    Implements the requests sent by S3Client, MultipartUpload and
+    the media helpers. Presigned forms point to endpoint_url, nothing
+    receives them, so direct uploads can't be completed offline.
+    """
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        latency: float = 0,
+        error_rate: float = 0,
+        seed: int = 0,
+    ) -> None:
+        """Init.
+
+        Parameters:
+            endpoint_url: URL of the presigned forms
+            latency: seconds added to every request
+            error_rate: share of the requests failing with SlowDown
+            seed: seed of the errors
+        """
+        super().__init__(latency, error_rate, seed)
+        self.endpoint_url = endpoint_url
+        self._uploads: dict[str, dict[int, bytes]] = {}
+
+    async def create_multipart_upload(self, Bucket: str, Key: str) -> dict:  # noqa: N803
+        """Start a multipart upload.
+
+        Parameters:
+            Bucket: name of the bucket
+            Key: name of the object
+
+        Returns:
+            dict: {UploadId: str}
+        """
+        await self._request("CreateMultipartUpload")
+        upload_id: str = uuid4().hex
+        self._uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    async def upload_part(self, **kwargs) -> dict:
+        """Store a part of the multipart upload.
+
+        Parameters:
+            kwargs: Bucket, Key, UploadId, PartNumber and Body of the part
+
+        Returns:
+            dict: {ETag: str}
+        """
+        await self._request("UploadPart")
+        self._uploads[kwargs["UploadId"]][kwargs["PartNumber"]] = bytes(kwargs["Body"])
+        return {"ETag": '"{etag}"'.format(etag=uuid4().hex)}
+
+    async def complete_multipart_upload(self, **kwargs) -> dict:
+        """Join the parts into the object.
+
+        Parameters:
+            kwargs: Bucket, Key, UploadId and MultipartUpload with the parts
+
+        Returns:
+            dict
+        """
+        await self._request("CompleteMultipartUpload")
+        parts: dict[int, bytes] = self._uploads.pop(kwargs["UploadId"])
+        self.objects[kwargs["Key"]] = b"".join(
+            parts[part["PartNumber"]]
+            for part in kwargs["MultipartUpload"]["Parts"]
+        )
+        return {}
+
+    async def abort_multipart_upload(self, **kwargs) -> dict:
+        """Discard the parts of the multipart upload.
+
+        Parameters:
+            kwargs: Bucket, Key and UploadId
+
+        Returns:
+            dict
+        """
+        await self._request("AbortMultipartUpload")
+        self._uploads.pop(kwargs["UploadId"], None)
+        return {}
+
+    async def generate_presigned_post(  # noqa: N803
+        self, Bucket: str, Key: str, **kwargs,
+    ) -> dict:
+        """Return upload form, it's built locally like by aiobotocore.
+
+        Parameters:
+            Bucket: name of the bucket
+            Key: name of the object
+            kwargs: Conditions and ExpiresIn, ignored
+
+        Returns:
+            dict: {url: str, fields: dict}
+        """
+        return {
+            "url": "{url}/{bucket}".format(url=self.endpoint_url, bucket=Bucket),
+            "fields": {"key": Key},
+        }
@@ -0,0 +1,278 @@
+import asyncio
+import sys
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from config import MEDIA_CLEANUP_BACKOFF, MEDIA_CLEANUP_BATCH_SIZE  # noqa
+from config import MEDIA_CLEANUP_INTERVAL, MEDIA_CLEANUP_MAX_ATTEMPTS  # noqa
+from config import MEDIA_CLEANUP_MAX_BACKOFF  # noqa
+from database_models.db_config import ResponseData, async_session  # noqa
+from database_models.methods.medias import expire_pending_medias  # noqa
+from database_models.methods.medias import lock_media_keys  # noqa
+from database_models.tweets_orm_models import MediaCleanupJobs, Medias  # noqa
+from database_models.users_orm_models import Users  # noqa: F401
+from utils.logger_config import s3_logger  # noqa
+from utils.metrics import metrics  # noqa
+from utils.s3_config import S3Client  # noqa
+
+
+def get_backoff(attempts: int) -> timedelta:
+    """Return delay before the next attempt of a failed job.
+
+    Parameters:
+        attempts: number of failed attempts
+
+    Returns:
+        timedelta: MEDIA_CLEANUP_BACKOFF doubled on every attempt
+    """
+    seconds: float = MEDIA_CLEANUP_BACKOFF * 2 ** (attempts - 1)
+    return timedelta(seconds=min(seconds, MEDIA_CLEANUP_MAX_BACKOFF))
+
+
+async def claim_cleanup_jobs(
+    session: AsyncSession, batch_size: int = MEDIA_CLEANUP_BATCH_SIZE,
+) -> list[MediaCleanupJobs]:
+    """Lock the jobs ready to run.
+
+    Jobs locked by another worker are skipped.
+
+    Parameters:
+        session: AsyncSession, the jobs are locked until it's committed
+        batch_size: max number of the jobs
+
+    Returns:
+        list[MediaCleanupJobs]
+    """
+    expr = (
+        select(MediaCleanupJobs)
+        .where(
+            MediaCleanupJobs.dead_at.is_(None),
+            MediaCleanupJobs.available_at <= func.now(),
+        )
+        .order_by(MediaCleanupJobs.available_at, MediaCleanupJobs.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    request = await session.execute(expr)
+    return request.scalars().all()
+
+
+async def process_cleanup_jobs(
+    session: AsyncSession, s3_client: S3Client, jobs: list[MediaCleanupJobs],
+) -> None:
+    """Delete objects of the jobs and commit the results.
+
+    Done jobs are deleted, failed ones are rescheduled or dead-lettered.
+    Objects of the keys stored again since the job was queued are kept.
+    The keys are locked until the commit, so an upload of the same content
+    doesn't skip storing an object being deleted.
+
+    Parameters:
+        session: AsyncSession holding the jobs
+        s3_client: S3Client
+        jobs: locked jobs
+    """
+    keys: set[str] = {job.key for job in jobs}
+    await lock_media_keys(session, list(keys))
+    stored_request = await session.execute(
+        select(Medias.key).where(Medias.key.in_(keys)),
+    )
+    delete_result: ResponseData = await s3_client.delete_multiple(
+        list(keys.difference(stored_request.scalars().all())),
+    )
+    failed_keys: set[str] = set(delete_result.response.get("failed_keys", []))
+    done_ids: list[int] = [job.id for job in jobs if job.key not in failed_keys]
+    if done_ids:
+        await session.execute(
+            delete(MediaCleanupJobs).where(MediaCleanupJobs.id.in_(done_ids)),
+        )
+    for job in jobs:
+        if job.key in failed_keys:
+            reschedule_job(job, str(delete_result.response.get("error_message")))
+    await session.commit()
+    metrics.increment("media_cleanup.done", len(done_ids))
+    metrics.increment("media_cleanup.failed", len(jobs) - len(done_ids))
+
+
+def reschedule_job(job: MediaCleanupJobs, error: str) -> None:
+    """Schedule the next attempt of the failed job or dead-letter it.
+
+    Parameters:
+        job: MediaCleanupJobs
+        error: str
+    """
+    job.attempts += 1
+    job.last_error = error[:500]
+    if job.attempts >= MEDIA_CLEANUP_MAX_ATTEMPTS:
+        job.dead_at = func.now()
+        metrics.increment("media_cleanup.dead")
+        s3_logger.error(
+            "Gave up deleting %s after %s attempts: %s", job.key, job.attempts, error,
+        )
+    else:
+        job.available_at = func.now() + get_backoff(job.attempts)
+
+
+async def run_cleanup_batch(
+    s3_client: S3Client,
+    session_factory: async_sessionmaker = async_session,
+    batch_size: int = MEDIA_CLEANUP_BATCH_SIZE,
+) -> int:
+    """Run one batch of the jobs ready to run.
+
+    Pending medias which were not confirmed in time are deleted
+    and queued first.
+
+    Parameters:
+        s3_client: S3Client
+        session_factory: sessions to the primary
+        batch_size: max number of the jobs
+
+    Returns:
+        int: number of the processed jobs
+    """
+    async with session_factory() as session:
+        expired_keys: list[str] = await expire_pending_medias(session, batch_size)
+        await session.commit()
+        metrics.increment("media_cleanup.expired", len(expired_keys))
+        jobs: list[MediaCleanupJobs] = await claim_cleanup_jobs(session, batch_size)
+        if jobs:
+            await process_cleanup_jobs(session, s3_client, jobs)
+    return len(jobs)
+
+
+class MediaCleanupWorker:
+    """Background task of the API process deleting objects of the deleted medias.
+
+    The jobs are queued in media_cleanup_jobs by the transaction deleting
+    the medias, so an object isn't lost if the worker or S3 is down.
+    Several processes can run the worker, a job is locked by one of them.
+    Pending medias which were not confirmed in time are deleted by it too.
+    """
+
+    def __init__(
+        self, s3_client: S3Client, interval: float = MEDIA_CLEANUP_INTERVAL,
+    ) -> None:
+        """Init.
+
+        Parameters:
+            s3_client: S3Client
+            interval: seconds between polls of the empty queue, 0 disables the worker
+        """
+        self.s3_client = s3_client
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "MediaCleanupWorker":
+        """Start the worker.
+
+        Returns:
+            MediaCleanupWorker
+        """
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Stop the worker.
+
+        Parameters:
+            exc_info: exception raised in the block
+        """
+        await self.stop()
+
+    def start(self) -> None:
+        """Start the worker unless the interval is 0."""
+        if self.interval > 0:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the worker, a batch being processed is rolled back."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run(self) -> None:
+        """Run the jobs until cancelled.
+
+        A failed batch is logged and the next one waits get_backoff()
+        of the failures in a row, only cancellation stops the worker.
+        """
+        failures = 0
+        while True:  # noqa: WPS457
+            try:
+                processed: int = await run_cleanup_batch(self.s3_client)
+            except Exception as err:
+                failures += 1
+                metrics.increment("media_cleanup.errors")
+                s3_logger.exception("Media cleanup failed: %s", err)
+                await asyncio.sleep(get_backoff(failures).total_seconds())
+                continue
+            failures = 0
+            if processed < MEDIA_CLEANUP_BATCH_SIZE:
+                await asyncio.sleep(self.interval)
+
+
+async def get_dead_jobs(session: AsyncSession) -> list[MediaCleanupJobs]:
+    """Return dead-lettered jobs.
+
+    Parameters:
+        session: AsyncSession
+
+    Returns:
+        list[MediaCleanupJobs]
+    """
+    request = await session.execute(
+        select(MediaCleanupJobs)
+        .where(MediaCleanupJobs.dead_at.is_not(None))
+        .order_by(MediaCleanupJobs.dead_at),
+    )
+    return request.scalars().all()
+
+
+async def retry_dead_jobs(session: AsyncSession) -> int:
+    """Queue dead-lettered jobs again with reset attempts.
+
+    Parameters:
+        session: AsyncSession
+
+    Returns:
+        int: number of the queued jobs
+    """
+    request = await session.execute(
+        update(MediaCleanupJobs)
+        .where(MediaCleanupJobs.dead_at.is_not(None))
+        .values(attempts=0, dead_at=None, available_at=func.now())
+        .returning(MediaCleanupJobs.id),
+    )
+    await session.commit()
+    return len(request.scalars().all())
+
+
+async def report_dead_jobs(retry: bool = False) -> None:
+    """Print dead-lettered jobs and optionally queue them again.
+
+    Parameters:
+        retry: queue the jobs again
+    """
+    async with async_session() as session:
+        for job in await get_dead_jobs(session):
+            print(  # noqa: WPS421
+                "{dead_at} {key} attempts={attempts} error={error}".format(
+                    dead_at=job.dead_at.isoformat(),
+                    key=job.key,
+                    attempts=job.attempts,
+                    error=job.last_error,
+                ),
+            )
+        if retry:
+            print(  # noqa: WPS421
+                "Queued {count} jobs again".format(count=await retry_dead_jobs(session)),
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(report_dead_jobs(retry="--retry" in sys.argv))
@@ -0,0 +1,182 @@
+import asyncio
+import sys
+import time
+from datetime import timedelta
+
+from sqlalchemy import Row, delete, exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from config import MEDIA_GC_CHUNK_SIZE, MEDIA_GC_GRACE_PERIOD  # noqa
+from database_models.db_config import ResponseData, async_session  # noqa
+from database_models.methods.medias import get_object_keys  # noqa
+from database_models.tweets_orm_models import Medias, MediasTweets  # noqa
+from database_models.users_orm_models import Users  # noqa: F401
+from utils.logger_config import s3_logger  # noqa
+from utils.metrics import metrics  # noqa
+from utils.s3_config import S3Client, create_s3_client  # noqa
+
+
+class MediaGCStats:
+    """Throughput of a collect_orphaned_medias() run."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.chunks = 0
+        self.found_medias = 0
+        self.deleted_medias = 0
+        self.deleted_objects = 0
+        self.failed_objects = 0
+        self._started = time.monotonic()
+
+    def format(self) -> str:
+        """Return the stats as a line of the report.
+
+        Returns:
+            str
+        """
+        elapsed: float = time.monotonic() - self._started
+        return (
+            "chunks={chunks} found={found} deleted={deleted} objects={objects} "
+            "failed_objects={failed} elapsed={elapsed:.2f}s rate={rate:.1f}/s"
+        ).format(
+            chunks=self.chunks,
+            found=self.found_medias,
+            deleted=self.deleted_medias,
+            objects=self.deleted_objects,
+            failed=self.failed_objects,
+            elapsed=elapsed,
+            rate=self.found_medias / elapsed if elapsed else 0,
+        )
+
+
+async def find_orphaned_medias(
+    session: AsyncSession,
+    after_id: int,
+    chunk_size: int = MEDIA_GC_CHUNK_SIZE,
+    grace_period: float = MEDIA_GC_GRACE_PERIOD,
+    lock: bool = True,
+) -> list[Row]:
+    """Return the next chunk of medias not attached to tweets.
+
+    The medias are read by the primary key after after_id, attached ones
+    are skipped by NOT EXISTS on ix_medias_tweets_media_id. Pending medias
+    are left to MediaCleanupWorker.
+
+    Parameters:
+        session: AsyncSession
+        after_id: id of the last media of the previous chunk
+        chunk_size: max number of the medias
+        grace_period: seconds since the last upload of the media
+        lock: lock the medias until the session is committed, so they
+            can't be attached to a tweet meanwhile, locked ones are skipped
+
+    Returns:
+        list[Row]: id, key and variants of the medias
+    """
+    attached = select(MediasTweets.media_id).where(MediasTweets.media_id == Medias.id)
+    expr = (
+        select(Medias.id, Medias.key, Medias.variants)
+        .where(
+            Medias.id > after_id,
+            Medias.expires_at.is_(None),
+            Medias.uploaded_at < func.now() - timedelta(seconds=grace_period),
+            ~exists(attached),
+        )
+        .order_by(Medias.id)
+        .limit(chunk_size)
+    )
+    if lock:
+        expr = expr.with_for_update(skip_locked=True)
+    request = await session.execute(expr)
+    return request.all()
+
+
+async def delete_orphaned_medias(
+    session: AsyncSession, s3_client: S3Client, medias: list[Row], stats: MediaGCStats,
+) -> None:
+    """Delete objects of the locked medias, then the medias.
+
+    A media is kept if any of its objects is not deleted,
+    it's collected again by the next run. An upload of the same content
+    waits for the row lock in MediasMethods.add() and stores the object
+    again after the commit.
+
+    Parameters:
+        session: AsyncSession holding the locks, committed by the caller
+        s3_client: S3Client
+        medias: rows of find_orphaned_medias()
+        stats: MediaGCStats of the run
+    """
+    keys: list[str] = get_object_keys(medias)
+    delete_result: ResponseData = await s3_client.delete_multiple(keys)
+    failed_keys: set[str] = set(delete_result.response.get("failed_keys", []))
+    deleted_ids: list[int] = [
+        media.id
+        for media in medias
+        if failed_keys.isdisjoint(get_object_keys([media]))
+    ]
+    if deleted_ids:
+        await session.execute(delete(Medias).where(Medias.id.in_(deleted_ids)))
+
+    stats.deleted_medias += len(deleted_ids)
+    stats.deleted_objects += len(keys) - len(failed_keys)
+    stats.failed_objects += len(failed_keys)
+    metrics.increment("media_gc.deleted_medias", len(deleted_ids))
+    metrics.increment("media_gc.failed_objects", len(failed_keys))
+
+
+async def collect_orphaned_medias(
+    s3_client: S3Client,
+    dry_run: bool = False,
+    chunk_size: int = MEDIA_GC_CHUNK_SIZE,
+    grace_period: float = MEDIA_GC_GRACE_PERIOD,
+    session_factory: async_sessionmaker = async_session,
+) -> MediaGCStats:
+    """Delete medias not attached to tweets for grace_period and their objects.
+
+    Every chunk is deleted in a transaction of its own.
+
+    Parameters:
+        s3_client: S3Client
+        dry_run: only count the medias
+        chunk_size: max number of the medias in a chunk
+        grace_period: seconds since the last upload of a media
+        session_factory: sessions to the primary
+
+    Returns:
+        MediaGCStats
+    """
+    stats = MediaGCStats()
+    after_id = 0
+    while True:  # noqa: WPS457
+        async with session_factory() as session:
+            medias: list[Row] = await find_orphaned_medias(
+                session, after_id, chunk_size, grace_period, lock=not dry_run,
+            )
+            if not medias:
+                return stats
+            stats.chunks += 1
+            stats.found_medias += len(medias)
+            after_id = medias[-1].id
+            if not dry_run:
+                await delete_orphaned_medias(session, s3_client, medias, stats)
+                await session.commit()
+
+
+async def run_media_gc(dry_run: bool = False) -> None:
+    """Collect orphaned medias and print the stats.
+
+    Parameters:
+        dry_run: only count the medias
+    """
+    s3_client = create_s3_client()
+    await s3_client.start()
+    stats: MediaGCStats = await collect_orphaned_medias(s3_client, dry_run=dry_run)
+    await s3_client.close()
+    print("{mode} {stats}".format(  # noqa: WPS421
+        mode="dry-run" if dry_run else "deleted", stats=stats.format(),
+    ))
+    s3_logger.info("Media GC: %s", stats.format())
+
+
+if __name__ == "__main__":
+    asyncio.run(run_media_gc(dry_run="--dry-run" in sys.argv))
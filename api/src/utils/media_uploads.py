@@ -0,0 +1,113 @@
+from typing import Optional
+from uuid import uuid4
+
+from botocore.exceptions import BotoCoreError, ClientError
+from sqlalchemy.ext.asyncio import AsyncSession
+from config import MEDIA_MAX_SIZE  # noqa
+from database_models.db_config import ResponseData  # noqa
+from database_models.methods.medias import MediasMethods  # noqa
+from utils.logger_config import s3_logger  # noqa
+from utils.media_variants import MediaVariantsPool  # noqa
+from utils.metrics import metrics  # noqa
+from utils.s3_config import S3Client, get_file_ext  # noqa
+from utils.s3_config import create_presigned_upload, get_object_size  # noqa
+
+
+async def create_upload_slot(
+    s3_client: S3Client, filename: str, async_session: AsyncSession,
+) -> ResponseData:
+    """Add a pending media and return the form uploading it to the s3 storage.
+
+    The bytes of the media don't pass through the API. The object is named
+    by a random name, not by its content, since the content is not known
+    to the API.
+
+    Parameters:
+        s3_client: S3Client
+        filename: name of the uploaded file
+        async_session: AsyncSession
+
+    Returns:
+        ResponseData: {result, media_id, upload_url, upload_fields}, status_code
+    """
+    key = "{name}.{file_ext}".format(name=uuid4().hex, file_ext=get_file_ext(filename))
+    async with s3_client.get_client() as client:
+        upload_form: dict = await create_presigned_upload(
+            client, s3_client.bucket_name, key,
+        )
+
+    add_result: ResponseData = await MediasMethods.add_pending(
+        key=key, async_session=async_session,
+    )
+    if add_result.response["result"]:
+        metrics.increment("media.upload_slots")
+        add_result.response.update(
+            upload_url=upload_form["url"], upload_fields=upload_form["fields"],
+        )
+    return add_result
+
+
+async def confirm_upload(
+    s3_client: S3Client,
+    media_id: int,
+    async_session: AsyncSession,
+    variants_pool: Optional[MediaVariantsPool] = None,
+) -> ResponseData:
+    """Confirm the pending media if its object is uploaded.
+
+    Parameters:
+        s3_client: S3Client
+        media_id: id of the pending media
+        async_session: AsyncSession
+        variants_pool: renders variants of the confirmed media
+
+    Returns:
+        ResponseData: {result, media_id}, status_code
+    """
+    pending_result: ResponseData = await MediasMethods.get_pending(
+        media_id=media_id, async_session=async_session,
+    )
+    if not pending_result.response["result"]:
+        return pending_result
+
+    try:
+        async with s3_client.get_client() as client:
+            size: Optional[int] = await get_object_size(
+                client, s3_client.bucket_name, pending_result.response["key"],
+            )
+    except (BotoCoreError, ClientError) as err:
+        s3_logger.exception(str(err))
+        return ResponseData(
+            response={
+                "result": False,
+                "error_type": "ClientError",
+                "error_message": str(err),
+            },
+            status_code=500,
+        )
+
+    if size is None:
+        return ResponseData(
+            response={
+                "result": False,
+                "error_type": "UploadIncomplete",
+                "error_message": "Media is not uploaded.",
+            },
+            status_code=409,
+        )
+    # the size is limited by the form, it's checked for storages ignoring it
+    if size > MEDIA_MAX_SIZE:
+        return ResponseData(
+            response={
+                "result": False,
+                "error_type": "PayloadTooLarge",
+                "error_message": "File is too large.",
+            },
+            status_code=413,
+        )
+    confirm_result: ResponseData = await MediasMethods.confirm(
+        media_id=media_id, async_session=async_session,
+    )
+    if confirm_result.response["result"] and variants_pool:
+        variants_pool.submit(media_id, pending_result.response["key"])
+    return confirm_result
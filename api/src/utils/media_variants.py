@@ -0,0 +1,271 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Optional
+from uuid import uuid4
+
+from botocore.exceptions import BotoCoreError, ClientError
+from fastapi import Request
+from PIL import Image, ImageOps, UnidentifiedImageError
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from config import MEDIA_VARIANT_FORMAT, MEDIA_VARIANT_QUEUE_SIZE  # noqa
+from config import MEDIA_VARIANT_WORKERS  # noqa
+from database_models.db_config import async_session  # noqa
+from database_models.methods.medias import set_media_variants  # noqa
+from database_models.tweets_orm_models import Medias  # noqa
+from utils.logger_config import s3_logger  # noqa
+from utils.metrics import metrics  # noqa
+from utils.s3_config import S3Client  # noqa
+
+# names of the variants and max size of their sides in pixels
+MEDIA_VARIANT_SIZES = (("small", 320), ("medium", 1080))
+
+
+def render_variants(
+    image_data: bytes, image_format: str = MEDIA_VARIANT_FORMAT,
+) -> dict[str, bytes]:
+    """Return resized variants of the image.
+
+    Run in a worker process of MediaVariantsPool. Images smaller
+    than a variant are converted, not enlarged.
+
+    Parameters:
+        image_data: content of the image
+        image_format: "webp" or "jpeg"
+
+    Returns:
+        dict: content of the variants by their names
+
+    Raises:
+        UnidentifiedImageError: the media is not an image
+    """
+    max_side: int = max(size for _, size in MEDIA_VARIANT_SIZES)
+    with Image.open(BytesIO(image_data)) as image:
+        # JPEG is decoded at the smallest scale still larger than the variants
+        image.draft("RGB", (max_side, max_side))
+        has_alpha: bool = image_format == "webp" and image.has_transparency_data
+        oriented = ImageOps.exif_transpose(image).convert("RGBA" if has_alpha else "RGB")
+
+    variants: dict[str, bytes] = {}
+    for name, size in MEDIA_VARIANT_SIZES:
+        variant = oriented.copy()
+        variant.thumbnail((size, size))
+        buffer = BytesIO()
+        variant.save(buffer, format=image_format, quality=80)
+        variants[name] = buffer.getvalue()
+    return variants
+
+
+async def get_media_variants(media_id: int) -> Optional[dict]:
+    """Return variants of the media.
+
+    Parameters:
+        media_id: int
+
+    Returns:
+        dict or None if they are not rendered yet
+    """
+    async with async_session() as session:
+        request = await session.execute(
+            select(Medias.variants).where(Medias.id == media_id),
+        )
+        return request.scalar_one_or_none()
+
+
+async def read_object(s3_client: S3Client, key: str) -> bytes:
+    """Return content of the object.
+
+    Parameters:
+        s3_client: S3Client
+        key: name of the object
+
+    Returns:
+        bytes
+    """
+    async with s3_client.get_client() as client:
+        res = await client.get_object(Bucket=s3_client.bucket_name, Key=key)
+        async with res["Body"] as body:
+            return await body.read()
+
+
+async def upload_variants(
+    s3_client: S3Client, key: str, rendered: dict[str, bytes],
+) -> dict[str, str]:
+    """Upload the variants next to the original object.
+
+    The variants are named by the original name, the name of the variant
+    and a random token, so objects of the variants rendered again
+    don't replace the queued for deletion ones.
+
+    Parameters:
+        s3_client: S3Client
+        key: name of the original object
+        rendered: content of the variants by their names
+
+    Returns:
+        dict: keys of the variants by their names
+    """
+    token: str = uuid4().hex[:12]
+    variant_keys: dict[str, str] = {
+        name: "{stem}_{name}_{token}.{file_ext}".format(
+            stem=key.rsplit(".", 1)[0],
+            name=name,
+            token=token,
+            file_ext=MEDIA_VARIANT_FORMAT,
+        )
+        for name in rendered
+    }
+    async with s3_client.get_client() as client:
+        await asyncio.gather(*(
+            client.put_object(
+                Bucket=s3_client.bucket_name,
+                Key=variant_keys[name],
+                Body=content,
+                ContentType="image/{file_ext}".format(file_ext=MEDIA_VARIANT_FORMAT),
+            )
+            for name, content in rendered.items()
+        ))
+    return variant_keys
+
+
+async def store_variants(media_id: int, variants: dict[str, str]) -> bool:
+    """Store keys of the variants of the media.
+
+    Parameters:
+        media_id: int
+        variants: keys of the variants by their names
+
+    Returns:
+        bool: False if the variants were not stored
+    """
+    async with async_session() as session:
+        stored: bool = await set_media_variants(session, media_id, variants)
+        await session.commit()
+    return stored
+
+
+class MediaVariantsPool:
+    """Renders resized variants of uploaded images in worker processes.
+
+    Images are resized by a ProcessPoolExecutor, so the event loop isn't
+    blocked by decoding and encoding. At most queue_size medias of the API
+    process wait for variants or are being rendered, the next ones are
+    skipped and keep only the original. Medias which are not images get
+    no variants.
+    """
+
+    def __init__(
+        self,
+        s3_client: S3Client,
+        workers: int = MEDIA_VARIANT_WORKERS,
+        queue_size: int = MEDIA_VARIANT_QUEUE_SIZE,
+    ) -> None:
+        """Init.
+
+        Parameters:
+            s3_client: S3Client
+            workers: number of the worker processes, 0 disables the pool
+            queue_size: max number of the medias waiting for variants
+        """
+        self.s3_client = s3_client
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def __aenter__(self) -> "MediaVariantsPool":
+        """Start the pool.
+
+        Returns:
+            MediaVariantsPool
+        """
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        """Stop the pool.
+
+        Parameters:
+            exc_info: exception raised in the block
+        """
+        await self.stop()
+
+    def start(self) -> None:
+        """Create the worker processes unless workers is 0."""
+        if self.workers > 0:
+            # the worker processes don't inherit the event loop and connections
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+
+    async def stop(self) -> None:
+        """Stop the pool, the medias being rendered get no variants."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def submit(self, media_id: int, key: str) -> Optional[asyncio.Task]:
+        """Render variants of the media in the background.
+
+        Parameters:
+            media_id: int
+            key: key of the original object
+
+        Returns:
+            asyncio.Task or None if the pool is stopped or full
+        """
+        if self._executor is None:
+            return None
+        if len(self._tasks) >= self.queue_size:
+            metrics.increment("media.variants.skipped")
+            return None
+        task = asyncio.create_task(self._render(media_id, key))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _render(self, media_id: int, key: str) -> None:
+        if await get_media_variants(media_id) is not None:
+            return
+        try:
+            image_data: bytes = await read_object(self.s3_client, key)
+            with metrics.timer("media.variants.render"):
+                rendered: dict[str, bytes] = await asyncio.get_running_loop(
+                ).run_in_executor(self._executor, render_variants, image_data)
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            # not an image, the media keeps only the original
+            rendered = {}
+        except (BotoCoreError, ClientError, OSError) as err:
+            s3_logger.warning("Failed to render variants of %s: %s", key, err)
+            return
+        except BrokenProcessPool as err:
+            s3_logger.error("Worker process of MediaVariantsPool died: %s", err)
+            return
+        try:
+            variants: dict[str, str] = await upload_variants(
+                self.s3_client, key, rendered,
+            )
+            await store_variants(media_id, variants)
+        except (BotoCoreError, ClientError, SQLAlchemyError) as err:
+            s3_logger.warning("Failed to store variants of %s: %s", key, err)
+        else:
+            metrics.increment("media.variants.rendered")
+
+
+def get_media_variants_pool(request: Request) -> Optional[MediaVariantsPool]:
+    """Return MediaVariantsPool started in the app lifespan.
+
+    Parameters:
+        request: FastAPI.request
+
+    Returns:
+        MediaVariantsPool or None if the lifespan has not been run
+    """
+    return getattr(request.app.state, "media_variants", None)
@@ -0,0 +1,109 @@
+from collections import defaultdict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from time import monotonic
+from typing import Callable, Dict
+
+
+class TimerStats:
+    """Aggregated durations of one timer."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.count = 0
+        self.total: float = 0
+        self.max: float = 0
+
+    def observe(self, seconds: float) -> None:
+        """Add duration to the stats.
+
+        Parameters:
+            seconds: float
+        """
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict:
+        """Return stats as dict.
+
+        Returns:
+            dict: {count, sum, avg, max} in seconds
+        """
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "avg": self.total / self.count if self.count else 0,
+            "max": self.max,
+        }
+
+
+class Metrics:
+    """In-process registry of counters, gauges and timers.
+
+    Values are per worker and are exported by GET /api/metrics.
+    """
+
+    def __init__(self) -> None:
+        """Init."""
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, Callable[[], float]] = {}
+        self._timers: Dict[str, TimerStats] = defaultdict(TimerStats)
+
+    def increment(self, name: str, amount: float = 1) -> None:
+        """Increase counter.
+
+        Parameters:
+            name: counter name
+            amount: float
+        """
+        self._counters[name] += amount
+
+    def register_gauge(self, name: str, getter: Callable[[], float]) -> None:
+        """Register gauge which value is read at export time.
+
+        Parameters:
+            name: gauge name
+            getter: function returning the current value
+        """
+        self._gauges[name] = getter
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Add duration to the timer.
+
+        Parameters:
+            name: timer name
+            seconds: float
+        """
+        self._timers[name].observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Add duration of the block to the timer.
+
+        Parameters:
+            name: timer name
+
+        Yields:
+            None
+        """
+        started_at = monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, monotonic() - started_at)
+
+    def snapshot(self) -> dict:
+        """Return current values of all metrics.
+
+        Returns:
+            dict: {counters: dict, gauges: dict, timers: dict}
+        """
+        return {
+            "counters": dict(self._counters),
+            "gauges": {name: getter() for name, getter in self._gauges.items()},
+            "timers": {name: timer.as_dict() for name, timer in self._timers.items()},
+        }
+
+
+metrics = Metrics()
@@ -0,0 +1,209 @@
+from typing import AsyncGenerator, AsyncIterator, Optional
+
+from fastapi import HTTPException, Request
+from python_multipart.multipart import MultipartParser, parse_options_header
+from config import MEDIA_MAX_SIZE  # noqa
+
+# max size of the boundaries and part headers of a form with one file
+FORM_OVERHEAD_SIZE = 16 * 1024
+
+
+def get_upload_error(status_code: int, error_type: str, message: str) -> HTTPException:
+    """Return HTTPException for a rejected upload.
+
+    Parameters:
+        status_code: int
+        error_type: str
+        message: str
+
+    Returns:
+        HTTPException
+    """
+    return HTTPException(
+        status_code=status_code,
+        detail={"result": False, "error_type": error_type, "error_message": message},
+    )
+
+
+def parse_content_length(content_length: Optional[str]) -> Optional[int]:
+    """Return size of the body declared by the Content-Length header.
+
+    Parameters:
+        content_length: value of the header
+
+    Returns:
+        int or None if the header is missing
+
+    Raises:
+        HTTPException: the value is not a non-negative integer
+    """
+    if not content_length:
+        return None
+    try:
+        size = int(content_length)
+    except ValueError:
+        size = -1
+    if size < 0:
+        raise get_upload_error(400, "InvalidFormData", "Invalid Content-Length.")
+    return size
+
+
+class PartHeaders:
+    """Headers of a form part collected by MultipartParser callbacks."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.headers: dict[bytes, bytes] = {}
+        self._field = bytearray()
+        self._value = bytearray()
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        """Collect name of the header.
+
+        Parameters:
+            data: parsed chunk
+            start: start of the name in the chunk
+            end: end of the name in the chunk
+        """
+        self._field.extend(data[start:end])
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        """Collect value of the header.
+
+        Parameters:
+            data: parsed chunk
+            start: start of the value in the chunk
+            end: end of the value in the chunk
+        """
+        self._value.extend(data[start:end])
+
+    def on_header_end(self) -> None:
+        """Store the header."""
+        self.headers[bytes(self._field).lower()] = bytes(self._value)
+        self._field.clear()
+        self._value.clear()
+
+    def pop_disposition(self) -> dict[bytes, bytes]:
+        """Return options of Content-Disposition and clear the headers.
+
+        Returns:
+            dict: name and filename of the part
+        """
+        _, options = parse_options_header(self.headers.pop(b"content-disposition", None))
+        self.headers.clear()
+        return options
+
+
+class MultipartFileStream:
+    """File field of a multipart/form-data request read in chunks.
+
+    The body is parsed while it's received, the file isn't spooled
+    to memory or disk. Other fields of the form are skipped, the body
+    is read only up to the end of the file.
+    """
+
+    def __init__(
+        self, request: Request, field_name: str = "file", max_size: int = MEDIA_MAX_SIZE,
+    ) -> None:
+        """Init.
+
+        Parameters:
+            request: FastAPI Request object
+            field_name: name of the file field
+            max_size: max size of the file in bytes
+
+        Raises:
+            HTTPException: the request is not a form, it's malformed or too large
+        """
+        content_length: Optional[int] = parse_content_length(
+            request.headers.get("content-length"),
+        )
+        if content_length and content_length > max_size + FORM_OVERHEAD_SIZE:
+            raise get_upload_error(413, "PayloadTooLarge", "File is too large.")
+
+        content_type, params = parse_options_header(request.headers.get("content-type"))
+        if content_type != b"multipart/form-data" or b"boundary" not in params:
+            raise get_upload_error(
+                400, "InvalidFormData", "Expected multipart/form-data.",
+            )
+
+        self.field_name = field_name
+        self.max_size = max_size
+        self.filename: Optional[str] = None
+        self.size = 0
+        self._body: AsyncIterator[bytes] = request.stream()
+        self._part_headers = PartHeaders()
+        self._parser = MultipartParser(
+            params[b"boundary"],
+            callbacks={
+                "on_header_field": self._part_headers.on_header_field,
+                "on_header_value": self._part_headers.on_header_value,
+                "on_header_end": self._part_headers.on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+            },
+        )
+        self._pending: list[bytes] = []
+        self._reading = False
+        self._finished = False
+
+    async def open(self) -> str:
+        """Read the body up to the start of the file.
+
+        Returns:
+            str: name of the file
+
+        Raises:
+            HTTPException: the form has no file field
+        """
+        while self.filename is None:
+            await self._feed()
+        return self.filename
+
+    async def chunks(self) -> AsyncGenerator[bytes, None]:
+        """Yield chunks of the file as they are received.
+
+        Yields:
+            bytes
+
+        Raises:
+            HTTPException: the file is larger than max_size
+        """
+        await self.open()
+        while self._pending or not self._finished:
+            if not self._pending:
+                await self._feed()
+            pending: list[bytes] = self._pending
+            self._pending = []
+            for chunk in pending:
+                yield chunk
+
+    async def _feed(self) -> None:
+        chunk: bytes = await anext(self._body, b"")
+        if not chunk:
+            raise get_upload_error(
+                400, "InvalidFormData", "File field is missing or incomplete.",
+            )
+        self._parser.write(chunk)
+
+    def _on_headers_finished(self) -> None:
+        options: dict[bytes, bytes] = self._part_headers.pop_disposition()
+        is_file: bool = options.get(b"name") == self.field_name.encode()
+        if is_file and b"filename" in options and self.filename is None:
+            # the filename only gives the extension, invalid bytes are replaced
+            self.filename = options[b"filename"].decode(errors="replace")
+            self._reading = True
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._reading:
+            return
+        self.size += end - start
+        if self.size > self.max_size:
+            raise get_upload_error(413, "PayloadTooLarge", "File is too large.")
+        self._pending.append(data[start:end])
+
+    def _on_part_end(self) -> None:
+        if self._reading:
+            self._reading = False
+            self._finished = True
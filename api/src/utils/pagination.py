@@ -0,0 +1,46 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+
+# sort keys are INTEGER columns, a greater key can't be bound to the query
+MAX_CURSOR_KEY = 2 ** 31 - 1
+
+
+def encode_cursor(*position: int) -> str:
+    """Return opaque cursor pointing after the position in a keyset order.
+
+    Parameters:
+        position: sort keys of the last row, e.g. (like_count, tweet_id)
+
+    Returns:
+        str: url safe cursor
+    """
+    position_str = ":".join(str(key) for key in position)
+    return urlsafe_b64encode(position_str.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int = 2) -> tuple[int, ...]:
+    """Return position encoded by encode_cursor.
+
+    Parameters:
+        cursor: str
+        size: number of sort keys in the position
+
+    Returns:
+        position, e.g. (like_count, tweet_id)
+
+    Raises:
+        ValueError: the cursor is malformed or a key is out of the column range
+    """
+    padding = "=" * (-len(cursor) % 4)
+    try:
+        position_str = urlsafe_b64decode(cursor + padding).decode()
+    except (DecodeError, UnicodeDecodeError) as err:
+        raise ValueError("Malformed cursor") from err
+
+    position = position_str.split(":")
+    if len(position) != size or not all(key.isdigit() for key in position):
+        raise ValueError("Malformed cursor")
+    keys = tuple(int(key) for key in position)
+    if max(keys) > MAX_CURSOR_KEY:
+        raise ValueError("Cursor key out of range")
+    return keys
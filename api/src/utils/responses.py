@@ -0,0 +1,40 @@
+from typing import Any
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from database_models.db_config import ResponseData  # noqa
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response serialized in one pass by orjson.
+
+    Dicts, lists, str, int, float, bool, None, datetime and UUID are
+    serialized natively, other objects (pydantic models, sets, etc.)
+    are passed to jsonable_encoder first.
+    """
+
+    def render(self, content: Any) -> bytes:
+        """Return response body.
+
+        Parameters:
+            content: payload of the response
+
+        Returns:
+            bytes
+        """
+        return orjson.dumps(
+            content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS,
+        )
+
+
+def json_response(data: ResponseData) -> FastJSONResponse:
+    """Return JSON response with the result of an ORM method.
+
+    Parameters:
+        data: ResponseData
+
+    Returns:
+        FastJSONResponse
+    """
+    return FastJSONResponse(content=data.response, status_code=data.status_code)
@@ -1,20 +1,73 @@
-import random
-import string
-from contextlib import asynccontextmanager
-from hashlib import md5
-from tempfile import SpooledTemporaryFile
-from typing import AsyncGenerator
-
+import asyncio
+import re
+from contextlib import AsyncExitStack, asynccontextmanager
+from hashlib import sha256
+from typing import AsyncGenerator, AsyncIterable, Awaitable, Callable, Optional
+from uuid import uuid4
+
+from aiobotocore.config import AioConfig
 from aiobotocore.session import get_session
-from botocore.exceptions import ClientError
+from botocore.exceptions import BotoCoreError, ClientError
+from fastapi import Request
 from types_aiobotocore_s3 import Client  # noqa
 from config import S3_ACCESS_KEY, S3_BUCKET_NANE, S3_SECRET_KEY, S3_URL  # noqa
+from config import S3_CONNECT_TIMEOUT, S3_DELETE_CONCURRENCY, S3_KEEPALIVE_TIMEOUT  # noqa
+from config import S3_MAX_POOL_CONNECTIONS, S3_READ_TIMEOUT  # noqa
+from config import S3_UPLOAD_MAX_IN_FLIGHT, S3_UPLOAD_PART_SIZE  # noqa
+from config import MEDIA_MAX_SIZE, MEDIA_PUBLIC_URL, MEDIA_UPLOAD_URL_TTL  # noqa
+from config import S3_BACKEND, S3_LOCAL_ERROR_RATE, S3_LOCAL_LATENCY  # noqa
 from database_models.db_config import ResponseData  # noqa
+from utils.local_s3 import LocalClient  # noqa
 from utils.logger_config import s3_logger  # noqa
+from utils.metrics import metrics  # noqa
+
+# max number of keys in one DeleteObjects request
+S3_DELETE_BATCH_SIZE = 1000
+
+# extension of the objects, the key must fit medias.key VARCHAR(150)
+FILE_EXT_PATTERN = re.compile("[a-z0-9]{1,10}")
+DEFAULT_FILE_EXT = "bin"
+
+# stores the media of the uploaded object by its key
+MediaRegister = Callable[[str], Awaitable[ResponseData]]
+
+
+async def register_nothing(key: str) -> ResponseData:
+    """Register no media of the uploaded object.
+
+    Parameters:
+        key: name of the object
+
+    Returns:
+        ResponseData: {result: True}, 201
+    """
+    return ResponseData(response={"result": True}, status_code=201)
+
+
+def get_file_ext(filename: str) -> str:
+    """Return extension of the object named after the uploaded file.
+
+    Parameters:
+        filename: name of the uploaded file
+
+    Returns:
+        str: lowercase text after the last dot, DEFAULT_FILE_EXT if it's
+            missing, too long or not alphanumeric
+    """
+    _, dot, file_ext = filename.rpartition(".")
+    file_ext = file_ext.lower()
+    if dot and FILE_EXT_PATTERN.fullmatch(file_ext):
+        return file_ext
+    return DEFAULT_FILE_EXT
 
 
 class S3Client:
-    """Class for work with s3 storage."""
+    """Class for work with s3 storage.
+
+    After start() all the requests share one aiobotocore client and its
+    connection pool, until close(). Without start() every request
+    creates a client of its own.
+    """
 
     def __init__(
         self,
@@ -35,62 +88,86 @@ class S3Client:
             "aws_access_key_id": access_key,
             "aws_secret_access_key": secret_key,
             "endpoint_url": endpoint_url,
+            "config": AioConfig(
+                max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                connect_timeout=S3_CONNECT_TIMEOUT,
+                read_timeout=S3_READ_TIMEOUT,
+                connector_args={"keepalive_timeout": S3_KEEPALIVE_TIMEOUT},
+            ),
         }
         self.bucket_name = bucket_name
         self.session = get_session()
         self.endpoint_url = endpoint_url
+        self._shared_client: Optional[Client] = None
+        self._exit_stack = AsyncExitStack()
+
+    async def start(self) -> None:
+        """Create the shared client."""
+        if self._shared_client is None:
+            self._shared_client = await self._exit_stack.enter_async_context(
+                self.session.create_client("s3", **self.config),
+            )
+
+    async def close(self) -> None:
+        """Close the shared client and its connections."""
+        self._shared_client = None
+        await self._exit_stack.aclose()
 
     @asynccontextmanager
     async def get_client(self) -> AsyncGenerator[Client, None]:
         """Async context manager yields s3 client.
 
         Yields:
-            Client
+            Client: the shared client if it's started
         """
-        async with self.session.create_client("s3", **self.config) as client:
-            yield client
+        if self._shared_client is None:
+            async with self.session.create_client("s3", **self.config) as client:
+                yield client
+        else:
+            yield self._shared_client
 
     async def upload(
-        self, file_obj: SpooledTemporaryFile, filename: str,
+        self,
+        chunks: AsyncIterable[bytes],
+        filename: str,
+        register: MediaRegister = register_nothing,
     ) -> ResponseData:
         """Async method for uploading media to s3 storage.
 
+        The media is named by sha256 of its content, a media stored before
+        isn't uploaded again. Errors raised by the chunks are re-raised
+        after the upload is aborted.
+
         Parameters:
-            file_obj: SpooledTemporaryFile
+            chunks: content of the media
             filename: str
+            register: stores the media before the object is checked,
+                the upload is aborted if it fails
 
         Returns:
-            ResponseData: {result: str, link: str}, status_code
+            ResponseData: result of register with the key, status_code
         """
-        hashed_filename = "{hash}.{file_ext}".format(
-            hash=S3utils.gen_random_hash(filename),
-            file_ext=filename.split(".")[-1],
-        )
         try:
             async with self.get_client() as client:
-                res = await client.put_object(
-                    Bucket=self.bucket_name,
-                    Key=hashed_filename,
-                    Body=file_obj,
+                upload = MultipartUpload(
+                    client,
+                    self.bucket_name,
+                    ".{file_ext}".format(file_ext=get_file_ext(filename)),
+                    register=register,
                 )
-                if res["ResponseMetadata"]["HTTPStatusCode"] != 200:
-                    raise ClientError(operation_name="put", error_response=res)
+                with metrics.timer("s3.upload"):
+                    hashed_filename: str = await upload.upload(chunks)
 
-            link: str = S3utils.generate_link(
-                url=self.endpoint_url,
-                bucket_name=self.bucket_name,
-                filename=hashed_filename,
-            )
             result, code = {
-                "result": True,
-                "link": link,
-            }, 201
-        except ClientError as err:
+                **upload.registered.response,
+                "key": hashed_filename,
+            }, upload.registered.status_code
+        except (BotoCoreError, ClientError) as err:
             s3_logger.exception(str(err))
             result, code = {
                 "result": False,
                 "error_type": "ClientError",
-                "error_message": err,
+                "error_message": str(err),
             }, 500
 
         return ResponseData(response=result, status_code=code)
@@ -109,11 +186,11 @@ class S3Client:
                 res = await client.delete_object(
                     Bucket=self.bucket_name, Key=object_name,
                 )
-                if res["ResponseMetadata"]["HTTPStatusCode"] != 200:
+                if res["ResponseMetadata"]["HTTPStatusCode"] not in {200, 204}:
                     raise ClientError(operation_name="delete", error_response=res)
             result, code = {"result": True}, 200
         except ClientError as err:
-            s3_logger.exception(str(str))
+            s3_logger.exception(str(err))
             result, code = {
                 "result": False,
                 "error_type": "ClientError",
@@ -121,92 +198,384 @@ class S3Client:
             }, 500
         return ResponseData(response=result, status_code=code)
 
-    async def delete_multiple(self, media_names: list) -> ResponseData:
+    async def delete_multiple(
+        self, media_names: list, batch_size: int = S3_DELETE_BATCH_SIZE,
+    ) -> ResponseData:
         """Async method for deleting multiple media from s3 storage.
 
+        Media are deleted by DeleteObjects requests of up to batch_size keys,
+        at most S3_DELETE_CONCURRENCY requests at once.
+
         Parameters:
             media_names: list of media names
+            batch_size: max number of keys in one request
 
         Returns:
-            ResponseData: {result: str}, status_code
+            ResponseData: {result: bool, failed_keys: list}, status_code
         """
-        try:
-            async with self.get_client() as client:
-                for name in media_names:
-                    res = await client.delete_object(Bucket=self.bucket_name, Key=name)
-                    if res["ResponseMetadata"]["HTTPStatusCode"] != 204:
-                        raise ClientError(operation_name="delete", error_response=res)
-            result, code = {"result": True}, 200
-        except ClientError as err:
-            s3_logger.exception(str(str))
+        semaphore = asyncio.Semaphore(S3_DELETE_CONCURRENCY)
+        async with self.get_client() as client:
+            failed_batches: list = await asyncio.gather(*(
+                delete_objects(
+                    client,
+                    self.bucket_name,
+                    media_names[start:start + batch_size],
+                    semaphore,
+                )
+                for start in range(0, len(media_names), batch_size)
+            ))
+
+        failed_keys: list[str] = [key for batch in failed_batches for key in batch]
+        metrics.increment("s3.delete.keys", len(media_names))
+        if failed_keys:
+            metrics.increment("s3.delete.failed_keys", len(failed_keys))
             result, code = {
                 "result": False,
                 "error_type": "ClientError",
-                "error_message": err,
+                "error_message": "Some media were not deleted.",
+                "failed_keys": failed_keys,
             }, 500
+        else:
+            result, code = {"result": True, "failed_keys": []}, 200
         return ResponseData(response=result, status_code=code)
 
 
-class S3utils:
-    """Additional methods for S3Client class."""
+async def delete_objects(
+    client: Client, bucket_name: str, keys: list[str], semaphore: asyncio.Semaphore,
+) -> list[str]:
+    """Delete the objects by one DeleteObjects request.
+
+    Parameters:
+        client: s3 client
+        bucket_name: str
+        keys: names of the objects
+        semaphore: limits the number of concurrent requests
+
+    Returns:
+        list of the keys which were not deleted
+    """
+    async with semaphore:
+        try:
+            res = await client.delete_objects(
+                Bucket=bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+            )
+        except (BotoCoreError, ClientError) as err:
+            s3_logger.exception("Failed to delete %s: %s", keys, err)
+            return keys
+
+    failed_keys: list[str] = []
+    for failure in res.get("Errors", []):
+        s3_logger.error(
+            "Failed to delete %s: %s %s",
+            failure["Key"],
+            failure["Code"],
+            failure["Message"],
+        )
+        failed_keys.append(failure["Key"])
+    return failed_keys
+
+
+async def object_exists(client: Client, bucket_name: str, key: str) -> bool:
+    """Return True if the object is stored.
+
+    Parameters:
+        client: s3 client
+        bucket_name: str
+        key: name of the object
+
+    Returns:
+        bool
+    """
+    return await get_object_size(client, bucket_name, key) is not None
+
+
+async def get_object_size(client: Client, bucket_name: str, key: str) -> Optional[int]:
+    """Return size of the object by a HEAD request.
+
+    Parameters:
+        client: s3 client
+        bucket_name: str
+        key: name of the object
+
+    Returns:
+        int or None if the object is not stored
+
+    Raises:
+        ClientError: the storage failed to answer
+    """
+    try:
+        res = await client.head_object(Bucket=bucket_name, Key=key)
+    except ClientError as err:
+        if err.response["Error"]["Code"] in {"404", "NoSuchKey"}:
+            return None
+        raise
+    return res["ContentLength"]
+
+
+async def create_presigned_upload(
+    client: Client,
+    bucket_name: str,
+    key: str,
+    max_size: int = MEDIA_MAX_SIZE,
+    expires_in: int = MEDIA_UPLOAD_URL_TTL,
+) -> dict:
+    """Return presigned POST form uploading the object directly to the storage.
+
+    The form is signed locally, no request is sent to the storage.
+
+    Parameters:
+        client: s3 client
+        bucket_name: str
+        key: name of the object
+        max_size: max size of the object in bytes
+        expires_in: seconds the form is valid
+
+    Returns:
+        dict: {url: str, fields: dict} of the form, the file field goes last
+    """
+    return await client.generate_presigned_post(
+        Bucket=bucket_name,
+        Key=key,
+        Conditions=[["content-length-range", 1, max_size]],
+        ExpiresIn=expires_in,
+    )
 
-    @classmethod
-    def generate_link(cls, url: str, bucket_name: str, filename: str) -> str:
-        """Generate url to file in s3 storage.
+
+class MultipartUpload:
+    """Object uploaded from a stream of chunks and named by its content.
+
+    An object not bigger than part_size is uploaded by one PutObject
+    request, a bigger one by a multipart upload. Parts are uploaded
+    concurrently, the stream isn't read while S3_UPLOAD_MAX_IN_FLIGHT bytes
+    are being sent, so the upload keeps about part_size + S3_UPLOAD_MAX_IN_FLIGHT
+    bytes in memory at most.
+
+    The name is sha256 of the content, known only at the end of the stream.
+    Parts are uploaded under a temporary name and copied when they are
+    completed. If the object is stored already, the last request
+    is skipped (PutObject) or the parts are discarded (multipart).
+    The media referencing the object is stored by register before the check,
+    so MediaCleanupWorker and media_gc.py keep the object from then on.
+    The multipart upload is aborted on any error or if register fails.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        bucket_name: str,
+        suffix: str = "",
+        part_size: int = S3_UPLOAD_PART_SIZE,
+        register: MediaRegister = register_nothing,
+    ) -> None:
+        """Init.
 
         Parameters:
-            url: str
+            client: s3 client
             bucket_name: str
-            filename: str
+            suffix: extension added to the name of the object
+            part_size: size of the parts except the last one, 5 MiB at least
+            register: stores the media of the object by its name
+        """
+        self.client = client
+        self.bucket_name = bucket_name
+        self.suffix = suffix
+        self.part_size = part_size
+        self._register = register
+        self.registered = ResponseData(response={"result": True}, status_code=201)
+        self.size = 0
+        self._hash = sha256()
+        self._upload_key = "uploads/{name}{suffix}".format(
+            name=uuid4().hex, suffix=suffix,
+        )
+        self._upload_id: Optional[str] = None
+        self._tasks: list[asyncio.Task] = []
+        self._slots = asyncio.Semaphore(max(S3_UPLOAD_MAX_IN_FLIGHT // part_size, 1))
+
+    async def upload(self, chunks: AsyncIterable[bytes]) -> str:
+        """Upload the object.
+
+        Parameters:
+            chunks: content of the object
 
         Returns:
-            full url path to the file
+            str: name of the object
         """
-        return "{url}/{b_name}/{f_name}".format(
-            url=url,
-            b_name=bucket_name,
-            f_name=filename,
+        buffer = bytearray()
+        try:
+            async for chunk in chunks:
+                buffer.extend(chunk)
+                self._hash.update(chunk)
+                self.size += len(chunk)
+                # a part is sent only when more data follows it,
+                # the rest of the buffer is the last part
+                while len(buffer) > self.part_size:
+                    await self._start_part(bytes(buffer[:self.part_size]))
+                    del buffer[:self.part_size]  # noqa: WPS420
+            key = "{name}{suffix}".format(name=self._hash.hexdigest(), suffix=self.suffix)
+            self.registered = await self._register(key)
+            if self.registered.response["result"]:
+                await self._finish(key, bytes(buffer))
+            else:
+                await self._abort()
+            return key
+        except Exception:
+            await self._abort()
+            raise
+
+    async def _start_part(self, body: bytes) -> None:
+        if self._upload_id is None:
+            res = await self.client.create_multipart_upload(
+                Bucket=self.bucket_name, Key=self._upload_key,
+            )
+            self._upload_id = res["UploadId"]
+        await self._slots.acquire()
+        task = asyncio.create_task(self._put_part(len(self._tasks) + 1, body))
+        task.add_done_callback(lambda _: self._slots.release())
+        self._tasks.append(task)
+
+    async def _put_part(self, part_number: int, body: bytes) -> dict:
+        res = await self.client.upload_part(
+            Bucket=self.bucket_name,
+            Key=self._upload_key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=body,
         )
+        return {"PartNumber": part_number, "ETag": res["ETag"]}
+
+    async def _finish(self, key: str, body: bytes) -> None:
+        if await object_exists(self.client, self.bucket_name, key):
+            metrics.increment("s3.upload.deduplicated")
+            await self._abort()
+        elif self._upload_id is None:
+            await self.client.put_object(Bucket=self.bucket_name, Key=key, Body=body)
+        else:
+            await self._start_part(body)
+            await self._complete(key)
+
+    async def _complete(self, key: str) -> None:
+        parts: list[dict] = await asyncio.gather(*self._tasks)
+        await self.client.complete_multipart_upload(
+            Bucket=self.bucket_name,
+            Key=self._upload_key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+        self._upload_id = None
+        await self.client.copy_object(
+            Bucket=self.bucket_name,
+            Key=key,
+            CopySource={"Bucket": self.bucket_name, "Key": self._upload_key},
+        )
+        await self.client.delete_object(Bucket=self.bucket_name, Key=self._upload_key)
+
+    async def _abort(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._upload_id is None:
+            return
+        try:
+            await self.client.abort_multipart_upload(
+                Bucket=self.bucket_name, Key=self._upload_key, UploadId=self._upload_id,
+            )
+        except ClientError as err:
+            s3_logger.exception("Failed to abort upload of %s: %s", self._upload_key, err)
+        self._upload_id = None
 
-    @classmethod
-    def get_name_from_link(cls, link: str) -> str:
-        """Get filename from link.
+
+class LocalS3Client(S3Client):
+    """S3Client keeping objects in the memory of the process.
+
+    Uploads and deletes run the code of S3Client against LocalClient,
+    so benchmarks of /api/medias and of tweet deletion don't need
+    the storage. Selected by S3_BACKEND "memory" or by overriding
+    get_async_s3_client. Objects are lost when the client is collected.
+    """
+
+    def __init__(
+        self,
+        bucket_name: str,
+        latency: float = S3_LOCAL_LATENCY,
+        error_rate: float = S3_LOCAL_ERROR_RATE,
+        seed: int = 0,
+    ) -> None:
+        """Init.
 
         Parameters:
-            link: link
+            bucket_name: str
+            latency: seconds added to every request
+            error_rate: share of the requests failing with SlowDown
+            seed: seed of the injected errors
+        """
+        # the credentials are never sent, the requests don't leave the process
+        super().__init__(
+            access_key="local",
+            secret_key="local",
+            endpoint_url=S3_URL,
+            bucket_name=bucket_name,
+        )
+        self.storage = LocalClient(S3_URL, latency, error_rate, seed)
 
-        Returns:
-            filename (str): filename from the link
+    async def start(self) -> None:
+        """Nothing to connect to."""
+
+    async def close(self) -> None:
+        """Nothing to close, the objects are kept."""
+
+    @asynccontextmanager
+    async def get_client(self) -> AsyncGenerator[LocalClient, None]:
+        """Async context manager yields the local client.
+
+        Yields:
+            LocalClient
         """
-        return link.split("/")[-1]
+        yield self.storage
+
+
+class S3utils:
+    """Additional methods for S3Client class."""
 
     @classmethod
-    def gen_random_hash(cls, filename: str) -> str:
-        """Generate random hash from filename.
+    def get_url(cls, key: str, base_url: str = MEDIA_PUBLIC_URL) -> str:
+        """Return public URL of the object.
 
         Parameters:
-            filename: str
+            key: key of the object
+            base_url: CDN, caching proxy or the bucket
 
         Returns:
-            random hash based on filename and random str
+            str
         """
-        characters: str = string.ascii_lowercase + string.digits
-        random_str: str = ''.join(random.choice(characters) for _ in range(16))  # noqa
-        filename_with_salt: str = filename + random_str
+        return "{base_url}/{key}".format(base_url=base_url, key=key)
 
-        return md5(filename_with_salt.encode()).hexdigest()  # noqa
 
+def create_s3_client() -> S3Client:
+    """Return S3Client for the configured storage.
 
-async def get_async_s3_client() -> AsyncGenerator[Client, None]:
-    """Async generator yields main async s3 client for api.
-
-    Yields:
-        Client
+    Returns:
+        S3Client, or LocalS3Client with S3_BACKEND "memory"
     """
-    s3_client = S3Client(
+    if S3_BACKEND == "memory":
+        return LocalS3Client(bucket_name=S3_BUCKET_NANE)
+    return S3Client(
         access_key=S3_ACCESS_KEY,
         secret_key=S3_SECRET_KEY,
         endpoint_url=S3_URL,
         bucket_name=S3_BUCKET_NANE,
     )
-    yield s3_client
+
+
+async def get_async_s3_client(request: Request) -> AsyncGenerator[Client, None]:
+    """Async generator yields main async s3 client for api.
+
+    Parameters:
+        request: FastAPI.request
+
+    Yields:
+        Client: started in the app lifespan, or a new one
+            if the lifespan has not been run
+    """
+    s3_client: Optional[S3Client] = getattr(request.app.state, "s3_client", None)
+    yield s3_client or create_s3_client()
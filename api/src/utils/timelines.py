@@ -0,0 +1,568 @@
+from typing import Iterable, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import AUTHOR_TWEETS_SIZE, FEED_CELEBRITY_THRESHOLD, FEED_MODE  # noqa
+from config import TIMELINE_SIZE, TIMELINE_TTL  # noqa
+from database_models.db_config import ResponseData  # noqa
+from database_models.methods.tweets import TweetsMethods  # noqa
+from database_models.methods.users import FollowersMethods  # noqa
+from utils.logger_config import api_logger  # noqa
+from utils.metrics import metrics  # noqa
+
+# Tweets of authors with at least this number of followers
+# aren't pushed, None if every author is pushed.
+CELEBRITY_THRESHOLD: Optional[int] = (
+    FEED_CELEBRITY_THRESHOLD if FEED_MODE == "hybrid" else None
+)
+
+# Member marking a built timeline. It's scored +inf as the markers
+# of followed celebrities, so trimming never removes them.
+SENTINEL = "0"
+CELEBRITY_PREFIX = "c:"
+
+# KEYS: timelines, ARGV: size, members.
+# Tweet ids are scored by themselves, other members by +inf.
+# Timelines that aren't built are skipped, they are built from the db on read.
+ADD_SCRIPT = """
+local size = tonumber(ARGV[1])
+for _, key in ipairs(KEYS) do
+    if redis.call('EXISTS', key) == 1 then
+        for i = 2, #ARGV do
+            redis.call('ZADD', key, tonumber(ARGV[i]) or '+inf', ARGV[i])
+        end
+        local count = redis.call('ZCOUNT', key, '-inf', '(+inf')
+        if count > size then
+            redis.call('ZREMRANGEBYRANK', key, 0, count - size - 1)
+        end
+    end
+end
+return 0
+"""
+
+if CELEBRITY_THRESHOLD is not None:
+    metrics.register_gauge("feed.celebrity_threshold", lambda: CELEBRITY_THRESHOLD)
+
+
+def timelines_enabled(redis: Optional[Redis]) -> bool:
+    """Return True if the feed is read from home timelines.
+
+    Parameters:
+        redis: Redis connection or None
+
+    Returns:
+        bool
+    """
+    return FEED_MODE in {"push", "hybrid"} and redis is not None
+
+
+def get_celebrity_member(author_id: int) -> str:
+    """Return timeline member marking the followed celebrity.
+
+    Parameters:
+        author_id: int
+
+    Returns:
+        str
+    """
+    return "{prefix}{author_id}".format(prefix=CELEBRITY_PREFIX, author_id=author_id)
+
+
+class Timeline:
+    """Home timeline read from TimelineStore."""
+
+    def __init__(self, tweet_ids: list[int], celebrity_ids: list[int]):
+        """Init.
+
+        Parameters:
+            tweet_ids: pushed tweet ids, the latest first
+            celebrity_ids: followed authors whose tweets aren't pushed
+        """
+        self.tweet_ids = tweet_ids
+        self.celebrity_ids = celebrity_ids
+
+
+def parse_timeline(members: list) -> Timeline:
+    """Return Timeline from members of the sorted set.
+
+    Parameters:
+        members: list of (member, score) from ZREVRANGE WITHSCORES
+
+    Returns:
+        Timeline
+    """
+    timeline = Timeline(tweet_ids=[], celebrity_ids=[])
+    for member, score in members:
+        if score != float("inf"):
+            timeline.tweet_ids.append(int(member))
+        elif member.startswith(CELEBRITY_PREFIX.encode()):
+            timeline.celebrity_ids.append(int(member[len(CELEBRITY_PREFIX):]))
+    return timeline
+
+
+class TimelineStore:
+    """Home timelines of users kept in Redis sorted sets.
+
+    A timeline holds ids of the latest tweets of the user and the followed
+    users scored by the tweet id and is capped at `size` tweets.
+    Followed authors whose tweets aren't pushed (celebrities) are kept in the
+    same set, their tweets are merged into the timeline on read.
+    Redis errors are logged, a timeline that can't be read is built again.
+    """
+
+    prefix = "timeline"
+
+    def __init__(
+        self, redis: Redis, size: int = TIMELINE_SIZE, ttl: int = TIMELINE_TTL,
+    ) -> None:
+        """Init.
+
+        Parameters:
+            redis: Redis connection created in the app lifespan
+            size: max number of tweets in a timeline
+            ttl: seconds a timeline lives after the last read
+        """
+        self.redis = redis
+        self.size = size
+        self.ttl = ttl
+
+    async def get_many(self, user_ids: list[int]) -> dict[int, Optional[Timeline]]:
+        """Return timelines of the users.
+
+        Parameters:
+            user_ids: owners of the timelines
+
+        Returns:
+            dict {user_id: Timeline or None if the timeline isn't built}
+        """
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.zrevrange(self._get_key(user_id), 0, -1, withscores=True)
+                    pipe.expire(self._get_key(user_id), self.ttl)
+                replies: list = await pipe.execute()
+        except RedisError as err:
+            api_logger.warning("Timeline store is unavailable: %s", err)
+            return dict.fromkeys(user_ids)
+
+        return {
+            owner_id: parse_timeline(members) if members else None
+            for owner_id, members in zip(user_ids, replies[::2])
+        }
+
+    async def build_many(self, timelines: dict[int, Timeline]) -> None:
+        """Replace the timelines.
+
+        Parameters:
+            timelines: {user_id: Timeline}, only `size` latest tweets are stored
+        """
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                for user_id, timeline in timelines.items():
+                    mapping = {
+                        tweet_id: tweet_id
+                        for tweet_id in timeline.tweet_ids[:self.size]
+                    }
+                    mapping[SENTINEL] = float("inf")
+                    for author_id in timeline.celebrity_ids:
+                        mapping[get_celebrity_member(author_id)] = float("inf")
+                    pipe.delete(self._get_key(user_id))
+                    pipe.zadd(self._get_key(user_id), mapping)
+                    pipe.expire(self._get_key(user_id), self.ttl)
+                await pipe.execute()
+        except RedisError as err:
+            api_logger.warning("Timeline store is unavailable: %s", err)
+
+    async def add(self, user_ids: Iterable[int], members: list) -> None:
+        """Add tweet ids or celebrity markers to the built timelines of the users.
+
+        Parameters:
+            user_ids: owners of the timelines
+            members: tweet ids or results of get_celebrity_member()
+        """
+        keys = [self._get_key(user_id) for user_id in user_ids]
+        if not (keys and members):
+            return
+        try:
+            await self.redis.eval(ADD_SCRIPT, len(keys), *keys, self.size, *members)
+        except RedisError as err:
+            api_logger.warning("Timeline store is unavailable: %s", err)
+
+    async def remove(self, user_ids: Iterable[int], members: list) -> None:
+        """Remove tweet ids or celebrity markers from the timelines of the users.
+
+        Parameters:
+            user_ids: owners of the timelines
+            members: tweet ids or results of get_celebrity_member()
+        """
+        if not members:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for user_id in user_ids:
+                    pipe.zrem(self._get_key(user_id), *members)
+                await pipe.execute()
+        except RedisError as err:
+            api_logger.warning("Timeline store is unavailable: %s", err)
+
+    async def delete(self, user_ids: list[int]) -> None:
+        """Delete the timelines, they are built again on the next read.
+
+        Parameters:
+            user_ids: owners of the timelines
+        """
+        if not user_ids:
+            return
+        try:
+            await self.redis.delete(*(self._get_key(user_id) for user_id in user_ids))
+        except RedisError as err:
+            api_logger.warning("Timeline store is unavailable: %s", err)
+
+    def _get_key(self, user_id: int) -> str:
+        return "{prefix}:{user_id}".format(prefix=self.prefix, user_id=user_id)
+
+
+class AuthorTweetsStore(TimelineStore):
+    """Latest tweets of the authors whose tweets aren't pushed."""
+
+    prefix = "author-tweets"
+
+    def __init__(
+        self, redis: Redis, size: int = AUTHOR_TWEETS_SIZE, ttl: int = TIMELINE_TTL,
+    ) -> None:
+        """Init.
+
+        Parameters:
+            redis: Redis connection created in the app lifespan
+            size: max number of tweets of an author
+            ttl: seconds the tweets are kept after the last read
+        """
+        super().__init__(redis, size, ttl)
+
+
+class CelebrityRegistry:
+    """Set of authors whose tweets aren't pushed to the timelines."""
+
+    key = "celebrities"
+
+    def __init__(self, redis: Redis) -> None:
+        """Init.
+
+        Parameters:
+            redis: Redis connection created in the app lifespan
+        """
+        self.redis = redis
+
+    async def filter(self, author_ids: list[int]) -> Optional[list[int]]:
+        """Return the authors registered as celebrities.
+
+        Parameters:
+            author_ids: list[int]
+
+        Returns:
+            list of user ids or None if Redis is unavailable
+        """
+        if not author_ids:
+            return []
+        try:
+            flags = await self.redis.smismember(self.key, author_ids)
+        except RedisError as err:
+            api_logger.warning("Timeline store is unavailable: %s", err)
+            return None
+        return [author_id for author_id, flag in zip(author_ids, flags) if flag]
+
+    async def mark(self, author_id: int, is_celebrity: bool) -> bool:
+        """Register or unregister the author as celebrity.
+
+        Parameters:
+            author_id: int
+            is_celebrity: bool
+
+        Returns:
+            bool: True if the author has just been registered
+        """
+        try:
+            if is_celebrity:
+                return bool(await self.redis.sadd(self.key, author_id))
+            await self.redis.srem(self.key, author_id)
+        except RedisError as err:
+            api_logger.warning("Timeline store is unavailable: %s", err)
+        return False
+
+
+async def get_timeline(
+    redis: Redis,
+    user_id: int,
+    async_session: AsyncSession,
+    celebrity_threshold: Optional[int] = CELEBRITY_THRESHOLD,
+) -> Optional[list[int]]:
+    """Return tweet ids of the user's home timeline, the latest first.
+
+    A timeline which isn't in Redis (new, expired or evicted)
+    is built from the db. Latest tweets of the followed celebrities
+    are merged into it.
+
+    Parameters:
+        redis: Redis connection
+        user_id: int
+        async_session: AsyncSession
+        celebrity_threshold: followers of an author whose tweets aren't pushed
+
+    Returns:
+        list of tweet ids or None if the db request failed
+    """
+    timelines: dict = await TimelineStore(redis).get_many([user_id])
+    timeline: Optional[Timeline] = timelines[user_id]
+    if timeline is None:
+        metrics.increment("timelines.rebuilds")
+        timeline = await build_timeline(
+            redis, user_id, async_session, celebrity_threshold,
+        )
+        if timeline is None:
+            return None
+    else:
+        metrics.increment("timelines.hits")
+
+    return await merge_celebrity_tweets(
+        redis, timeline.tweet_ids, timeline.celebrity_ids, async_session,
+    )
+
+
+async def build_timeline(
+    redis: Redis,
+    user_id: int,
+    async_session: AsyncSession,
+    celebrity_threshold: Optional[int] = CELEBRITY_THRESHOLD,
+) -> Optional[Timeline]:
+    """Build the user's home timeline from the db.
+
+    Parameters:
+        redis: Redis connection
+        user_id: int
+        async_session: AsyncSession
+        celebrity_threshold: followers of an author whose tweets aren't pushed
+
+    Returns:
+        Timeline or None if the request failed
+    """
+    store = TimelineStore(redis)
+    following: ResponseData = await FollowersMethods.get_following_ids(
+        user_id=user_id, async_session=async_session,
+    )
+    if not following.response["result"]:
+        return None
+    following_ids: list[int] = following.response["following_ids"]
+
+    celebrity_ids: Optional[list[int]] = []
+    if celebrity_threshold is not None:
+        celebrity_ids = await CelebrityRegistry(redis).filter(following_ids)
+        if celebrity_ids is None:
+            return None
+
+    latest: ResponseData = await TweetsMethods.get_latest_ids(
+        user_ids=[
+            *(author for author in following_ids if author not in celebrity_ids),
+            user_id,
+        ],
+        limit=store.size,
+        async_session=async_session,
+    )
+    if not latest.response["result"]:
+        return None
+
+    timeline = Timeline(latest.response["tweet_ids"], celebrity_ids)
+    await store.build_many({user_id: timeline})
+    return timeline
+
+
+async def merge_celebrity_tweets(
+    redis: Redis,
+    tweet_ids: list[int],
+    celebrity_ids: list[int],
+    async_session: AsyncSession,
+) -> list[int]:
+    """Merge latest tweets of the celebrities into the timeline.
+
+    Tweets of the celebrities are cached in AuthorTweetsStore,
+    the missing ones are loaded with one db request.
+
+    Parameters:
+        redis: Redis connection
+        tweet_ids: tweet ids of the timeline
+        celebrity_ids: followed authors whose tweets aren't pushed
+        async_session: AsyncSession
+
+    Returns:
+        list of tweet ids, the latest first
+    """
+    if not celebrity_ids:
+        return tweet_ids
+
+    with metrics.timer("feed.hybrid.merge"):
+        author_store = AuthorTweetsStore(redis)
+        authors_tweets: dict = {
+            author_id: author_timeline.tweet_ids
+            for author_id, author_timeline in (
+                await author_store.get_many(celebrity_ids)
+            ).items()
+            if author_timeline is not None
+        }
+        missing_ids = [
+            author_id for author_id in celebrity_ids if author_id not in authors_tweets
+        ]
+        if missing_ids:
+            latest: ResponseData = await TweetsMethods.get_latest_ids_by_user(
+                user_ids=missing_ids,
+                limit=author_store.size,
+                async_session=async_session,
+            )
+            loaded: dict = latest.response.get("tweet_ids", {})
+            await author_store.build_many({
+                author_id: Timeline(author_tweets, celebrity_ids=[])
+                for author_id, author_tweets in loaded.items()
+            })
+            authors_tweets.update(loaded)
+
+        merged_ids: set[int] = set(tweet_ids)
+        for author_tweets in authors_tweets.values():
+            merged_ids.update(author_tweets)
+
+    metrics.increment("feed.hybrid.merged_authors", len(celebrity_ids))
+    metrics.increment("feed.hybrid.merged_tweets", len(merged_ids) - len(tweet_ids))
+    return sorted(merged_ids, reverse=True)[:TIMELINE_SIZE]
+
+
+async def add_tweet_to_timelines(
+    redis: Redis,
+    author_id: int,
+    tweet_id: int,
+    async_session: AsyncSession,
+    celebrity_threshold: Optional[int] = CELEBRITY_THRESHOLD,
+) -> None:
+    """Push the new tweet to the timelines of the author and the followers.
+
+    Tweets of an author with at least celebrity_threshold followers
+    aren't pushed to the followers, see add_celebrity_tweet().
+
+    Parameters:
+        redis: Redis connection
+        author_id: int
+        tweet_id: int
+        async_session: AsyncSession
+        celebrity_threshold: followers of an author whose tweets aren't pushed
+    """
+    with metrics.timer("timelines.fanout"):
+        followers: ResponseData = await FollowersMethods.get_follower_ids(
+            user_id=author_id, async_session=async_session, limit=celebrity_threshold,
+        )
+        follower_ids: list[int] = followers.response.get("follower_ids", [])
+
+        if celebrity_threshold is not None and len(follower_ids) >= celebrity_threshold:
+            await add_celebrity_tweet(redis, author_id, tweet_id, async_session)
+            return
+
+        if celebrity_threshold is not None:
+            await CelebrityRegistry(redis).mark(author_id, is_celebrity=False)
+        await TimelineStore(redis).add([author_id, *follower_ids], [tweet_id])
+        metrics.increment("timelines.fanout.writes", len(follower_ids) + 1)
+
+
+async def add_celebrity_tweet(
+    redis: Redis, author_id: int, tweet_id: int, async_session: AsyncSession,
+) -> None:
+    """Add the new tweet of a celebrity to the author's timeline and latest tweets.
+
+    When the author has just become a celebrity, the followers' timelines
+    are deleted to be built again with the author's tweets merged on read.
+
+    Parameters:
+        redis: Redis connection
+        author_id: int
+        tweet_id: int
+        async_session: AsyncSession
+    """
+    store = TimelineStore(redis)
+    if await CelebrityRegistry(redis).mark(author_id, is_celebrity=True):
+        followers: ResponseData = await FollowersMethods.get_follower_ids(
+            user_id=author_id, async_session=async_session,
+        )
+        await store.delete(followers.response.get("follower_ids", []))
+    await store.add([author_id], [tweet_id])
+    await AuthorTweetsStore(redis).add([author_id], [tweet_id])
+    metrics.increment("timelines.fanout.skipped")
+
+
+async def remove_tweet_from_timelines(
+    redis: Redis,
+    author_id: int,
+    tweet_id: int,
+    async_session: AsyncSession,
+    celebrity_threshold: Optional[int] = CELEBRITY_THRESHOLD,
+) -> None:
+    """Remove the deleted tweet from the timelines of the author and the followers.
+
+    Only celebrity_threshold followers are looked up: tweets of celebrities
+    aren't pushed, and deleted tweets left in timelines aren't returned anyway.
+
+    Parameters:
+        redis: Redis connection
+        author_id: int
+        tweet_id: int
+        async_session: AsyncSession
+        celebrity_threshold: followers of an author whose tweets aren't pushed
+    """
+    followers: ResponseData = await FollowersMethods.get_follower_ids(
+        user_id=author_id, async_session=async_session, limit=celebrity_threshold,
+    )
+    follower_ids: list[int] = followers.response.get("follower_ids", [])
+    await TimelineStore(redis).remove([author_id, *follower_ids], [tweet_id])
+    await AuthorTweetsStore(redis).remove([author_id], [tweet_id])
+
+
+async def follow_timeline(
+    redis: Redis, follower_id: int, following_id: int, async_session: AsyncSession,
+) -> None:
+    """Add tweets of the followed user to the follower's timeline.
+
+    Tweets of a celebrity are merged on read, so only its marker is added.
+
+    Parameters:
+        redis: Redis connection
+        follower_id: int
+        following_id: int
+        async_session: AsyncSession
+    """
+    store = TimelineStore(redis)
+    if await CelebrityRegistry(redis).filter([following_id]):
+        await store.add([follower_id], [get_celebrity_member(following_id)])
+        return
+
+    latest: ResponseData = await TweetsMethods.get_latest_ids(
+        user_ids=[following_id], limit=store.size, async_session=async_session,
+    )
+    await store.add([follower_id], latest.response.get("tweet_ids", []))
+
+
+async def unfollow_timeline(
+    redis: Redis, follower_id: int, following_id: int, async_session: AsyncSession,
+) -> None:
+    """Remove tweets of the unfollowed user from the follower's timeline.
+
+    Only the latest `size` tweets of the user can be in the timeline.
+
+    Parameters:
+        redis: Redis connection
+        follower_id: int
+        following_id: int
+        async_session: AsyncSession
+    """
+    store = TimelineStore(redis)
+    latest: ResponseData = await TweetsMethods.get_latest_ids(
+        user_ids=[following_id], limit=store.size, async_session=async_session,
+    )
+    await store.remove(
+        [follower_id],
+        [get_celebrity_member(following_id), *latest.response.get("tweet_ids", [])],
+    )
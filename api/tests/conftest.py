@@ -1,17 +1,18 @@
 import time
 from subprocess import run  # noqa
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Generator
 
 import pytest
 from asgi_lifespan import LifespanManager
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy import text
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import create_async_engine  # noqa
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker  # noqa
 from sqlalchemy.pool import NullPool
 from types_aiobotocore_s3 import Client  # noqa
 from src.config import DATABASE_URL, S3_ACCESS_KEY, S3_SECRET_KEY, S3_URL, S3_BUCKET_NANE  # noqa
 from src.database_models.db_config import base_metadata, get_async_session  # noqa
+from src.database_models.db_config import get_async_read_session  # noqa
 from src.utils.s3_config import S3Client, get_async_s3_client  # noqa
 from src.main import app  # noqa
 from src.migrations.run_migration import apply_head_migration  # noqa
@@ -47,6 +48,7 @@ async def override_s3_client() -> AsyncGenerator[Client, None]:
 
 
 app.dependency_overrides[get_async_session] = override_async_session
+app.dependency_overrides[get_async_read_session] = override_async_session
 app.dependency_overrides[get_async_s3_client] = override_s3_client
 
 
@@ -103,6 +105,23 @@ async def async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+@pytest.fixture
+def statements() -> Generator[list[str], None, None]:
+    """Sync fixture: yield list of SQL statements executed by the test engine.
+
+    Yields:
+        list[str]
+    """
+    executed: list[str] = []
+
+    def on_execute(conn, cursor, statement, *args) -> None:  # noqa: WPS430
+        executed.append(statement)
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", on_execute)
+    yield executed
+    event.remove(test_engine.sync_engine, "before_cursor_execute", on_execute)
+
+
 @pytest.fixture(scope="session")
 async def s3_ac() -> AsyncGenerator[Client, None]:
     """Async fixture: yield async session for testing the db.
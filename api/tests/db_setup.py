@@ -2,7 +2,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql import func
 from database_models.tweets_orm_models import Likes, MediasTweets, Medias, Tweets # noqa
 from database_models.users_orm_models import Cookies, Followers, Users  # noqa
-from config import S3_BUCKET_NANE # noqa
 
 
 async def setup_test_data(async_session: AsyncSession):
@@ -35,16 +34,18 @@ async def setup_test_data(async_session: AsyncSession):
         tweet4 = Tweets(user_id=user3.id, data="Random data1")
         tweet5 = Tweets(user_id=user3.id, data="Random data2")
         image1 = Medias(
-            link=f"https://s3.timeweb.cloud/{S3_BUCKET_NANE}/cat1.jpg",
+            key="cat1.jpg",
+            ref_count=1,
         )
         image2 = Medias(
-            link=f"https://s3.timeweb.cloud/{S3_BUCKET_NANE}/cat2.jpg",
+            key="cat2.jpg",
+            ref_count=1,
         )
         image3 = Medias(
-            link=f"https://s3.timeweb.cloud/{S3_BUCKET_NANE}/cat1.jpg",
+            key="cat3.jpg",
         )
         image4 = Medias(
-            link=f"https://s3.timeweb.cloud/{S3_BUCKET_NANE}/cat2.jpg",
+            key="cat4.jpg",
         )
         session.add_all([tweet1, tweet2, tweet3, tweet4, tweet5])
         session.add_all([image1, image2, image3, image4])
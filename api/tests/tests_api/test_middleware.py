@@ -0,0 +1,52 @@
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database_models.methods.users import CookiesMethods  # noqa
+from src.main import app  # noqa
+from middleware import resolve_api_key  # noqa
+from utils.api_keys import SharedApiKeyCache, api_key_cache, get_key_digest  # noqa
+
+url = "/api/users/me"
+
+
+async def test_new_api_key_is_not_cached_as_unknown(
+    ac: AsyncClient, async_session: AsyncSession,
+):
+    """Test api-key check drops cached unknown api-key once it is added.
+
+    Parameters:
+        ac: AsyncClient
+        async_session: AsyncSession
+    """
+    key = "m1n2b3v4c5x6z7l8k9j0h1g2f3d4s5a6"
+
+    request_before = await ac.get(url, headers={"api-key": key})
+    assert request_before.status_code == 401
+
+    await CookiesMethods.add(user_id=3, api_key=key, async_session=async_session)
+
+    request_after = await ac.get(url, headers={"api-key": key})
+    assert request_after.status_code == 200
+    assert request_after.json().get("user").get("id") == 3
+
+
+async def test_resolved_api_key_is_shared_through_redis(ac: AsyncClient):
+    """Test api-key resolved by one worker is reused by the others.
+
+    Clearing the in-process cache acts like a cold worker:
+    the key has to be resolved from Redis with no database session.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    key = "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"
+    api_key_cache.clear()
+
+    request = await ac.get(url, headers={"api-key": key})
+    assert request.status_code == 200
+
+    shared_result = await SharedApiKeyCache(app.state.redis).get(get_key_digest(key))
+    assert shared_result[0] == 1
+
+    api_key_cache.clear()
+    check_api_key = await resolve_api_key(key, session=None, redis=app.state.redis)
+    assert check_api_key.response.get("user_id") == 1
@@ -0,0 +1,15 @@
+from httpx import AsyncClient
+
+
+async def test_get_metrics(ac: AsyncClient):
+    """Test GET /api/metrics endpoint works.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    request = await ac.get(
+        "/api/metrics", headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+
+    assert request.status_code == 200
+    assert "db.primary.pool.saturation" in request.json().get("gauges")
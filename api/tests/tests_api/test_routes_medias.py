@@ -1,6 +1,8 @@
 import os
 
+import pytest
 from httpx import AsyncClient
+from config import MEDIA_MAX_SIZE  # noqa
 
 os.chdir(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
@@ -25,3 +27,207 @@ async def test_upload_media_from_post(ac: AsyncClient):
     assert request.status_code == 201
     assert request.json().get("result") is True
     assert request.json().get("media_id") is not None
+
+
+async def upload_cat(ac: AsyncClient, filename: str) -> int:
+    """Upload tests/medias/cat1.jpg by /api/medias endpoint.
+
+    Parameters:
+        ac: AsyncClient
+        filename: name of the uploaded file
+
+    Returns:
+        int: id of the media
+    """
+    with open("tests/medias/cat1.jpg", "rb") as file:
+        b_file: bytes = file.read()
+
+    request = await ac.post(
+        url="/api/medias",
+        files={"file": (filename, b_file, "image/jpg")},
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+    assert request.status_code == 201
+    return request.json()["media_id"]
+
+
+async def test_upload_same_media_twice(ac: AsyncClient):
+    """Test /api/medias endpoint returns one media for one content.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    assert await upload_cat(ac, "first.png") == await upload_cat(ac, "second.png")
+
+
+async def test_upload_too_large_media(ac: AsyncClient):
+    """Test /api/medias endpoint rejects a file larger than MEDIA_MAX_SIZE.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    request = await ac.post(
+        url="/api/medias",
+        files={"file": ("large.png", b"x" * (MEDIA_MAX_SIZE + 1), "image/png")},
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+
+    assert request.status_code == 413
+    assert request.json()["detail"]["error_type"] == "PayloadTooLarge"
+
+
+async def test_upload_media_without_file(ac: AsyncClient):
+    """Test /api/medias endpoint rejects a form without the file field.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    request = await ac.post(
+        url="/api/medias",
+        data={"name": "test_image.png"},
+        files={"other": ("test_image.png", b"data", "image/png")},
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+
+    assert request.status_code == 400
+    assert request.json()["detail"]["error_type"] == "InvalidFormData"
+
+
+@pytest.mark.parametrize("content_length", ["abc", "-1"])
+async def test_upload_media_with_invalid_content_length(
+    ac: AsyncClient, content_length: str,
+):
+    """Test /api/medias endpoint rejects a malformed Content-Length.
+
+    Parameters:
+        ac: AsyncClient
+        content_length: value of the header
+    """
+    request = await ac.post(
+        url="/api/medias",
+        files={"file": ("test_image.png", b"data", "image/png")},
+        headers={
+            "api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p",
+            "content-length": content_length,
+        },
+    )
+
+    assert request.status_code == 400
+    assert request.json()["detail"]["error_type"] == "InvalidFormData"
+
+
+async def test_upload_media_with_not_utf8_filename(ac: AsyncClient):
+    """Test /api/medias endpoint accepts a filename of other encoding.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    body: bytes = b"".join([
+        b"--boundary\r\n",
+        b'Content-Disposition: form-data; name="file"; filename="\xff\xfe.png"\r\n',
+        b"Content-Type: image/png\r\n\r\n",
+        b"not utf-8 filename\r\n",
+        b"--boundary--\r\n",
+    ])
+    request = await ac.post(
+        url="/api/medias",
+        content=body,
+        headers={
+            "api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p",
+            "content-type": "multipart/form-data; boundary=boundary",
+        },
+    )
+
+    assert request.status_code == 201
+    assert request.json()["result"] is True
+
+
+async def create_upload(ac: AsyncClient) -> dict:
+    """Request a direct upload by /api/medias/uploads endpoint.
+
+    Parameters:
+        ac: AsyncClient
+
+    Returns:
+        dict: media_id and the upload form
+    """
+    request = await ac.post(
+        url="/api/medias/uploads",
+        json={"filename": "direct.jpg"},
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+    assert request.status_code == 201
+    return request.json()
+
+
+async def test_upload_slot_with_too_long_filename(ac: AsyncClient):
+    """Test POST /api/medias/uploads endpoint rejects too long filename.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    request = await ac.post(
+        url="/api/medias/uploads",
+        json={"filename": "{name}.jpg".format(name="a" * 300)},
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+    assert request.status_code == 422
+
+
+async def test_direct_upload(ac: AsyncClient):
+    """Test a media uploaded to s3 storage by the presigned form is confirmed.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    upload: dict = await create_upload(ac)
+    with open("tests/medias/cat1.jpg", "rb") as file:
+        async with AsyncClient() as s3_ac:
+            s3_request = await s3_ac.post(
+                upload["upload_url"],
+                data=upload["upload_fields"],
+                files={"file": ("direct.jpg", file.read(), "image/jpg")},
+            )
+    assert s3_request.is_success
+
+    request = await ac.post(
+        url="/api/medias/{media_id}/confirm".format(media_id=upload["media_id"]),
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+
+    assert request.status_code == 200
+    assert request.json() == {"result": True, "media_id": upload["media_id"]}
+
+
+async def test_cant_confirm_not_uploaded_media(ac: AsyncClient):
+    """Test a media is not confirmed before its object is uploaded.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    upload: dict = await create_upload(ac)
+
+    request = await ac.post(
+        url="/api/medias/{media_id}/confirm".format(media_id=upload["media_id"]),
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+
+    assert request.status_code == 409
+    assert request.json()["error_type"] == "UploadIncomplete"
+
+
+async def test_cant_create_post_with_pending_media(ac: AsyncClient):
+    """Test a pending media is not attached to a tweet.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    upload: dict = await create_upload(ac)
+
+    request = await ac.post(
+        url="/api/tweets",
+        json={"tweet_data": "pending", "tweet_media_ids": [upload["media_id"]]},
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+
+    assert request.status_code == 404
@@ -1,5 +1,8 @@
+import pytest
 from httpx import AsyncClient
 
+from src.schemas import TweetsListDataOut  # noqa
+
 url = "/api/tweets"
 
 
@@ -12,6 +15,71 @@ async def test_get_list_of_posts(ac: AsyncClient):
     request = await ac.get(url, headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"})
     assert request.status_code == 200
     assert request.json().get("result") is True
+    TweetsListDataOut.model_validate(request.json())
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "OTk5OTk5OTk5OTk5OjE"])
+async def test_get_list_of_posts_with_malformed_cursor(ac: AsyncClient, cursor: str):
+    """Test GET /api/tweets endpoint rejects malformed cursor.
+
+    Parameters:
+        ac: AsyncClient
+        cursor: malformed cursor or cursor of 999999999999:1
+    """
+    request = await ac.get(
+        url,
+        params={"cursor": cursor},
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+    assert request.status_code == 400
+    assert request.json().get("detail").get("error_type") == "InvalidCursor"
+
+
+async def test_get_list_of_posts_with_like_summary(ac: AsyncClient):
+    """Test GET /api/tweets endpoint returns like summary of posts.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    request = await ac.get(
+        url,
+        params={"likes": "summary"},
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+    assert request.status_code == 200
+    assert all("like_count" in tweet for tweet in request.json().get("tweets"))
+
+
+async def test_new_post_drops_cached_feed(ac: AsyncClient):
+    """Test GET /api/tweets endpoint doesn't return feed cached before a new post.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    headers = {"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"}
+    await ac.get(url, headers=headers)
+    new_post = await ac.post(
+        url, json={"tweet_data": "Cached?", "tweet_media_ids": []}, headers=headers,
+    )
+    request = await ac.get(url, headers=headers)
+
+    tweet_ids = [tweet["id"] for tweet in request.json().get("tweets")]
+    assert new_post.json().get("tweet_id") in tweet_ids
+
+
+async def test_get_post_likers(ac: AsyncClient):
+    """Test GET /api/tweets/post_id/likes endpoint works.
+
+    Parameters:
+        ac: AsyncClient
+    """
+    request = await ac.get(
+        url + "/{post_id}/likes".format(post_id=2),
+        headers={"api-key": "1a2b3c4d5e6f7g8h9i0j1k2l3m4n5o6p"},
+    )
+    assert request.status_code == 200
+    assert request.json().get("result") is True
+    assert request.json().get("likes") == []
 
 
 async def test_request_with_nonexistent_api_key(ac: AsyncClient):
@@ -81,7 +149,7 @@ async def test_delete_post(ac: AsyncClient):
     )
 
     assert request.status_code == 200
-    assert request.json().get("result") is True
+    assert request.json() == {"result": True}
 
 
 async def test_cant_delete_other_peoples_tweet(ac: AsyncClient):
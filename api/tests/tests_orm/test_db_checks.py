@@ -0,0 +1,14 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from utils.db_checks import find_unindexed_foreign_keys  # noqa
+
+
+async def test_all_foreign_keys_are_indexed(async_session: AsyncSession):
+    """Test every foreign key column of the models has an index.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    async with async_session as session:
+        foreign_keys = await find_unindexed_foreign_keys(session)
+
+    assert foreign_keys == []
@@ -0,0 +1,28 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from database_models.db_config import LSN_PATTERN, get_current_lsn  # noqa
+from database_models.db_config import wait_for_replica  # noqa
+
+
+async def test_get_current_lsn(async_session: AsyncSession):
+    """Test get_current_lsn() returns WAL position usable as consistency token.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    async with async_session as session:
+        token = await get_current_lsn(session)
+
+    assert LSN_PATTERN.match(token)
+
+
+async def test_primary_is_not_used_as_replica(async_session: AsyncSession):
+    """Test wait_for_replica() gives up on a server that is not a replica.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    async with async_session as session:
+        token = await get_current_lsn(session)
+        is_caught_up = await wait_for_replica(session, token, timeout=0)
+
+    assert is_caught_up is False
@@ -1,7 +1,7 @@
-from sqlalchemy import and_, select
+from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database_models.methods.tweets import LikesMethods, TweetsMethods  # noqa
-from src.database_models.methods.medias import MediasMethods  # noqa
+from src.database_models.methods.medias import MediasMethods, lock_media_keys  # noqa
 from database_models.tweets_orm_models import Likes, Medias, Tweets  # noqa
 
 
@@ -54,19 +54,19 @@ async def test_get_by_nonexistent_tweet_id(async_session: AsyncSession):
     assert request.response.get("result") is False
 
 
-async def test_add_media_link(async_session: AsyncSession):
+async def test_add_media_key(async_session: AsyncSession):
     """Test MediasMethods.add() method.
 
-    Add media link to medias table.
+    Add media key to medias table.
 
     Parameters:
         async_session: AsyncSession
     """
-    link = "https://s3.timeweb.cloud/37634968-test-backet/meme1.jpg"
+    key = "meme1.jpg"
 
     async with async_session as session:
         request = await MediasMethods.add(
-            link=link,
+            key=key,
             async_session=async_session,
         )
         assert request.status_code == 201
@@ -75,7 +75,7 @@ async def test_add_media_link(async_session: AsyncSession):
 
         check_expr = select(Medias).where(and_(
             Medias.id == request.response.get("media_id"),
-            Medias.link == link,
+            Medias.key == key,
         ))
         check_request_after = await session.execute(check_expr)
         check_result_after = check_request_after.scalars().one_or_none()
@@ -136,3 +136,55 @@ async def test_delete_by_nonexistent_media_id(async_session: AsyncSession):
         assert request.status_code == 404
         assert request.response.get("result") is False
         assert request.response.get("error_type") == "DataNotFound"
+
+
+async def test_add_stored_media_key(async_session: AsyncSession):
+    """Test MediasMethods.add() method.
+
+    Return id of the stored media if the key is added again.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    key = "meme2.jpg"
+
+    first_request = await MediasMethods.add(key=key, async_session=async_session)
+    second_request = await MediasMethods.add(key=key, async_session=async_session)
+
+    assert second_request.status_code == 201
+    assert second_request.response["media_id"] == first_request.response["media_id"]
+
+
+async def try_lock_key(session: AsyncSession, key: str) -> bool:
+    """Return True if the key is not locked by another session.
+
+    Parameters:
+        session: AsyncSession
+        key: key of the object
+
+    Returns:
+        bool
+    """
+    request = await session.execute(
+        select(func.pg_try_advisory_xact_lock(func.hashtextextended(key, 0))),
+    )
+    return request.scalar_one()
+
+
+async def test_media_keys_are_locked(async_session: AsyncSession):
+    """Test lock_media_keys() holds the keys until the session is committed.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    async with async_session as session:
+        await lock_media_keys(session, ["locked.jpg", "locked.jpg"])
+        async with AsyncSession(async_session.bind) as other_session:
+            locked_free: bool = await try_lock_key(other_session, "locked.jpg")
+        await session.commit()
+
+    async with AsyncSession(async_session.bind) as other_session:
+        committed_free: bool = await try_lock_key(other_session, "locked.jpg")
+
+    assert not locked_free
+    assert committed_free
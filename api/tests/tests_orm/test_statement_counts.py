@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database_models.methods.medias import MediasMethods  # noqa
+from src.database_models.methods.tweets import LikesMethods, TweetsMethods  # noqa
+from src.database_models.methods.users import UsersMethods  # noqa
+from src.schemas import Pagination  # noqa
+
+
+@pytest.mark.parametrize(
+    "method, kwargs, statement_count",
+    [
+        (TweetsMethods.get, {"tweet_id": 3}, 1),
+        (
+            TweetsMethods.get_posts_list,
+            {"user_id": 2, "pagination": Pagination(offset=None, limit=10)},
+            1,
+        ),
+        (
+            TweetsMethods.get_posts_list,
+            {"user_id": 2, "pagination": Pagination(offset=1, limit=10)},
+            2,
+        ),
+        (
+            LikesMethods.get_likers,
+            {"tweet_id": 3, "pagination": Pagination(offset=None, limit=10)},
+            2,
+        ),
+        (MediasMethods.get_by_tweet_id, {"tweet_id": 4}, 1),
+        (TweetsMethods.delete, {"user_id": 1, "tweet_id": 100}, 1),
+        # user, followers, followers.follower, following (empty)
+        (UsersMethods.get_info_by_id, {"user_id": 1}, 4),
+    ],
+)
+async def test_method_statement_count(
+    async_session: AsyncSession,
+    statements: list[str],
+    method,
+    kwargs: dict,
+    statement_count: int,
+):
+    """Test ORM methods issue only the statements of their declared loaders.
+
+    Relationships are lazy="raise", a method touching a relationship
+    it doesn't load fails instead of issuing more statements.
+
+    Parameters:
+        async_session: AsyncSession
+        statements: SQL statements executed by the test engine
+        method: ORM method
+        kwargs: arguments of the method
+        statement_count: expected number of statements
+    """
+    request = await method(async_session=async_session, **kwargs)
+
+    assert request.status_code in {200, 404}
+    assert len(statements) == statement_count, statements
@@ -1,8 +1,16 @@
-from sqlalchemy import and_, select
+from datetime import timedelta
+from typing import Optional
+
+import pytest
+from sqlalchemy import and_, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from config import MEDIA_PUBLIC_URL  # noqa
+from src.database_models.methods import tweets as tweets_methods  # noqa
+from src.database_models.methods.medias import MediasMethods  # noqa
 from src.database_models.methods.tweets import LikesMethods, TweetsMethods  # noqa
 from src.schemas import Pagination  # noqa
+from src.utils.pagination import decode_cursor  # noqa
 from database_models.tweets_orm_models import Likes, MediasTweets, Medias, Tweets  # noqa
 
 
@@ -24,6 +32,137 @@ async def test_get_posts_for_user(async_session: AsyncSession):
     assert request.response.get("result") is True
 
 
+async def test_get_posts_by_cursor(async_session: AsyncSession):
+    """Test TweetsMethods.get_posts_list() pages by next_cursor.
+
+    Walking the pages returns every post of the feed once, in order.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    full_request = await TweetsMethods.get_posts_list(
+        user_id=1,
+        pagination=Pagination(offset=None, limit=100),
+        async_session=async_session,
+    )
+    page_request = await TweetsMethods.get_posts_list(
+        user_id=1,
+        pagination=Pagination(offset=None, limit=1),
+        async_session=async_session,
+    )
+    paged_ids = [tweet["id"] for tweet in page_request.response["tweets"]]
+    while page_request.response["next_cursor"]:
+        page_request = await TweetsMethods.get_posts_list(
+            user_id=1,
+            pagination=Pagination(
+                offset=None,
+                limit=1,
+                after=decode_cursor(page_request.response["next_cursor"]),
+            ),
+            async_session=async_session,
+        )
+        paged_ids.extend(tweet["id"] for tweet in page_request.response["tweets"])
+
+    assert paged_ids == [tweet["id"] for tweet in full_request.response["tweets"]]
+    assert full_request.response["next_cursor"] is None
+
+
+async def test_get_posts_page_total(async_session: AsyncSession):
+    """Test TweetsMethods.get_posts_list() counts all posts of the feed by page.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    full_request = await TweetsMethods.get_posts_list(
+        user_id=1,
+        pagination=Pagination(offset=None, limit=100),
+        async_session=async_session,
+    )
+    request = await TweetsMethods.get_posts_list(
+        user_id=1,
+        pagination=Pagination(offset=1, limit=1),
+        async_session=async_session,
+    )
+
+    assert len(request.response["tweets"]) == 1
+    assert request.response["total"] == len(full_request.response["tweets"])
+
+
+async def test_json_feed_matches_orm_feed(
+    async_session: AsyncSession, monkeypatch: pytest.MonkeyPatch,
+):
+    """Test TweetsMethods.get_posts_list() builds the same feed in both modes.
+
+    Parameters:
+        async_session: AsyncSession
+        monkeypatch: MonkeyPatch
+    """
+    pagination = Pagination(offset=None, limit=100)
+    monkeypatch.setattr(tweets_methods, "FEED_QUERY", "json")
+    json_request = await TweetsMethods.get_posts_list(
+        user_id=1, pagination=pagination, async_session=async_session,
+    )
+    monkeypatch.setattr(tweets_methods, "FEED_QUERY", "orm")
+    orm_request = await TweetsMethods.get_posts_list(
+        user_id=1, pagination=pagination, async_session=async_session,
+    )
+
+    assert json_request.status_code == 200
+    assert json_request.response["tweets"]
+    assert json_request.response == orm_request.response
+
+
+async def test_feed_attachment_variants(
+    async_session: AsyncSession, monkeypatch: pytest.MonkeyPatch,
+):
+    """Test TweetsMethods.get_posts_list() returns maps of the attachment variants.
+
+    Parameters:
+        async_session: AsyncSession
+        monkeypatch: MonkeyPatch
+    """
+    # user 3 reads its own tweet with the seeded attachments
+    pagination = Pagination(offset=None, limit=100)
+    monkeypatch.setattr(tweets_methods, "FEED_ATTACHMENTS", "variants")
+    monkeypatch.setattr(tweets_methods, "FEED_QUERY", "json")
+    json_request = await TweetsMethods.get_posts_list(
+        user_id=3, pagination=pagination, async_session=async_session,
+    )
+    monkeypatch.setattr(tweets_methods, "FEED_QUERY", "orm")
+    orm_request = await TweetsMethods.get_posts_list(
+        user_id=3, pagination=pagination, async_session=async_session,
+    )
+    attachments: list = [
+        attachment
+        for tweet in json_request.response["tweets"]
+        for attachment in tweet["attachments"]
+    ]
+
+    assert attachments
+    assert all("original" in attachment for attachment in attachments)
+    assert json_request.response == orm_request.response
+
+
+async def test_feed_attachments_are_public_urls(async_session: AsyncSession):
+    """Test TweetsMethods.get_posts_list() builds URLs of the stored media keys.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    request = await TweetsMethods.get_posts_list(
+        user_id=3,
+        pagination=Pagination(offset=None, limit=100),
+        async_session=async_session,
+    )
+    attachments: list[str] = [
+        attachment
+        for tweet in request.response["tweets"]
+        for attachment in tweet["attachments"]
+    ]
+
+    assert "{base_url}/cat1.jpg".format(base_url=MEDIA_PUBLIC_URL) in attachments
+
+
 async def test_add_tweet_with_no_media(async_session: AsyncSession):
     """Test TweetsMethods.add() method with no media.
 
@@ -294,3 +433,257 @@ async def test_can_not_delete_nonexistent_like(async_session: AsyncSession):
     assert request.status_code == 404
     assert request.response.get("result") is False
     assert request.response.get("error_type") == "DataNotFound"
+
+
+async def test_like_count_follows_likes(async_session: AsyncSession):
+    """Test LikesMethods keep Tweets.like_count.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    tweet_id = 3
+    count_expr = select(Tweets.like_count).where(Tweets.id == tweet_id)
+
+    async with async_session as session:
+        count_before = (await session.execute(count_expr)).scalar_one()
+        await LikesMethods.add(
+            user_id=2, tweet_id=tweet_id, async_session=async_session,
+        )
+        count_after_add = (await session.execute(count_expr)).scalar_one()
+        await LikesMethods.delete(
+            user_id=2, tweet_id=tweet_id, async_session=async_session,
+        )
+        count_after_delete = (await session.execute(count_expr)).scalar_one()
+
+    assert count_after_add == count_before + 1
+    assert count_after_delete == count_before
+
+
+async def add_liked_tweet(async_session: AsyncSession, liker_ids: list[int]) -> int:
+    """Add tweet of user 1 liked by the users.
+
+    Parameters:
+        async_session: AsyncSession
+        liker_ids: ids of the users who liked the tweet
+
+    Returns:
+        int: tweet id
+    """
+    async with async_session as session:
+        tweet = Tweets(user_id=1, data="Liked tweet", like_count=len(liker_ids))
+        session.add(tweet)
+        await session.flush()
+        session.add_all(
+            [Likes(user_id=liker_id, tweet_id=tweet.id) for liker_id in liker_ids],
+        )
+        await session.commit()
+        return tweet.id
+
+
+async def test_feed_like_summary(
+    async_session: AsyncSession, monkeypatch: pytest.MonkeyPatch,
+):
+    """Test TweetsMethods.get_posts_list() returns like summary of posts.
+
+    Parameters:
+        async_session: AsyncSession
+        monkeypatch: MonkeyPatch
+    """
+    liker_ids = [1, 2, 3, 4]
+    tweet_id = await add_liked_tweet(async_session, liker_ids)
+
+    pagination = Pagination(offset=None, limit=100)
+    monkeypatch.setattr(tweets_methods, "FEED_QUERY", "json")
+    json_request = await TweetsMethods.get_posts_list(
+        user_id=1, pagination=pagination, async_session=async_session,
+        likers_preview=2,
+    )
+    monkeypatch.setattr(tweets_methods, "FEED_QUERY", "orm")
+    orm_request = await TweetsMethods.get_posts_list(
+        user_id=1, pagination=pagination, async_session=async_session,
+        likers_preview=2,
+    )
+
+    await TweetsMethods.delete(
+        user_id=1, tweet_id=tweet_id, async_session=async_session,
+    )
+
+    assert json_request.response == orm_request.response
+    tweet = next(
+        tweet for tweet in json_request.response["tweets"]
+        if tweet["id"] == tweet_id
+    )
+    assert tweet["like_count"] == len(liker_ids)
+    assert tweet["liked"] is True
+    assert [liker["user_id"] for liker in tweet["likes"]] == liker_ids[:2]
+
+
+async def test_get_likers_by_cursor(async_session: AsyncSession):
+    """Test LikesMethods.get_likers() pages likers of tweet by next_cursor.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    liker_ids = [1, 2, 3]
+    tweet_id = await add_liked_tweet(async_session, liker_ids)
+
+    first_page = await LikesMethods.get_likers(
+        tweet_id=tweet_id,
+        pagination=Pagination(offset=None, limit=2),
+        async_session=async_session,
+    )
+    last_page = await LikesMethods.get_likers(
+        tweet_id=tweet_id,
+        pagination=Pagination(
+            offset=None,
+            limit=2,
+            after=decode_cursor(first_page.response["next_cursor"], size=1),
+        ),
+        async_session=async_session,
+    )
+
+    await TweetsMethods.delete(
+        user_id=1, tweet_id=tweet_id, async_session=async_session,
+    )
+
+    likers = first_page.response["likes"] + last_page.response["likes"]
+    assert [liker["user_id"] for liker in likers] == liker_ids
+    assert last_page.response["next_cursor"] is None
+
+
+async def test_can_not_get_likers_of_nonexistent_tweet(async_session: AsyncSession):
+    """Test LikesMethods.get_likers() method.
+
+    Returns error if tweet doesn't exist.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    request = await LikesMethods.get_likers(
+        tweet_id=100,
+        pagination=Pagination(offset=None, limit=None),
+        async_session=async_session,
+    )
+    assert request.status_code == 404
+    assert request.response.get("error_type") == "DataNotFound"
+
+
+async def add_tweet_with_media(async_session: AsyncSession, media_id: int) -> int:
+    """Add tweet with the media attached twice.
+
+    Parameters:
+        async_session: AsyncSession
+        media_id: int
+
+    Returns:
+        int: id of the tweet
+    """
+    request = await TweetsMethods.add(
+        user_id=1,
+        data={"tweet_data": "meme", "tweet_media_ids": [media_id, media_id]},
+        async_session=async_session,
+    )
+    return request.response["tweet_id"]
+
+
+async def get_ref_count(async_session: AsyncSession, media_id: int) -> Optional[int]:
+    """Return ref_count of the media.
+
+    Parameters:
+        async_session: AsyncSession
+        media_id: int
+
+    Returns:
+        ref_count or None if the media doesn't exist
+    """
+    async with async_session as session:
+        request = await session.execute(
+            select(Medias.ref_count).where(Medias.id == media_id),
+        )
+        return request.scalar_one_or_none()
+
+
+async def age_media(async_session: AsyncSession, media_id: int) -> None:
+    """Move the last upload of the media two days back.
+
+    Parameters:
+        async_session: AsyncSession
+        media_id: int
+    """
+    async with async_session as session:
+        await session.execute(
+            update(Medias)
+            .where(Medias.id == media_id)
+            .values(uploaded_at=func.localtimestamp() - timedelta(days=2)),
+        )
+        await session.commit()
+
+
+async def test_shared_media_is_kept(async_session: AsyncSession):
+    """Test TweetsMethods.delete() method.
+
+    Media is kept while another tweet references it.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    key = "meme3.jpg"
+    add_media = await MediasMethods.add(key=key, async_session=async_session)
+    media_id: int = add_media.response["media_id"]
+    tweet_id: int = await add_tweet_with_media(async_session, media_id)
+    await add_tweet_with_media(async_session, media_id)
+
+    request = await TweetsMethods.delete(
+        user_id=1, tweet_id=tweet_id, async_session=async_session,
+    )
+
+    assert request.response == {"result": True}
+    assert await get_ref_count(async_session, media_id) == 1
+
+
+async def test_media_is_released_by_last_tweet(async_session: AsyncSession):
+    """Test TweetsMethods.delete() method.
+
+    Media is deleted with the last tweet referencing it.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    key = "meme4.jpg"
+    add_media = await MediasMethods.add(key=key, async_session=async_session)
+    media_id: int = add_media.response["media_id"]
+    tweet_id: int = await add_tweet_with_media(async_session, media_id)
+    await age_media(async_session, media_id)
+
+    request = await TweetsMethods.delete(
+        user_id=1, tweet_id=tweet_id, async_session=async_session,
+    )
+
+    assert request.response == {"result": True}
+    assert await get_ref_count(async_session, media_id) is None
+
+
+async def test_uploaded_again_media_is_kept(async_session: AsyncSession):
+    """Test TweetsMethods.delete() method.
+
+    Media uploaded again is kept for the new upload after the last tweet
+    referencing it is deleted.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    key = "meme5.jpg"
+    add_media = await MediasMethods.add(key=key, async_session=async_session)
+    tweet_id: int = await add_tweet_with_media(
+        async_session, add_media.response["media_id"],
+    )
+    add_again = await MediasMethods.add(key=key, async_session=async_session)
+    await TweetsMethods.delete(user_id=1, tweet_id=tweet_id, async_session=async_session)
+
+    request = await TweetsMethods.add(
+        user_id=1,
+        data={"tweet_data": "meme", "tweet_media_ids": [add_again.response["media_id"]]},
+        async_session=async_session,
+    )
+
+    assert request.status_code == 201
@@ -1,8 +1,11 @@
+import pytest
 from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from src.database_models.methods import users as users_methods  # noqa
 from src.database_models.methods.users import CookiesMethods  # noqa
 from src.database_models.methods.users import FollowersMethods, UsersMethods # noqa
 from database_models.users_orm_models import Cookies, Followers, Users  # noqa
+from utils.api_keys import get_key_digest  # noqa
 
 
 async def test_get_user_info_by_id(async_session: AsyncSession):
@@ -215,7 +218,7 @@ async def test_add_new_api_key(async_session: AsyncSession):
 
         check_request_after = await session.execute(check_expr)
         check_result_after = check_request_after.scalars().one_or_none()
-        assert check_result_after is not None
+        assert check_result_after.lookup == get_key_digest(key)
         assert check_result_after.user_id == user_id
 
 
@@ -236,3 +239,82 @@ async def test_cant_add_existing_api_key(async_session: AsyncSession):
     assert request.status_code == 400
     assert request.response.get("result") is False
     assert request.response.get("error_type") == "UniqueViolationError"
+
+
+async def test_get_user_id_by_api_key(async_session: AsyncSession):
+    """Test CookiesMethods.get_user_id() method.
+
+    Return user id by api-key and backfill the lookup digest of the key.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    key = "q1w2e3r4t5y6u7i8o9p0a1s2d3f4g5h6"
+    check_expr = select(Cookies).where(Cookies.lookup == get_key_digest(key))
+
+    request = await CookiesMethods.get_user_id(
+        api_key=key,
+        async_session=async_session,
+    )
+    assert request.status_code == 200
+    assert request.response.get("result") is True
+    assert request.response.get("user_id") == 2
+
+    async with async_session as session:
+        check_request = await session.execute(check_expr)
+        check_result = check_request.scalars().one_or_none()
+        assert check_result.user_id == 2
+
+    request_by_digest = await CookiesMethods.get_user_id(
+        api_key=key,
+        async_session=async_session,
+    )
+    assert request_by_digest.response.get("user_id") == 2
+
+
+async def test_cant_get_user_id_by_legacy_api_key(
+    async_session: AsyncSession, monkeypatch: pytest.MonkeyPatch,
+):
+    """Test CookiesMethods.get_user_id() method.
+
+    Can not return user id by api-key without digest if AUTH_LEGACY_KEYS is off.
+
+    Parameters:
+        async_session: AsyncSession
+        monkeypatch: MonkeyPatch
+    """
+    key = "l3g4c7k8e9y0o1f2f3a4b5c6d7e8f9a0"
+    monkeypatch.setattr(users_methods, "AUTH_LEGACY_KEYS", False)
+    async with async_session as session:
+        legacy_key = Cookies(user_id=2, hash=func.crypt(key, func.gen_salt("md5")))
+        session.add(legacy_key)
+        await session.commit()
+
+    request = await CookiesMethods.get_user_id(
+        api_key=key,
+        async_session=async_session,
+    )
+    async with async_session as session:
+        await session.delete(legacy_key)
+        await session.commit()
+
+    assert request.status_code == 401
+    assert request.response.get("error_type") == "Unauthorized"
+
+
+async def test_cant_get_user_id_by_nonexistent_api_key(async_session: AsyncSession):
+    """Test CookiesMethods.get_user_id() method.
+
+    Can not return user id if api-key does not exist.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    request = await CookiesMethods.get_user_id(
+        api_key="0000000000aaaaaaaaaa0000000000aa",
+        async_session=async_session,
+    )
+
+    assert request.status_code == 401
+    assert request.response.get("result") is False
+    assert request.response.get("error_type") == "Unauthorized"
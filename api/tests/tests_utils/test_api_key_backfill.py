@@ -0,0 +1,40 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database_models.users_orm_models import Cookies  # noqa
+from utils.api_key_backfill import backfill_key_digests, iter_batches  # noqa
+from utils.api_keys import get_key_digest  # noqa
+
+
+def test_keys_are_read_by_batches():
+    """Test iter_batches() strips the keys and skips the empty lines."""
+    lines: list[str] = ["first\n", "\n", " second ", "third\n"]
+
+    assert list(iter_batches(lines, batch_size=2)) == [
+        ["first", "second"], ["third"],
+    ]
+
+
+async def test_legacy_key_digest_is_backfilled(async_session: AsyncSession):
+    """Test backfill_key_digests() stores the digest of the known key only.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    key = "b4c7f1l2e3g4a5c6y7k8e9y0b1a2c3k4"
+    async with async_session as session:
+        legacy_key = Cookies(user_id=1, hash=func.crypt(key, func.gen_salt("md5")))
+        session.add(legacy_key)
+        await session.flush()
+
+        backfilled: int = await backfill_key_digests(
+            session, [key, "unknown-api-key"],
+        )
+        lookup_request = await session.execute(
+            select(Cookies.lookup).where(Cookies.id == legacy_key.id),
+        )
+        lookup: str = lookup_request.scalar_one()
+        await session.rollback()
+
+    assert backfilled == 1
+    assert lookup == get_key_digest(key)
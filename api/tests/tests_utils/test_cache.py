@@ -0,0 +1,47 @@
+import asyncio
+
+from utils.cache import TTLCache  # noqa
+
+
+async def test_ttl_cache_returns_stored_value():
+    """Test TTLCache.get() returns value stored by TTLCache.set()."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("key", 1)
+
+    assert cache.get("key") == 1
+    assert cache.get("missing") is None
+
+
+async def test_ttl_cache_expires_values():
+    """Test TTLCache drops values after their TTL."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("short", 1, ttl=0.01)
+    cache.set("expired", 2, ttl=-1)
+    await asyncio.sleep(0.02)
+
+    assert cache.get("short") is None
+    assert cache.get("expired") is None
+    assert not cache
+
+
+async def test_ttl_cache_evicts_least_recently_used():
+    """Test TTLCache evicts least recently used value when it is full."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+    cache.set("third", 3)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+
+
+async def test_ttl_cache_deletes_value():
+    """Test TTLCache.delete() drops the value."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set("key", 1)
+    cache.delete("key")
+    cache.delete("missing")
+
+    assert cache.get("key") is None
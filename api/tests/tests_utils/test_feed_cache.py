@@ -0,0 +1,67 @@
+from typing import AsyncGenerator
+
+import pytest
+from redis.asyncio import Redis
+
+from config import REDIS_URL  # noqa
+from utils.feed_cache import FeedCache  # noqa
+
+
+@pytest.fixture
+async def redis() -> AsyncGenerator[Redis, None]:
+    """Async fixture: yield Redis connection with empty feed cache.
+
+    Yields:
+        Redis
+    """
+    connection = Redis.from_url(REDIS_URL)
+    feed_cache_keys = await connection.keys("{prefix}*".format(prefix=FeedCache.prefix))
+    if feed_cache_keys:
+        await connection.delete(*feed_cache_keys)
+    yield connection
+    await connection.close()
+
+
+async def cache_page(cache: FeedCache, user_id: int, author_ids: list[int]) -> None:
+    """Cache page of the user's feed with tweets of the authors.
+
+    Parameters:
+        cache: FeedCache
+        user_id: owner of the feed
+        author_ids: authors of the tweets in the feed
+    """
+    cached_feed = await cache.get(user_id, "limit=10")
+    cached_feed.page = b"page"
+    await cache.set(user_id, cached_feed, "limit=10", author_ids)
+
+
+async def test_author_event_drops_only_tagged_feeds(redis: Redis):
+    """Test FeedCache.invalidate_authors() drops feeds with the author's tweets.
+
+    Parameters:
+        redis: Redis
+    """
+    cache = FeedCache(redis, ttl=60)
+    await cache_page(cache, user_id=1, author_ids=[1, 10])
+    await cache_page(cache, user_id=2, author_ids=[2, 20])
+
+    invalidated = await cache.invalidate_authors([10])
+
+    assert invalidated == 1
+    assert (await cache.get(1, "limit=10")).page is None
+    assert (await cache.get(2, "limit=10")).page == b"page"
+
+
+async def test_stale_page_is_not_cached(redis: Redis):
+    """Test FeedCache.set() skips page selected before the feed was invalidated.
+
+    Parameters:
+        redis: Redis
+    """
+    cache = FeedCache(redis, ttl=60)
+    cached_feed = await cache.get(1, "limit=10")
+    await cache.invalidate_users([1])
+    cached_feed.page = b"stale page"
+    await cache.set(1, cached_feed, "limit=10", [1])
+
+    assert (await cache.get(1, "limit=10")).page is None
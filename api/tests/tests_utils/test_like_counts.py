@@ -0,0 +1,28 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database_models.tweets_orm_models import Tweets  # noqa
+from utils.like_counts import reconcile_like_counts_batch  # noqa
+
+
+async def test_reconcile_fixes_drifted_like_count(async_session: AsyncSession):
+    """Test reconcile_like_counts_batch() recounts likes of drifted tweets.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    tweet_id = 5
+    async with async_session as session:
+        await session.execute(
+            update(Tweets).where(Tweets.id == tweet_id).values(like_count=42),
+        )
+        await session.commit()
+
+        last_id, fixed = await reconcile_like_counts_batch(session, after_id=0)
+        request = await session.execute(
+            select(Tweets.like_count).where(Tweets.id == tweet_id),
+        )
+
+    assert last_id >= tweet_id
+    assert fixed == 1
+    assert request.scalar_one() == 0
@@ -0,0 +1,93 @@
+import time
+from typing import AsyncGenerator
+
+import pytest
+from database_models.db_config import ResponseData  # noqa
+from utils import s3_config  # noqa
+from utils.s3_config import LocalS3Client, MultipartUpload, object_exists  # noqa
+
+# seconds added to the requests by LocalS3Client
+LATENCY = 0.05
+
+
+async def iter_chunks(content: bytes, size: int) -> AsyncGenerator[bytes, None]:
+    """Async generator yields the content by chunks.
+
+    Parameters:
+        content: bytes
+        size: size of the chunks
+
+    Yields:
+        bytes
+    """
+    for start in range(0, len(content), size):
+        yield content[start:start + size]
+
+
+async def test_local_upload_and_delete():
+    """Test LocalS3Client stores uploaded media and deletes them."""
+    s3_client = LocalS3Client(bucket_name="local")
+
+    first = await s3_client.upload(iter_chunks(b"first", 2), "first.jpg")
+    second = await s3_client.upload(iter_chunks(b"second", 2), "second.jpg")
+    keys: list[str] = [first.response["key"], second.response["key"]]
+    assert set(s3_client.storage.objects) == set(keys)
+
+    res: ResponseData = await s3_client.delete_multiple(keys)
+
+    assert res.response == {"result": True, "failed_keys": []}
+    assert not s3_client.storage.objects
+
+
+async def test_local_multipart_upload():
+    """Test MultipartUpload joins the parts stored by LocalClient."""
+    s3_client = LocalS3Client(bucket_name="local")
+    content = b"content of several parts"
+    async with s3_client.get_client() as client:
+        key: str = await MultipartUpload(
+            client, s3_client.bucket_name, ".txt", part_size=4,
+        ).upload(iter_chunks(content, 3))
+
+    assert s3_client.storage.objects == {key: content}
+
+
+async def test_local_errors_are_injected():
+    """Test LocalS3Client fails the requests with the error rate."""
+    s3_client = LocalS3Client(bucket_name="local", error_rate=1)
+
+    upload_result: ResponseData = await s3_client.upload(
+        iter_chunks(b"data", 4), "failed.jpg",
+    )
+    delete_result: ResponseData = await s3_client.delete_multiple(["failed.jpg"])
+
+    assert upload_result.status_code == 500
+    assert delete_result.response["failed_keys"] == ["failed.jpg"]
+
+
+async def test_local_latency_is_injected():
+    """Test LocalS3Client delays every request by the latency."""
+    s3_client = LocalS3Client(bucket_name="local", latency=LATENCY)
+    started: float = time.monotonic()
+    async with s3_client.get_client() as client:
+        assert not await object_exists(client, s3_client.bucket_name, "missing.jpg")
+
+    assert time.monotonic() - started >= LATENCY
+
+
+def test_memory_backend_is_selected(monkeypatch: pytest.MonkeyPatch):
+    """Test create_s3_client() returns LocalS3Client with S3_BACKEND "memory".
+
+    Parameters:
+        monkeypatch: MonkeyPatch
+    """
+    monkeypatch.setattr(s3_config, "S3_BACKEND", "memory")
+
+    assert isinstance(s3_config.create_s3_client(), LocalS3Client)
+
+
+async def test_local_client_inherits_state():
+    """Test LocalS3Client has the state set by S3Client.__init__()."""
+    s3_client = LocalS3Client(bucket_name="local")
+
+    assert s3_client.config["endpoint_url"] == s3_client.endpoint_url
+    await s3_config.S3Client.close(s3_client)
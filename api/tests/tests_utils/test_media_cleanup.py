@@ -0,0 +1,202 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import MEDIA_CLEANUP_MAX_ATTEMPTS  # noqa
+from database_models.methods.medias import expire_pending_medias  # noqa
+from database_models.methods.medias import release_tweet_medias  # noqa
+from database_models.tweets_orm_models import MediaCleanupJobs, Medias  # noqa
+from database_models.tweets_orm_models import MediasTweets, Tweets  # noqa
+from utils import media_cleanup  # noqa
+from utils.media_cleanup import MediaCleanupWorker, get_dead_jobs  # noqa
+from utils.media_cleanup import process_cleanup_jobs  # noqa
+from utils.s3_config import create_s3_client, object_exists  # noqa
+
+
+class FlakyBatch:
+    """Stand-in of run_cleanup_batch() failing the first batch."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.calls = 0
+        self.retried = asyncio.Event()
+
+    async def __call__(self, s3_client) -> int:
+        """Raise KeyError on the first call, return 0 processed jobs later.
+
+        Parameters:
+            s3_client: S3Client, ignored
+
+        Returns:
+            int
+
+        Raises:
+            KeyError: on the first call
+        """
+        self.calls += 1
+        if self.calls == 1:
+            raise KeyError("unexpected")
+        self.retried.set()
+        return 0
+
+
+async def get_job(session: AsyncSession, job_id: int) -> MediaCleanupJobs:
+    """Return job read from the db.
+
+    Parameters:
+        session: AsyncSession
+        job_id: int
+
+    Returns:
+        MediaCleanupJobs or None
+    """
+    request = await session.execute(
+        select(MediaCleanupJobs)
+        .where(MediaCleanupJobs.id == job_id)
+        .execution_options(populate_existing=True),
+    )
+    return request.scalar_one_or_none()
+
+
+async def test_release_queues_cleanup_job(async_session: AsyncSession):
+    """Test release_tweet_medias() queues objects of the deleted medias."""
+    key: str = "released.jpg"
+    async with async_session as session:
+        tweet = Tweets(user_id=1, data="released")
+        media = Medias(
+            key=key,
+            ref_count=1,
+            uploaded_at=func.localtimestamp() - timedelta(days=2),
+        )
+        session.add_all([tweet, media])
+        await session.flush()
+        session.add(MediasTweets(tweet_id=tweet.id, media_id=media.id))
+        await session.flush()
+
+        released_keys: list[str] = await release_tweet_medias(session, tweet.id)
+        jobs_request = await session.execute(
+            select(MediaCleanupJobs.key).where(MediaCleanupJobs.key == key),
+        )
+        queued_keys: list[str] = jobs_request.scalars().all()
+        await session.rollback()
+
+    assert released_keys == [key]
+    assert queued_keys == [key]
+
+
+async def test_cleanup_job_deletes_object(async_session: AsyncSession):
+    """Test process_cleanup_jobs() deletes the object and the done job."""
+    s3_client = create_s3_client()
+    async with s3_client.get_client() as client:
+        await client.put_object(
+            Bucket=s3_client.bucket_name, Key="cleanup.jpg", Body=b"data",
+        )
+        async with async_session as session:
+            job = MediaCleanupJobs(key="cleanup.jpg")
+            session.add(job)
+            await session.flush()
+
+            await process_cleanup_jobs(session, s3_client, [job])
+
+            assert await get_job(session, job.id) is None
+        assert not await object_exists(client, s3_client.bucket_name, "cleanup.jpg")
+
+
+async def test_cleanup_job_keeps_stored_object(async_session: AsyncSession):
+    """Test process_cleanup_jobs() keeps the object of a media stored again."""
+    s3_client = create_s3_client()
+    key: str = "stored_again.jpg"
+    async with s3_client.get_client() as client:
+        await client.put_object(
+            Bucket=s3_client.bucket_name, Key="stored_again.jpg", Body=b"data",
+        )
+        async with async_session as session:
+            job = MediaCleanupJobs(key=key)
+            session.add_all([job, Medias(key=key)])
+            await session.flush()
+
+            await process_cleanup_jobs(session, s3_client, [job])
+
+            assert await get_job(session, job.id) is None
+        assert await object_exists(client, s3_client.bucket_name, "stored_again.jpg")
+
+
+async def test_failed_cleanup_job_is_retried(async_session: AsyncSession):
+    """Test process_cleanup_jobs() reschedules the failed job."""
+    s3_client = create_s3_client()
+    s3_client.bucket_name = "missing-bucket"
+    async with async_session as session:
+        job = MediaCleanupJobs(key="retried.jpg")
+        session.add(job)
+        await session.flush()
+
+        await process_cleanup_jobs(session, s3_client, [job])
+
+        failed_job: MediaCleanupJobs = await get_job(session, job.id)
+        now_request = await session.execute(select(func.localtimestamp()))
+
+    assert failed_job.attempts == 1
+    assert failed_job.dead_at is None
+    assert failed_job.last_error
+    assert failed_job.available_at > now_request.scalar_one()
+
+
+async def test_failed_cleanup_job_is_dead_lettered(async_session: AsyncSession):
+    """Test process_cleanup_jobs() dead-letters the job out of attempts."""
+    s3_client = create_s3_client()
+    s3_client.bucket_name = "missing-bucket"
+    async with async_session as session:
+        job = MediaCleanupJobs(
+            key="dead.jpg", attempts=MEDIA_CLEANUP_MAX_ATTEMPTS - 1,
+        )
+        session.add(job)
+        await session.flush()
+
+        await process_cleanup_jobs(session, s3_client, [job])
+
+        dead_jobs: list[MediaCleanupJobs] = await get_dead_jobs(session)
+
+    assert job.id in {dead_job.id for dead_job in dead_jobs}
+
+
+async def test_expired_pending_media_is_queued(async_session: AsyncSession):
+    """Test expire_pending_medias() deletes the expired media and queues its object."""
+    key: str = "expired.jpg"
+    async with async_session as session:
+        expired = Medias(key=key, expires_at=func.localtimestamp() - timedelta(hours=1))
+        pending = Medias(
+            key="pending.jpg",
+            expires_at=func.localtimestamp() + timedelta(hours=1),
+        )
+        session.add_all([expired, pending])
+        await session.flush()
+
+        expired_keys: list[str] = await expire_pending_medias(session, batch_size=100)
+        jobs_request = await session.execute(
+            select(MediaCleanupJobs.key).where(MediaCleanupJobs.key == key),
+        )
+        queued_keys: list[str] = jobs_request.scalars().all()
+        await session.rollback()
+
+    assert expired_keys == [key]
+    assert queued_keys == [key]
+
+
+async def test_worker_survives_unexpected_error(monkeypatch: pytest.MonkeyPatch):
+    """Test MediaCleanupWorker keeps running after a batch raised an error.
+
+    Parameters:
+        monkeypatch: MonkeyPatch
+    """
+    flaky_batch = FlakyBatch()
+    monkeypatch.setattr(media_cleanup, "run_cleanup_batch", flaky_batch)
+    monkeypatch.setattr(media_cleanup, "get_backoff", lambda attempts: timedelta(0))
+
+    async with MediaCleanupWorker(create_s3_client(), interval=60):
+        await asyncio.wait_for(flaky_batch.retried.wait(), timeout=5)
+
+    assert flaky_batch.calls == 2
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database_models.tweets_orm_models import Medias, MediasTweets, Tweets  # noqa
+from utils.media_gc import MediaGCStats, collect_orphaned_medias  # noqa
+from utils.media_gc import delete_orphaned_medias, find_orphaned_medias  # noqa
+from utils.s3_config import create_s3_client, object_exists  # noqa
+
+
+async def add_old_media(session: AsyncSession, name: str) -> Medias:
+    """Add media uploaded two days ago and its object.
+
+    Parameters:
+        session: AsyncSession
+        name: name of the object
+
+    Returns:
+        Medias
+    """
+    s3_client = create_s3_client()
+    async with s3_client.get_client() as client:
+        await client.put_object(Bucket=s3_client.bucket_name, Key=name, Body=b"data")
+    media = Medias(key=name, uploaded_at=func.localtimestamp() - timedelta(days=2))
+    session.add(media)
+    await session.flush()
+    return media
+
+
+async def attach_to_tweet(session: AsyncSession, media: Medias) -> None:
+    """Attach the media to a new tweet.
+
+    Parameters:
+        session: AsyncSession
+        media: Medias
+    """
+    tweet = Tweets(user_id=1, data="attached")
+    session.add(tweet)
+    await session.flush()
+    session.add(MediasTweets(tweet_id=tweet.id, media_id=media.id))
+    await session.flush()
+
+
+async def media_exists(session: AsyncSession, media_id: int) -> bool:
+    """Return True if the media is stored.
+
+    Parameters:
+        session: AsyncSession
+        media_id: int
+
+    Returns:
+        bool
+    """
+    request = await session.execute(select(Medias.id).where(Medias.id == media_id))
+    return request.scalar_one_or_none() is not None
+
+
+async def test_find_orphaned_medias(async_session: AsyncSession):
+    """Test find_orphaned_medias() skips attached and recently uploaded medias."""
+    async with async_session as session:
+        orphaned: Medias = await add_old_media(session, "orphaned.jpg")
+        attached: Medias = await add_old_media(session, "attached.jpg")
+        await attach_to_tweet(session, attached)
+        recent = Medias(key="recent.jpg")
+        session.add(recent)
+
+        medias = await find_orphaned_medias(session, after_id=0, grace_period=86400)
+        await session.rollback()
+
+    found_ids: set[int] = {media.id for media in medias}
+    assert orphaned.id in found_ids
+    assert attached.id not in found_ids
+    assert recent.id not in found_ids
+
+
+async def test_delete_orphaned_medias(async_session: AsyncSession):
+    """Test delete_orphaned_medias() deletes the objects and then the medias."""
+    s3_client = create_s3_client()
+    stats = MediaGCStats()
+    async with s3_client.get_client() as client:
+        async with async_session as session:
+            media: Medias = await add_old_media(session, "collected.jpg")
+            medias = await find_orphaned_medias(session, after_id=media.id - 1)
+
+            await delete_orphaned_medias(session, s3_client, medias, stats)
+
+            assert not await media_exists(session, media.id)
+        assert not await object_exists(client, s3_client.bucket_name, "collected.jpg")
+
+    assert stats.deleted_medias == 1
+
+
+async def test_collect_orphaned_medias_dry_run():
+    """Test collect_orphaned_medias() doesn't delete the medias in dry-run mode."""
+    stats: MediaGCStats = await collect_orphaned_medias(
+        create_s3_client(), dry_run=True, grace_period=0,
+    )
+
+    assert stats.found_medias > 0
+    assert stats.deleted_medias == 0
+    assert "found={found}".format(found=stats.found_medias) in stats.format()
@@ -0,0 +1,54 @@
+import pytest
+from botocore.exceptions import EndpointConnectionError
+from sqlalchemy.ext.asyncio import AsyncSession
+from database_models.db_config import ResponseData  # noqa
+from utils import media_uploads  # noqa
+from utils.media_uploads import confirm_upload, create_upload_slot  # noqa
+from utils.s3_config import LocalS3Client  # noqa
+
+
+async def fail_connection(*args) -> None:
+    """Stand-in of get_object_size() failing to connect to the storage.
+
+    Parameters:
+        args: client, bucket_name and key, ignored
+
+    Raises:
+        EndpointConnectionError: always
+    """
+    raise EndpointConnectionError(endpoint_url="http://storage")
+
+
+async def test_slot_key_has_normalised_extension(async_session: AsyncSession):
+    """Test create_upload_slot() names the object by a short extension.
+
+    Parameters:
+        async_session: AsyncSession
+    """
+    slot: ResponseData = await create_upload_slot(
+        LocalS3Client(bucket_name="local"), "a" * 255, async_session,
+    )
+
+    assert slot.status_code == 201
+    assert slot.response["upload_fields"]["key"].endswith(".bin")
+
+
+async def test_confirm_with_storage_down(
+    async_session: AsyncSession, monkeypatch: pytest.MonkeyPatch,
+):
+    """Test confirm_upload() returns an error if the storage is unreachable.
+
+    Parameters:
+        async_session: AsyncSession
+        monkeypatch: MonkeyPatch
+    """
+    s3_client = LocalS3Client(bucket_name="local")
+    slot: ResponseData = await create_upload_slot(s3_client, "down.jpg", async_session)
+    monkeypatch.setattr(media_uploads, "get_object_size", fail_connection)
+
+    confirm_result: ResponseData = await confirm_upload(
+        s3_client, slot.response["media_id"], async_session,
+    )
+
+    assert confirm_result.status_code == 500
+    assert confirm_result.response["result"] is False
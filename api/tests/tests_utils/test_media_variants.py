@@ -0,0 +1,96 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image, UnidentifiedImageError
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database_models.methods.medias import set_media_variants  # noqa
+from database_models.tweets_orm_models import MediaCleanupJobs, Medias  # noqa
+from utils.media_variants import MediaVariantsPool, render_variants  # noqa
+from utils.s3_config import create_s3_client, object_exists  # noqa
+
+
+def test_render_variants():
+    """Test render_variants() fits the image into the variant sizes."""
+    buffer = BytesIO()
+    Image.new("RGB", (2000, 1000), "orange").save(buffer, format="jpeg")
+
+    variants: dict[str, bytes] = render_variants(buffer.getvalue(), "webp")
+
+    sizes: dict[str, tuple] = {
+        name: Image.open(BytesIO(content)).size for name, content in variants.items()
+    }
+    assert sizes == {"small": (320, 160), "medium": (1080, 540)}
+
+
+def test_render_variants_of_not_image():
+    """Test render_variants() rejects a media which is not an image."""
+    with pytest.raises(UnidentifiedImageError):
+        render_variants(b"not an image")
+
+
+async def test_variants_of_deleted_media_are_queued(async_session: AsyncSession):
+    """Test set_media_variants() queues the variants of a deleted media."""
+    async with async_session as session:
+        stored: bool = await set_media_variants(session, 0, {"small": "small.webp"})
+        jobs_request = await session.execute(
+            select(MediaCleanupJobs.key).where(MediaCleanupJobs.key == "small.webp"),
+        )
+        queued_keys: list[str] = jobs_request.scalars().all()
+        await session.rollback()
+
+    assert not stored
+    assert queued_keys == ["small.webp"]
+
+
+async def put_image(key: str) -> None:
+    """Put tests/medias/cat2.jpg to the test bucket.
+
+    Parameters:
+        key: name of the object
+    """
+    s3_client = create_s3_client()
+    with open("tests/medias/cat2.jpg", "rb") as file:
+        async with s3_client.get_client() as client:
+            await client.put_object(
+                Bucket=s3_client.bucket_name, Key=key, Body=file.read(),
+            )
+
+
+async def pop_variants(session: AsyncSession, media_id: int) -> dict[str, str]:
+    """Return variants of the media and delete it.
+
+    Parameters:
+        session: AsyncSession
+        media_id: int
+
+    Returns:
+        dict: keys of the variants by their names
+    """
+    variants_request = await session.execute(
+        select(Medias.variants).where(Medias.id == media_id),
+    )
+    await session.execute(delete(Medias).where(Medias.id == media_id))
+    await session.commit()
+    return variants_request.scalar_one()
+
+
+async def test_pool_renders_variants(async_session: AsyncSession):
+    """Test MediaVariantsPool uploads variants of the media and stores their keys."""
+    s3_client = create_s3_client()
+    await put_image("variants.jpg")
+    async with async_session as session:
+        media = Medias(key="variants.jpg")
+        session.add(media)
+        await session.commit()
+
+    async with MediaVariantsPool(s3_client, workers=1) as pool:
+        await pool.submit(media.id, "variants.jpg")
+
+    async with async_session as session:
+        variants: dict[str, str] = await pop_variants(session, media.id)
+
+    assert set(variants) == {"small", "medium"}
+    async with s3_client.get_client() as client:
+        assert await object_exists(client, s3_client.bucket_name, variants["small"])
@@ -0,0 +1,19 @@
+from utils.metrics import Metrics  # noqa
+
+
+async def test_metrics_snapshot():
+    """Test Metrics.snapshot() returns counters, gauges and timers."""
+    registry = Metrics()
+    registry.increment("requests")
+    registry.increment("requests", 2)
+    registry.register_gauge("in_use", lambda: 3)
+    registry.observe("latency", 0.5)
+    registry.observe("latency", 1.5)
+
+    snapshot = registry.snapshot()
+
+    assert snapshot["counters"] == {"requests": 3}
+    assert snapshot["gauges"] == {"in_use": 3}
+    assert snapshot["timers"]["latency"] == {
+        "count": 2, "sum": 2.0, "avg": 1.0, "max": 1.5,
+    }
@@ -0,0 +1,28 @@
+import pytest
+
+from utils.pagination import MAX_CURSOR_KEY, decode_cursor, encode_cursor  # noqa
+
+
+def test_cursor_round_trip():
+    """Test decode_cursor() returns position encoded by encode_cursor()."""
+    assert decode_cursor(encode_cursor(12, 345)) == (12, 345)
+
+
+def test_single_key_cursor_round_trip():
+    """Test decode_cursor() decodes position of the given size."""
+    assert decode_cursor(encode_cursor(7), size=1) == (7,)
+    with pytest.raises(ValueError):
+        decode_cursor(encode_cursor(12, 345), size=1)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor", "", "MTI6", "YTpi", encode_cursor(MAX_CURSOR_KEY + 1, 1),
+])
+def test_malformed_cursor(cursor: str):
+    """Test decode_cursor() rejects malformed cursors.
+
+    Parameters:
+        cursor: str
+    """
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
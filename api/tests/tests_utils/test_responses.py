@@ -0,0 +1,30 @@
+import json
+
+from schemas import UserBaseData  # noqa
+from utils.responses import FastJSONResponse  # noqa
+
+
+def test_fast_json_response_matches_json():
+    """Test FastJSONResponse renders the same JSON as the stdlib encoder."""
+    content = {
+        "result": True,
+        "tweets": [{"id": 1, "content": "Привет", "likes": [], "liked": False}],
+        "next_cursor": None,
+    }
+    response = FastJSONResponse(content=content)
+
+    assert json.loads(response.body) == content
+    assert response.media_type == "application/json"
+
+
+def test_fast_json_response_encodes_other_objects():
+    """Test FastJSONResponse passes unsupported objects to jsonable_encoder."""
+    response = FastJSONResponse(
+        content={"user": UserBaseData(id=1, name="Tony"), "ids": {3}, 4: "four"},
+    )
+
+    assert json.loads(response.body) == {
+        "user": {"id": 1, "name": "Tony"},
+        "ids": [3],
+        "4": "four",
+    }
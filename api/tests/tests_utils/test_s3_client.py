@@ -0,0 +1,227 @@
+import asyncio
+from hashlib import sha256
+from typing import AsyncGenerator
+
+import pytest
+from botocore.exceptions import EndpointConnectionError
+from database_models.db_config import ResponseData  # noqa
+from utils import s3_config  # noqa
+from utils.metrics import metrics  # noqa
+from utils.s3_config import MultipartUpload, S3utils, create_s3_client  # noqa
+from utils.s3_config import get_file_ext, object_exists  # noqa
+
+# min part size of S3
+PART_SIZE = 5 * 1024 * 1024
+
+
+async def test_started_client_is_shared():
+    """Test S3Client.get_client() yields one client after S3Client.start()."""
+    s3_client = create_s3_client()
+    await s3_client.start()
+    async with s3_client.get_client() as first_client:
+        async with s3_client.get_client() as second_client:
+            assert first_client is second_client
+    await s3_client.close()
+
+    async with s3_client.get_client() as own_client:
+        assert own_client is not first_client
+
+
+def test_get_url():
+    """Test S3utils.get_url() joins the public base and the key."""
+    url: str = S3utils.get_url("cat.jpg", base_url="https://cdn.example.com/medias")
+
+    assert url == "https://cdn.example.com/medias/cat.jpg"
+
+
+@pytest.mark.parametrize(("filename", "file_ext"), [
+    ("cat.JPG", "jpg"),
+    ("archive.tar.gz", "gz"),
+    ("no_extension", "bin"),
+    ("dots.", "bin"),
+    ("long.{ext}".format(ext="x" * 200), "bin"),
+    ("path.j/../pg", "bin"),
+])
+def test_get_file_ext(filename: str, file_ext: str):
+    """Test get_file_ext() returns a short alphanumeric extension.
+
+    Parameters:
+        filename: name of the uploaded file
+        file_ext: expected extension
+    """
+    assert get_file_ext(filename) == file_ext
+
+
+async def test_delete_multiple_by_batches():
+    """Test S3Client.delete_multiple() deletes the media by several batches."""
+    s3_client = create_s3_client()
+    names: list[str] = ["batch_{index}.txt".format(index=index) for index in range(5)]
+    async with s3_client.get_client() as client:
+        await asyncio.gather(*(
+            client.put_object(Bucket=s3_client.bucket_name, Key=name, Body=b"data")
+            for name in names
+        ))
+
+    res: ResponseData = await s3_client.delete_multiple(names, batch_size=2)
+
+    assert res.status_code == 200
+    assert res.response == {"result": True, "failed_keys": []}
+    async with s3_client.get_client() as client:
+        listed = await client.list_objects_v2(
+            Bucket=s3_client.bucket_name, Prefix="batch_",
+        )
+    assert listed["KeyCount"] == 0
+
+
+async def test_delete_multiple_reports_failed_keys():
+    """Test S3Client.delete_multiple() returns keys of the failed batches."""
+    s3_client = create_s3_client()
+    s3_client.bucket_name = "missing-bucket"
+    names = ["first.txt", "second.txt", "third.txt"]
+
+    res: ResponseData = await s3_client.delete_multiple(names, batch_size=2)
+
+    assert res.status_code == 500
+    assert res.response["result"] is False
+    assert sorted(res.response["failed_keys"]) == sorted(names)
+
+
+async def iter_chunks(content: bytes, chunk_size: int) -> AsyncGenerator[bytes, None]:
+    """Yield content by chunks.
+
+    Parameters:
+        content: bytes
+        chunk_size: int
+
+    Yields:
+        bytes
+    """
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
+
+
+async def test_multipart_upload():
+    """Test MultipartUpload uploads an object bigger than a part by parts."""
+    s3_client = create_s3_client()
+    content: bytes = bytes(range(256)) * (11 * 1024 * 4)
+    async with s3_client.get_client() as client:
+        upload = MultipartUpload(
+            client, s3_client.bucket_name, ".bin", part_size=PART_SIZE,
+        )
+        key: str = await upload.upload(iter_chunks(content, 64 * 1024))
+        stored = await client.get_object(Bucket=s3_client.bucket_name, Key=key)
+        stored_content: bytes = await stored["Body"].read()
+        listed = await client.list_objects_v2(
+            Bucket=s3_client.bucket_name, Prefix="uploads/",
+        )
+
+    assert key == "{hash}.bin".format(hash=sha256(content).hexdigest())
+    assert upload.size == len(content)
+    assert stored_content == content
+    assert listed["KeyCount"] == 0
+
+
+def get_deduplicated_count() -> int:
+    """Return number of the skipped uploads.
+
+    Returns:
+        int
+    """
+    return metrics.snapshot()["counters"].get("s3.upload.deduplicated", 0)
+
+
+async def test_upload_is_deduplicated():
+    """Test MultipartUpload doesn't store the same content twice."""
+    s3_client = create_s3_client()
+    content = b"same content"
+    async with s3_client.get_client() as client:
+        first_key: str = await MultipartUpload(
+            client, s3_client.bucket_name, ".txt",
+        ).upload(iter_chunks(content, 4))
+        deduplicated: int = get_deduplicated_count()
+        second_key: str = await MultipartUpload(
+            client, s3_client.bucket_name, ".txt",
+        ).upload(iter_chunks(content, 4))
+
+    assert first_key == second_key
+    assert get_deduplicated_count() == deduplicated + 1
+
+
+async def fail_registration(key: str) -> ResponseData:
+    """Register no media like MediasMethods.add() with the db down.
+
+    Parameters:
+        key: name of the object
+
+    Returns:
+        ResponseData: {result: False}, 500
+    """
+    return ResponseData(
+        response={
+            "result": False,
+            "error_type": "SQLAlchemyError",
+            "error_message": "Connection refused.",
+        },
+        status_code=500,
+    )
+
+
+async def fail_connection(*args) -> None:
+    """Stand-in of object_exists() failing to connect to the storage.
+
+    Parameters:
+        args: client, bucket_name and key, ignored
+
+    Raises:
+        EndpointConnectionError: always
+    """
+    raise EndpointConnectionError(endpoint_url="http://storage")
+
+
+async def test_upload_with_storage_down(monkeypatch: pytest.MonkeyPatch):
+    """Test S3Client.upload() returns an error if the storage is unreachable.
+
+    Parameters:
+        monkeypatch: MonkeyPatch
+    """
+    monkeypatch.setattr(s3_config, "object_exists", fail_connection)
+
+    res: ResponseData = await create_s3_client().upload(
+        iter_chunks(b"storage down", 4), "file.txt",
+    )
+
+    assert res.status_code == 500
+    assert res.response["result"] is False
+    assert "storage" in res.response["error_message"]
+
+
+async def test_not_registered_upload_is_not_stored():
+    """Test S3Client.upload() doesn't store the object if its media isn't stored."""
+    s3_client = create_s3_client()
+
+    res: ResponseData = await s3_client.upload(
+        iter_chunks(b"not registered", 4), "file.txt", register=fail_registration,
+    )
+
+    assert res.status_code == 500
+    async with s3_client.get_client() as client:
+        assert not await object_exists(client, s3_client.bucket_name, res.response["key"])
+
+
+async def test_multipart_upload_is_aborted():
+    """Test MultipartUpload aborts the upload when the stream fails."""
+    s3_client = create_s3_client()
+
+    async def failing_chunks() -> AsyncGenerator[bytes, None]:  # noqa: WPS430
+        async for chunk in iter_chunks(b"x" * (PART_SIZE * 2), 1024 * 1024):
+            yield chunk
+        raise ValueError("client disconnected")
+
+    async with s3_client.get_client() as client:
+        with pytest.raises(ValueError):
+            await MultipartUpload(
+                client, s3_client.bucket_name, ".bin", part_size=PART_SIZE,
+            ).upload(failing_chunks())
+        uploads = await client.list_multipart_uploads(Bucket=s3_client.bucket_name)
+
+    assert not uploads.get("Uploads")
@@ -0,0 +1,145 @@
+from typing import AsyncGenerator, Optional
+
+import pytest
+from redis.asyncio import Redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import REDIS_URL  # noqa
+from database_models.tweets_orm_models import Tweets  # noqa
+from utils.timelines import AuthorTweetsStore, CelebrityRegistry, Timeline  # noqa
+from utils.timelines import TimelineStore, add_tweet_to_timelines  # noqa
+from utils.timelines import get_timeline  # noqa
+
+
+@pytest.fixture
+async def redis() -> AsyncGenerator[Redis, None]:
+    """Async fixture: yield Redis connection with empty timelines.
+
+    Yields:
+        Redis
+    """
+    connection = Redis.from_url(REDIS_URL)
+    await connection.delete(
+        CelebrityRegistry.key,
+        *await connection.keys("{prefix}:*".format(prefix=TimelineStore.prefix)),
+        *await connection.keys("{prefix}:*".format(prefix=AuthorTweetsStore.prefix)),
+    )
+    yield connection
+    await connection.close()
+
+
+async def get_feed_tweet_ids(
+    async_session: AsyncSession, author_ids: list[int],
+) -> list[int]:
+    """Return ids of the authors' tweets, the latest first.
+
+    Parameters:
+        async_session: AsyncSession
+        author_ids: list[int]
+
+    Returns:
+        list[int]
+    """
+    async with async_session as session:
+        request = await session.execute(
+            select(Tweets.id)
+            .where(Tweets.user_id.in_(author_ids))
+            .order_by(Tweets.id.desc()),
+        )
+    return request.scalars().all()
+
+
+async def publish_tweet(
+    redis: Redis,
+    async_session: AsyncSession,
+    user_id: int,
+    celebrity_threshold: Optional[int],
+) -> int:
+    """Add tweet of the user and push it to the timelines.
+
+    Parameters:
+        redis: Redis
+        async_session: AsyncSession
+        user_id: int
+        celebrity_threshold: followers of an author whose tweets aren't pushed
+
+    Returns:
+        int: tweet id
+    """
+    async with async_session as session:
+        new_tweet = Tweets(user_id=user_id, data="Timeline test")
+        session.add(new_tweet)
+        await session.commit()
+    await add_tweet_to_timelines(
+        redis,
+        author_id=user_id,
+        tweet_id=new_tweet.id,
+        async_session=async_session,
+        celebrity_threshold=celebrity_threshold,
+    )
+    return new_tweet.id
+
+
+async def test_timeline_store(redis: Redis):
+    """Test TimelineStore keeps the latest tweets of built timelines only.
+
+    Parameters:
+        redis: Redis
+    """
+    store = TimelineStore(redis, size=3)
+    await store.build_many({1: Timeline(tweet_ids=[5, 4, 2, 1], celebrity_ids=[9])})
+    await store.add(user_ids=[1, 2], members=[7])
+    await store.remove(user_ids=[1], members=[4])
+
+    timelines = await store.get_many([1, 2])
+    assert timelines[1].tweet_ids == [7, 5]
+    assert timelines[1].celebrity_ids == [9]
+    assert timelines[2] is None
+
+
+async def test_timeline_is_built_and_updated(
+    redis: Redis, async_session: AsyncSession,
+):
+    """Test get_timeline() builds timeline from the db and the new tweet is pushed.
+
+    User 4 follows user 1.
+
+    Parameters:
+        redis: Redis
+        async_session: AsyncSession
+    """
+    expected_ids = await get_feed_tweet_ids(async_session, [1, 4])
+    built_ids = await get_timeline(
+        redis, user_id=4, async_session=async_session, celebrity_threshold=None,
+    )
+    tweet_id = await publish_tweet(
+        redis, async_session, user_id=1, celebrity_threshold=None,
+    )
+
+    timelines = await TimelineStore(redis).get_many([4])
+    assert built_ids == expected_ids
+    assert timelines[4].tweet_ids == [tweet_id, *expected_ids]
+
+
+async def test_celebrity_tweets_are_merged_on_read(
+    redis: Redis, async_session: AsyncSession,
+):
+    """Test tweets of an author over the threshold aren't pushed but are read.
+
+    User 4 follows user 1 which has 1 follower.
+
+    Parameters:
+        redis: Redis
+        async_session: AsyncSession
+    """
+    await get_timeline(redis, user_id=4, async_session=async_session)
+    await publish_tweet(redis, async_session, user_id=1, celebrity_threshold=1)
+
+    tweet_ids = await get_timeline(
+        redis, user_id=4, async_session=async_session, celebrity_threshold=1,
+    )
+    timelines = await TimelineStore(redis).get_many([4])
+    assert tweet_ids == await get_feed_tweet_ids(async_session, [1, 4])
+    assert timelines[4].tweet_ids == []
+    assert timelines[4].celebrity_ids == [1]